@@ -37,6 +37,51 @@ ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS', '').split(',') if os.getenv('D
 
 CLIENT_SERVICE_URL = os.getenv('CLIENT_SERVICE_URL', '')
 
+# Maximum number of verified JWT payloads kept in memory per worker
+JWT_CACHE_MAX_ENTRIES = int(os.getenv('JWT_CACHE_MAX_ENTRIES', '1024'))
+
+# Embed the caller's permission bitmasks in access tokens so requests can be authorized without DB access
+JWT_EMBED_PERMISSIONS = os.getenv('JWT_EMBED_PERMISSIONS', 'False') == 'True'
+
+# Seconds between checks of the shared permissions version by the in-memory permission engine
+PERMISSION_ENGINE_CHECK_INTERVAL = float(os.getenv('PERMISSION_ENGINE_CHECK_INTERVAL', '1.0'))
+
+# Failed login throttling: 'cache' shares counts between workers through the Django cache,
+# 'memory' keeps them per worker and is only meant for single-process development
+LOGIN_FAILURE_COUNTER_BACKEND = os.getenv('LOGIN_FAILURE_COUNTER_BACKEND', 'cache')
+LOGIN_FAILURE_CACHE_ALIAS = os.getenv('LOGIN_FAILURE_CACHE_ALIAS', 'default')
+LOGIN_FAILURE_WINDOW_SECONDS = int(os.getenv('LOGIN_FAILURE_WINDOW_SECONDS', '900'))
+LOGIN_FAILURE_THRESHOLD = int(os.getenv('LOGIN_FAILURE_THRESHOLD', '5'))
+# Keys kept at most by the 'memory' backend, the least recently touched are dropped first
+LOGIN_FAILURE_MAX_ENTRIES = int(os.getenv('LOGIN_FAILURE_MAX_ENTRIES', '100000'))
+
+# Password hashing executor: 'thread' or 'process' pool, bounded queue and timeout in seconds
+PASSWORD_HASHING_EXECUTOR = os.getenv('PASSWORD_HASHING_EXECUTOR', 'thread')
+PASSWORD_HASHING_WORKERS = int(os.getenv('PASSWORD_HASHING_WORKERS', str(os.cpu_count() or 1)))
+PASSWORD_HASHING_MAX_QUEUE = int(os.getenv('PASSWORD_HASHING_MAX_QUEUE', '64'))
+PASSWORD_HASHING_TIMEOUT = float(os.getenv('PASSWORD_HASHING_TIMEOUT', '10'))
+
+# Fixture loading: entries written per transaction and models loaded concurrently per dependency level
+DATA_LOADER_BATCH_SIZE = int(os.getenv('DATA_LOADER_BATCH_SIZE', '1000'))
+DATA_LOADER_MAX_WORKERS = int(os.getenv('DATA_LOADER_MAX_WORKERS', '4'))
+# Keep a hash per fixture entry so only the changed entries of a changed file are reloaded
+DATA_LOADER_TRACK_ENTRIES = os.getenv('DATA_LOADER_TRACK_ENTRIES', 'True') == 'True'
+# Parsed fixture entries buffered ahead of the writer by the load_fixtures command
+DATA_LOADER_QUEUE_SIZE = int(os.getenv('DATA_LOADER_QUEUE_SIZE', '10000'))
+
+# Background jobs run concurrently in each server process
+BACKGROUND_JOB_WORKERS = int(os.getenv('BACKGROUND_JOB_WORKERS', '2'))
+# Bulk company import: rows written per transaction, larger uploads run as a background job
+COMPANY_IMPORT_BATCH_SIZE = int(os.getenv('COMPANY_IMPORT_BATCH_SIZE', '500'))
+COMPANY_IMPORT_SYNC_MAX_BYTES = int(os.getenv('COMPANY_IMPORT_SYNC_MAX_BYTES', str(1024 * 1024)))
+# Rows deleted per transaction when a company is deleted in the background
+COMPANY_DELETION_CHUNK_SIZE = int(os.getenv('COMPANY_DELETION_CHUNK_SIZE', '1000'))
+# Company aggregate cache: L2 Django cache alias and timeout, per worker L1 size and seconds trusted unchecked
+COMPANY_CACHE_ALIAS = os.getenv('COMPANY_CACHE_ALIAS', 'default')
+COMPANY_CACHE_TIMEOUT = int(os.getenv('COMPANY_CACHE_TIMEOUT', '300'))
+COMPANY_CACHE_L1_MAX_ENTRIES = int(os.getenv('COMPANY_CACHE_L1_MAX_ENTRIES', '1024'))
+COMPANY_CACHE_L1_TTL = float(os.getenv('COMPANY_CACHE_L1_TTL', '5.0'))
+
 # Application definition
 INSTALLED_APPS = [
     'apps.access',
@@ -112,6 +157,18 @@ DATABASES = {
     'lite': dj_database_url.parse(os.getenv('DATABASE_URL', f'sqlite:///{BASE_DIR / "db.sqlite3"}'))
 }
 
+# The default cache carries state every worker must see: the permissions version, the company
+# aggregate cache generations and, with the 'cache' backend, the failed login counts. Deployments
+# running more than one worker process must point it at a shared backend such as
+# django.core.cache.backends.redis.RedisCache; the in-process LocMemCache is only suitable for a
+# single worker and is reported by the utils.W001 system check.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -206,6 +263,12 @@ LOGGING = {
     },
 }
 
+# Audit write-behind buffer for login histories and login attempts
+AUDIT_WRITE_BEHIND_ENABLED = os.getenv('AUDIT_WRITE_BEHIND_ENABLED', 'True') == 'True'
+AUDIT_BUFFER_MAX_SIZE = int(os.getenv('AUDIT_BUFFER_MAX_SIZE', '500'))
+AUDIT_BUFFER_FLUSH_INTERVAL = float(os.getenv('AUDIT_BUFFER_FLUSH_INTERVAL', '2.0'))
+AUDIT_SPILL_FILE = str(LOG_DIR / 'audit_spill.ndjson')
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
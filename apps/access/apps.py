@@ -1,6 +1,23 @@
 from django.apps import AppConfig
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_migrate
+
+
+def rebuild_group_closure(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    from apps.access.common.inheritance.group_closure import group_closure
+    from apps.access.models import UserGroupAccess, UserGroupAccessClosure
+    # The app ships no migrations, so on a fresh database the tables may not exist yet
+    tables = connections[using].introspection.table_names()
+    if UserGroupAccess._meta.db_table not in tables or UserGroupAccessClosure._meta.db_table not in tables:
+        return
+    group_closure.rebuild()
 
 
 class AccessConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.access'
+
+    def ready(self):
+        from apps.access import signals  # noqa: F401
+        # Backfill the inheritance closure for rows written while the signals were not connected
+        post_migrate.connect(rebuild_group_closure, sender=self)
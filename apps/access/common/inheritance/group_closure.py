@@ -0,0 +1,118 @@
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from apps.access.models import AccessGroups, UserGroupAccess, UserGroupAccessClosure
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("GROUP_CLOSURE")
+
+class GroupInheritanceClosure:
+    """
+    Maintains the transitive closure of UserGroupAccess.group_inherit.
+    Every access row has one closure row per ancestor it inherits from (including itself at depth 0),
+    so the effective groups of an owner are resolved with a single join instead of walking the
+    group_inherit chain one query per level.
+    The closure is maintained incrementally by the signals in apps.access.signals:
+    - attach(): a new row or a changed group_inherit re-links the row's subtree under the new parent.
+    - detach(): a deleted row unlinks its subtree from the ancestors above it.
+    Cycles are rejected with a ValidationError before the row is saved (see check_cycle).
+    Usage:
+        group_closure.effective_group_ids("admin", admin_id)
+        group_closure.rebuild()  # after bulk_create / queryset.update, which bypass the signals
+    """
+    def check_cycle(self, instance):
+        """
+        Raise a ValidationError when linking the row to its group_inherit would create a cycle.
+        """
+        parent_id = instance.group_inherit_id
+        if parent_id is None or instance.pk is None:
+            return
+        if parent_id == instance.pk or UserGroupAccessClosure.objects.filter(
+            access_id=parent_id, ancestor_id=instance.pk
+        ).exists():
+            raise ValidationError(
+                {"group_inherit": f"User group access {parent_id} inherits from {instance.pk}, linking them would create a cycle."}
+            )
+
+    def attach(self, instance):
+        """
+        Link the row and every row inheriting from it under the row's current group_inherit.
+        Costs a constant number of queries regardless of the depth of the chain.
+        """
+        with transaction.atomic():
+            UserGroupAccessClosure.objects.get_or_create(access_id=instance.pk, ancestor_id=instance.pk, defaults={"depth": 0})
+            subtree = dict(
+                UserGroupAccessClosure.objects.filter(ancestor_id=instance.pk).values_list("access_id", "depth")
+            )
+            # Drop the paths from the subtree to the old ancestors of the row
+            UserGroupAccessClosure.objects.filter(access_id__in=subtree).exclude(ancestor_id__in=subtree).delete()
+            if instance.group_inherit_id is None:
+                return
+            ancestors = UserGroupAccessClosure.objects.filter(
+                access_id=instance.group_inherit_id
+            ).values_list("ancestor_id", "depth")
+            UserGroupAccessClosure.objects.bulk_create([
+                UserGroupAccessClosure(access_id=access_id, ancestor_id=ancestor_id, depth=sub_depth + anc_depth + 1)
+                for ancestor_id, anc_depth in ancestors
+                for access_id, sub_depth in subtree.items()
+            ])
+
+    def detach(self, instance):
+        """
+        Unlink the subtree of a row that is about to be deleted from the ancestors above it.
+        The children's group_inherit is set to NULL by the database, and the row's own closure
+        rows are removed by the cascade.
+        """
+        subtree = UserGroupAccessClosure.objects.filter(ancestor_id=instance.pk).exclude(access_id=instance.pk).values("access_id")
+        ancestors = UserGroupAccessClosure.objects.filter(access_id=instance.pk).exclude(ancestor_id=instance.pk).values("ancestor_id")
+        UserGroupAccessClosure.objects.filter(access_id__in=subtree, ancestor_id__in=ancestors).delete()
+
+    def rebuild(self):
+        """
+        Recompute the whole closure from the group_inherit links.
+        Reads the links in one query and rewrites the closure table in bulk; rows caught in a
+        cycle only resolve up to the point where the cycle closes.
+        """
+        parents = dict(UserGroupAccess.objects.values_list("id", "group_inherit_id"))
+        rows = []
+        for access_id in parents:
+            ancestor_id, depth, seen = access_id, 0, set()
+            while ancestor_id is not None and ancestor_id not in seen:
+                seen.add(ancestor_id)
+                rows.append(UserGroupAccessClosure(access_id=access_id, ancestor_id=ancestor_id, depth=depth))
+                ancestor_id, depth = parents.get(ancestor_id), depth + 1
+            if ancestor_id is not None:
+                logger.warning(f"User group access {access_id} is part of an inheritance cycle at {ancestor_id}.")
+        with transaction.atomic():
+            UserGroupAccessClosure.objects.all().delete()
+            UserGroupAccessClosure.objects.bulk_create(rows, batch_size=1000)
+        logger.info(f"Rebuilt the group inheritance closure with {len(rows)} rows for {len(parents)} access rows.")
+        return len(rows)
+
+    def effective_groups(self, connect_key, owner_id):
+        """
+        Queryset of the active access groups of the owner, including every inherited group.
+        A group is only inherited while every access row on the group_inherit chain leading to it
+        is active: a deactivated row in the middle of the chain cuts off everything above it.
+        Evaluates to a single query.
+        """
+        # A closure path is broken when it runs through an inactive row, i.e. the row lies between
+        # the owner's row and the ancestor
+        broken = UserGroupAccessClosure.objects.filter(
+            access_id=OuterRef("access_id"),
+            ancestor__is_active=False,
+            ancestor__closure_ancestors__ancestor_id=OuterRef("ancestor_id"),
+        )
+        paths = UserGroupAccessClosure.objects.filter(
+            ~Exists(broken),
+            access__is_active=True,
+            ancestor__is_active=True,
+            **{f"access__{connect_key}_id": owner_id},
+        )
+        return AccessGroups.objects.filter(is_active=True, user_access__in=paths.values("ancestor_id")).distinct()
+
+    def effective_group_ids(self, connect_key, owner_id):
+        return self.effective_groups(connect_key, owner_id).values_list("id", flat=True)
+
+group_closure = GroupInheritanceClosure()
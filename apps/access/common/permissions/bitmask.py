@@ -0,0 +1,31 @@
+
+PERMISSION_ACTIONS = ("view", "create", "update", "delete", "archive", "restore")
+
+# Bit assigned to each action, e.g. {"view": 1, "create": 2, "update": 4, ...}
+PERMISSION_BITS = {action: 1 << index for index, action in enumerate(PERMISSION_ACTIONS)}
+
+PERMISSION_FIELDS = tuple(f"can_{action}" for action in PERMISSION_ACTIONS)
+
+def encode_permission_flags(*flags):
+    """
+    Encode the can_view/can_create/can_update/can_delete/can_archive/can_restore flags,
+    in that order, into a single integer bitmask.
+    """
+    mask = 0
+    for action, flag in zip(PERMISSION_ACTIONS, flags):
+        if flag:
+            mask |= PERMISSION_BITS[action]
+    return mask
+
+def decode_permission_mask(mask):
+    """
+    Return the list of actions allowed by a bitmask.
+    """
+    return [action for action in PERMISSION_ACTIONS if mask & PERMISSION_BITS[action]]
+
+def mask_allows(mask, action):
+    """
+    Check whether the bitmask allows the action. Unknown actions are never allowed.
+    """
+    bit = PERMISSION_BITS.get(action)
+    return bool(bit and mask & bit)
@@ -0,0 +1,73 @@
+
+from apps.access.models import AccessPermissions
+from apps.access.common.inheritance.group_closure import group_closure
+from apps.access.common.permissions.bitmask import PERMISSION_FIELDS, encode_permission_flags, mask_allows
+from apps.access.common.permissions.version import get_permissions_version
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("PERMISSION_CLAIMS")
+
+PERMISSIONS_CLAIM = "perms"
+PERMISSIONS_VERSION_CLAIM = "pv"
+
+class PermissionClaims:
+    """
+    Derives and validates the permission claims embedded in access tokens.
+    The 'perms' claim maps each AccessObjects id (as a string) to the bitmask of actions the caller
+    may perform on it, merged over all of the caller's active groups, inherited ones included. The 'pv' claim records the
+    permissions version the bitmasks were derived from; when the version has moved on, the claims
+    are stale and the permissions are re-derived from the database.
+    Usage:
+        claims = PermissionClaims("admin").derive(admin_id)
+        token = JWTService().generate_jwt_token(admin_id, company_id, permissions=claims["perms"], permissions_version=claims["pv"])
+        permissions = PermissionClaims("admin").resolve(payload)
+        PermissionClaims.allows(permissions, object_id, "update")
+    Attributes:
+        connect_key (str): Either 'admin' or 'user'.
+    """
+    def __init__(self, connect_key="admin"):
+        self.connect_key = connect_key
+
+    def derive(self, owner_id, group_ids=None):
+        """
+        Compute the effective permission bitmasks of the owner in a single query.
+        :param owner_id: The id of the AdministratorUserDetails or UserDetails row.
+        :param group_ids: The active access group ids of the owner, if already known.
+        :return: A dictionary with the 'perms' and 'pv' claims.
+        """
+        version = get_permissions_version()
+        if group_ids is None:
+            group_ids = group_closure.effective_group_ids(self.connect_key, owner_id)
+        elif not group_ids:
+            return {PERMISSIONS_CLAIM: {}, PERMISSIONS_VERSION_CLAIM: version}
+
+        permissions = {}
+        rows = AccessPermissions.objects.filter(group_id__in=group_ids).values_list("object_id", *PERMISSION_FIELDS)
+        for object_id, *flags in rows:
+            key = str(object_id)
+            permissions[key] = permissions.get(key, 0) | encode_permission_flags(*flags)
+        # Objects without any allowed action carry no information
+        permissions = {key: mask for key, mask in permissions.items() if mask}
+        return {PERMISSIONS_CLAIM: permissions, PERMISSIONS_VERSION_CLAIM: version}
+
+    def is_stale(self, payload):
+        """
+        Check whether the permission claims of a token payload are missing or out of date.
+        Costs one cache lookup.
+        """
+        if PERMISSIONS_CLAIM not in payload:
+            return True
+        return payload.get(PERMISSIONS_VERSION_CLAIM) != get_permissions_version()
+
+    def resolve(self, payload):
+        """
+        Return the permission bitmasks for a token payload, re-deriving them when the claims are stale.
+        """
+        if not self.is_stale(payload):
+            return payload[PERMISSIONS_CLAIM]
+        logger.info(f"Permission claims of {self.connect_key} {payload.get('user_id')} are stale, re-deriving.")
+        return self.derive(payload.get("user_id"))[PERMISSIONS_CLAIM]
+
+    @staticmethod
+    def allows(permissions, object_id, action):
+        return mask_allows(permissions.get(str(object_id), 0), action)
@@ -0,0 +1,227 @@
+
+import threading
+import time
+from functools import reduce
+from operator import or_
+from types import MappingProxyType
+from django.apps import apps
+from django.conf import settings
+from apps.access.models import AccessPermissions
+from apps.access.common.permissions.bitmask import PERMISSION_FIELDS, encode_permission_flags, mask_allows
+from apps.access.common.permissions.row_filter import row_filter_cache
+from apps.access.common.permissions.version import get_permissions_version, permissions_version_is_shared
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("PERMISSION_ENGINE")
+
+class PermissionMatrix:
+    """
+    Immutable, compiled view of every group's permissions.
+    Maps (group id, access object name) to the bitmask of allowed actions, and to the compiled
+    row filter of the permission when it has a filter_query. 'object_ids' maps the access object
+    names to their ids, the keys of the permission claims of access tokens.
+    A new matrix is built for every change, so readers never see a partially updated matrix.
+    """
+    __slots__ = ("masks", "filters", "object_ids", "version")
+
+    def __init__(self, masks, filters, version, object_ids=None):
+        self.masks = MappingProxyType(masks)
+        self.filters = MappingProxyType(filters)
+        self.object_ids = MappingProxyType(object_ids or {})
+        self.version = version
+
+    def mask(self, group_ids, object_name):
+        mask = 0
+        for group_id in group_ids:
+            mask |= self.masks.get((group_id, object_name), 0)
+        return mask
+
+    def replace_group(self, group_id, group_masks, group_filters, version, object_ids=None):
+        """
+        Return a new matrix in which the entries of one group are replaced.
+        """
+        masks = {key: value for key, value in self.masks.items() if key[0] != group_id}
+        masks.update(group_masks)
+        filters = {key: value for key, value in self.filters.items() if key[0] != group_id}
+        filters.update(group_filters)
+        return PermissionMatrix(masks, filters, version, dict(self.object_ids, **(object_ids or {})))
+
+def object_model(object_name):
+    """
+    Return the model an AccessObjects name such as 'company.CompanyDetails' refers to, or None.
+    """
+    try:
+        return apps.get_model(object_name)
+    except (LookupError, ValueError):
+        return None
+
+def compile_permissions(queryset):
+    """
+    Compile AccessPermissions rows into {(group id, object name): bitmask},
+    {(group id, object name): CompiledRowFilter} and {object name: object id} dictionaries.
+    Filters are taken from the row filter cache, so only permissions saved since they were last
+    compiled are parsed again.
+    """
+    masks, filters, object_ids = {}, {}, {}
+    rows = queryset.values_list("id", "updated_at", "filter_query", "group_id", "object_id", "object__name", *PERMISSION_FIELDS)
+    for permission_id, updated_at, filter_query, group_id, object_id, object_name, *flags in rows:
+        object_ids[object_name] = object_id
+        mask = encode_permission_flags(*flags)
+        if not mask:
+            continue
+        masks[(group_id, object_name)] = mask
+        if filter_query and filter_query.strip():
+            model = object_model(object_name)
+            if model is None:
+                logger.warning(f"Ignoring filter of permission {permission_id}: {object_name} is not a model.")
+                continue
+            filters[(group_id, object_name)] = row_filter_cache.get(permission_id, updated_at, filter_query, model)
+    return masks, filters, object_ids
+
+class PermissionEngine:
+    """
+    Evaluates permissions against a compiled, in-memory PermissionMatrix.
+    'can' answers in O(1) per group of the principal without touching the database. When the access
+    token embeds permission claims (JWT_EMBED_PERMISSIONS) and they are current, 'can' answers from
+    the claims and the groups of the principal are not even loaded; stale claims are re-derived.
+    Claims are only used with a shared default cache, with a per-process cache a worker cannot tell
+    that claims were revoked elsewhere, so the groups of the principal are checked instead.
+    The matrix is compiled once per worker and kept current in two ways:
+    - Changes made in this worker recompile only the affected group once they are committed
+      (see apps.access.signals).
+    - Changes made in other workers are detected through the permissions version, which is checked
+      at most every PERMISSION_ENGINE_CHECK_INTERVAL seconds; a mismatch triggers a rebuild. The
+      version reaches the other workers only through a shared default cache (see CACHES).
+    Usage:
+        permission_engine.can(request.principal, "company.CompanyDetails", "update")
+        permission_engine.restrict(CompanyDetails.objects.all(), request.principal, "view")
+    Attributes:
+        check_interval (float): Seconds between checks of the shared permissions version.
+    """
+    def __init__(self, check_interval=1.0):
+        self.check_interval = check_interval
+        self._matrix = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def can(self, principal, object_name, action):
+        """
+        Check whether the principal may perform the action on the access object.
+        :param principal: The RequestPrincipal of the request.
+        :param object_name: The AccessObjects name, e.g. 'company.CompanyDetails'.
+        :param action: One of view, create, update, delete, archive or restore.
+        """
+        if principal is None:
+            return False
+        if self.uses_claims(principal):
+            object_id = self.matrix().object_ids.get(object_name)
+            return object_id is not None and principal.has_permission(object_id, action)
+        group_ids = principal.access_group_ids
+        if not group_ids:
+            return False
+        return mask_allows(self.matrix().mask(group_ids, object_name), action)
+
+    @staticmethod
+    def uses_claims(principal):
+        """
+        Whether the permission claims of the principal's token can be trusted.
+        """
+        return principal.has_permission_claims and permissions_version_is_shared()
+
+    def restrict(self, queryset, principal, action="view"):
+        """
+        Restrict a queryset to the rows the principal may perform the action on.
+        Each group granting the action contributes its row filter; the filters are OR-ed and pushed
+        into the query. A granting group without a filter leaves the queryset unrestricted, and
+        when no group grants the action the queryset is empty.
+        :param queryset: A queryset of the model an AccessObjects row refers to.
+        :param principal: The RequestPrincipal of the request.
+        :param action: One of view, create, update, delete, archive or restore.
+        """
+        if principal is None:
+            return queryset.none()
+        model = queryset.model
+        object_name = f"{model._meta.app_label}.{model.__name__}"
+        # Current claims answer a denial without loading the groups
+        if self.uses_claims(principal) and not self.can(principal, object_name, action):
+            return queryset.none()
+        if not principal.access_group_ids:
+            return queryset.none()
+        matrix = self.matrix()
+        variables = {"user_id": principal.user_id, "company_id": principal.company_id}
+        conditions = []
+        for group_id in principal.access_group_ids:
+            if not mask_allows(matrix.masks.get((group_id, object_name), 0), action):
+                continue
+            row_filter = matrix.filters.get((group_id, object_name))
+            if row_filter is None:
+                return queryset
+            conditions.append(row_filter.bind(variables))
+        if not conditions:
+            return queryset.none()
+        return queryset.filter(reduce(or_, conditions))
+
+    def matrix(self):
+        """
+        Return the current matrix, rebuilding it when another worker changed the permissions.
+        """
+        matrix = self._matrix
+        now = time.monotonic()
+        if matrix is not None and now - self._checked_at < self.check_interval:
+            return matrix
+        version = get_permissions_version()
+        self._checked_at = now
+        if matrix is not None and matrix.version == version:
+            return matrix
+        return self.rebuild(version)
+
+    def rebuild(self, version=None):
+        """
+        Compile the whole matrix from the database with a single query.
+        """
+        with self._lock:
+            version = version if version is not None else get_permissions_version()
+            if self._matrix is not None and self._matrix.version == version:
+                return self._matrix
+            started = time.monotonic()
+            masks, filters, object_ids = compile_permissions(AccessPermissions.objects.all())
+            self._matrix = PermissionMatrix(masks, filters, version, object_ids)
+            logger.info(f"Compiled {len(self._matrix.masks)} permission entries for version {version} in {time.monotonic() - started:.3f}s")
+            return self._matrix
+
+    def refresh_group(self, group_id, version):
+        """
+        Recompile the permissions of one group after a local change bumped the version to 'version'.
+        When other changes happened in between, the matrix is left stale and rebuilt on next use.
+        """
+        with self._lock:
+            matrix = self._matrix
+            if matrix is None:
+                return
+            if matrix.version != version - 1:
+                self._checked_at = 0.0
+                return
+            group_masks, group_filters, object_ids = compile_permissions(AccessPermissions.objects.filter(group_id=group_id))
+            self._matrix = matrix.replace_group(group_id, group_masks, group_filters, version, object_ids)
+
+    def invalidate(self):
+        """
+        Force a version check on next use, e.g. after a bulk change that sent no signals.
+        """
+        self._checked_at = 0.0
+
+    def advance_version(self, version):
+        """
+        Record a version bump caused by a local change that does not affect the matrix,
+        e.g. a user being added to a group.
+        """
+        with self._lock:
+            matrix = self._matrix
+            if matrix is None:
+                return
+            if matrix.version == version - 1:
+                self._matrix = PermissionMatrix(dict(matrix.masks), dict(matrix.filters), version, dict(matrix.object_ids))
+            else:
+                self._checked_at = 0.0
+
+permission_engine = PermissionEngine(check_interval=getattr(settings, "PERMISSION_ENGINE_CHECK_INTERVAL", 1.0))
@@ -0,0 +1,308 @@
+
+import re
+import threading
+from collections import OrderedDict
+from functools import reduce
+from operator import and_, or_
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("ROW_FILTER")
+
+MAX_FILTER_LENGTH = 2000
+MAX_FILTER_DEPTH = 32
+# Variables a filter may reference, resolved from the request principal
+FILTER_VARIABLES = ("user_id", "company_id")
+# Value of a variable the principal has no value for
+UNSET = object()
+
+COMPARISON_LOOKUPS = {
+    "=": "exact",
+    "!=": "exact",
+    "<": "lt",
+    "<=": "lte",
+    ">": "gt",
+    ">=": "gte",
+    "contains": "contains",
+    "icontains": "icontains",
+    "startswith": "startswith",
+}
+
+TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<number>-?\d+(?:\.\d+)?)
+      | (?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+      | (?P<variable>\$[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<symbol><=|>=|!=|=|<|>|\(|\)|,)
+      | (?P<word>[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)
+    )""", re.VERBOSE)
+
+KEYWORDS = {"and", "or", "not", "in", "is", "null", "true", "false", "contains", "icontains", "startswith"}
+
+class RowFilterError(ValueError):
+    """
+    Raised when a filter_query cannot be parsed or references something the model does not allow.
+    """
+
+def tokenize(text):
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_RE.match(text, position)
+        if not match or match.end() == position:
+            raise RowFilterError(f"Unexpected character at position {position}: {text[position:position + 10]!r}")
+        position = match.end()
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "word" and value.lower() in KEYWORDS:
+            kind, value = "keyword", value.lower()
+        tokens.append((kind, value))
+    return tokens
+
+class FilterParser:
+    """
+    Recursive descent parser for the row filter language.
+    Grammar:
+        expression := term ('or' term)*
+        term       := factor ('and' factor)*
+        factor     := 'not' factor | '(' expression ')' | comparison
+        comparison := field ('=' | '!=' | '<' | '<=' | '>' | '>=' | 'contains' | 'icontains' | 'startswith') value
+                    | field ['not'] 'in' '(' value (',' value)* ')'
+                    | field 'is' ['not'] 'null'
+        value      := number | 'string' | true | false | null | $variable
+        field      := name ('.' name)*    (dots follow foreign keys)
+    """
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+        self.depth = 0
+
+    def parse(self):
+        if not self.tokens:
+            raise RowFilterError("Empty filter.")
+        node = self._expression()
+        if self.position != len(self.tokens):
+            raise RowFilterError(f"Unexpected token {self._peek()[1]!r}.")
+        return node
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _accept(self, kind, value=None):
+        token_kind, token_value = self._peek()
+        if token_kind == kind and (value is None or token_value == value):
+            self.position += 1
+            return token_value
+        return None
+
+    def _expect(self, kind, value=None):
+        token = self._accept(kind, value)
+        if token is None:
+            raise RowFilterError(f"Expected {value or kind}, found {self._peek()[1]!r}.")
+        return token
+
+    def _expression(self):
+        nodes = [self._term()]
+        while self._accept("keyword", "or"):
+            nodes.append(self._term())
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def _term(self):
+        nodes = [self._factor()]
+        while self._accept("keyword", "and"):
+            nodes.append(self._factor())
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def _factor(self):
+        self.depth += 1
+        if self.depth > MAX_FILTER_DEPTH:
+            raise RowFilterError("Filter is nested too deeply.")
+        try:
+            if self._accept("keyword", "not"):
+                return ("not", self._factor())
+            if self._accept("symbol", "("):
+                node = self._expression()
+                self._expect("symbol", ")")
+                return node
+            return self._comparison()
+        finally:
+            self.depth -= 1
+
+    def _comparison(self):
+        field = self._expect("word")
+        if self._accept("keyword", "is"):
+            negate = bool(self._accept("keyword", "not"))
+            self._expect("keyword", "null")
+            return ("cmp", field, "isnull", ("literal", not negate), False)
+        negate = bool(self._accept("keyword", "not"))
+        if self._accept("keyword", "in"):
+            self._expect("symbol", "(")
+            values = [self._value()]
+            while self._accept("symbol", ","):
+                values.append(self._value())
+            self._expect("symbol", ")")
+            return ("cmp", field, "in", ("list", values), negate)
+        if negate:
+            raise RowFilterError("'not' after a field must be followed by 'in'.")
+        kind, operator = self._peek()
+        if operator not in COMPARISON_LOOKUPS or kind not in ("symbol", "keyword"):
+            raise RowFilterError(f"Expected a comparison operator after {field!r}, found {operator!r}.")
+        self.position += 1
+        return ("cmp", field, COMPARISON_LOOKUPS[operator], self._value(), operator == "!=")
+
+    def _value(self):
+        kind, value = self._peek()
+        self.position += 1
+        if kind == "number":
+            return ("literal", float(value) if "." in value else int(value))
+        if kind == "string":
+            return ("literal", re.sub(r"\\(.)", r"\1", value[1:-1]))
+        if kind == "variable":
+            name = value[1:]
+            if name not in FILTER_VARIABLES:
+                raise RowFilterError(f"Unknown variable ${name}, expected one of {', '.join(FILTER_VARIABLES)}.")
+            return ("variable", name)
+        if kind == "keyword" and value in ("true", "false", "null"):
+            return ("literal", {"true": True, "false": False, "null": None}[value])
+        raise RowFilterError(f"Expected a value, found {value!r}.")
+
+def resolve_field_path(model, field):
+    """
+    Validate a dotted field path against the model and return it as a Django lookup path.
+    Only concrete fields and forward relations are allowed, so a filter can never multiply rows.
+    """
+    parts = field.split(".")
+    current = model
+    for index, part in enumerate(parts):
+        try:
+            model_field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            raise RowFilterError(f"{current.__name__} has no field {part!r}.")
+        if model_field.is_relation and (model_field.one_to_many or model_field.many_to_many):
+            raise RowFilterError(f"{current.__name__}.{part} is a multi-valued relation and cannot be filtered on.")
+        if index < len(parts) - 1:
+            if not model_field.is_relation:
+                raise RowFilterError(f"{current.__name__}.{part} is not a relation.")
+            current = model_field.related_model
+    return "__".join(parts)
+
+class CompiledRowFilter:
+    """
+    A parsed and validated filter_query, ready to be turned into a Q object for a principal.
+    Usage:
+        row_filter = CompiledRowFilter.compile("company_id = $company_id and is_active = true", CompanyDetails)
+        queryset.filter(row_filter.bind({"company_id": 5}))
+    Attributes:
+        text (str): The source filter.
+        error (str): Why the filter could not be compiled; such a filter matches no rows.
+    """
+    __slots__ = ("text", "error", "_build")
+
+    def __init__(self, text, build=None, error=None):
+        self.text = text
+        self.error = error
+        self._build = build
+
+    @classmethod
+    def compile(cls, text, model):
+        try:
+            if len(text) > MAX_FILTER_LENGTH:
+                raise RowFilterError(f"Filter is longer than {MAX_FILTER_LENGTH} characters.")
+            return cls(text, build=cls._compile_node(FilterParser(text).parse(), model))
+        except RowFilterError as e:
+            logger.error(f"Invalid row filter {text!r} for {model.__name__}: {e}")
+            return cls(text, error=str(e))
+
+    @classmethod
+    def _compile_node(cls, node, model):
+        """
+        Turn the syntax tree into a function of the variables, so binding a request costs no parsing.
+        """
+        kind = node[0]
+        if kind in ("and", "or"):
+            builders = [cls._compile_node(child, model) for child in node[1]]
+            combine = and_ if kind == "and" else or_
+            return lambda variables: reduce(combine, (build(variables) for build in builders))
+        if kind == "not":
+            build = cls._compile_node(node[1], model)
+            return lambda variables: ~build(variables)
+        _, field, lookup, value, negate = node
+        key = f"{resolve_field_path(model, field)}__{lookup}"
+        resolve = cls._compile_value(value)
+        if value[0] == "variable" or (value[0] == "list" and any(item[0] == "variable" for item in value[1])):
+            return cls._compile_variable_comparison(key, lookup, resolve, negate)
+        if negate:
+            return lambda variables: ~Q(**{key: resolve(variables)})
+        return lambda variables: Q(**{key: resolve(variables)})
+
+    @staticmethod
+    def _compile_variable_comparison(key, lookup, resolve, negate):
+        """
+        A comparison with a variable that is not set, e.g. $company_id of a principal without a
+        company, matches no rows instead of comparing with NULL. In a list the unset variables are
+        left out, and 'not in' with an unset variable matches no rows either.
+        """
+        def build(variables):
+            resolved = resolve(variables)
+            if lookup == "in":
+                values = [item for item in resolved if item is not UNSET]
+                if not values or (negate and len(values) < len(resolved)):
+                    return Q(pk__in=[])
+                return ~Q(**{key: values}) if negate else Q(**{key: values})
+            if resolved is UNSET:
+                return Q(pk__in=[])
+            return ~Q(**{key: resolved}) if negate else Q(**{key: resolved})
+        return build
+
+    @classmethod
+    def _compile_value(cls, value):
+        kind = value[0]
+        if kind == "literal":
+            return lambda variables: value[1]
+        if kind == "variable":
+            def resolve_variable(variables):
+                resolved = variables.get(value[1])
+                return UNSET if resolved is None else resolved
+            return resolve_variable
+        resolvers = [cls._compile_value(item) for item in value[1]]
+        return lambda variables: [resolve(variables) for resolve in resolvers]
+
+    def bind(self, variables):
+        """
+        Return the Q object of the filter for the given variables.
+        """
+        if self.error is not None:
+            return Q(pk__in=[])
+        return self._build(variables)
+
+class RowFilterCache:
+    """
+    LRU cache of compiled filters keyed by (permission id, updated_at).
+    A permission is parsed again only when it was saved since it was last compiled.
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, permission_id, updated_at, text, model):
+        key = (permission_id, updated_at)
+        with self._lock:
+            compiled = self._entries.get(key)
+            if compiled is not None and compiled.text == text:
+                self._entries.move_to_end(key)
+                return compiled
+        compiled = CompiledRowFilter.compile(text, model)
+        with self._lock:
+            self._entries[key] = compiled
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+row_filter_cache = RowFilterCache()
@@ -0,0 +1,46 @@
+
+import time
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from apps.utils.checks import process_local_cache_aliases
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("PERMISSIONS_VERSION")
+
+PERMISSIONS_VERSION_KEY = "access:permissions_version"
+
+def get_permissions_version():
+    """
+    Return the current permissions version, kept in the default Django cache.
+    The version is bumped whenever a permission, group or group assignment changes. Workers only
+    see each other's bumps when the default cache is shared between processes (see CACHES and the
+    utils.W001 system check); with the per-process LocMemCache every worker has its own version.
+    """
+    version = cache.get(PERMISSIONS_VERSION_KEY)
+    if version is None:
+        version = _initialize_version()
+    return version
+
+def permissions_version_is_shared():
+    """
+    Whether bumps of the permissions version reach every worker, i.e. the default cache is shared.
+    Permission claims can only be trusted when it is: with a per-process cache a worker never sees
+    the bumps made by the others and would keep accepting claims that were revoked.
+    """
+    return DEFAULT_CACHE_ALIAS not in process_local_cache_aliases()
+
+def _initialize_version():
+    # Seed with the current time so a version lost from the cache never comes back lower than before
+    cache.add(PERMISSIONS_VERSION_KEY, int(time.time() * 1000), timeout=None)
+    return cache.get(PERMISSIONS_VERSION_KEY)
+
+def bump_permissions_version():
+    """
+    Invalidate every permission derived so far, e.g. the permission claims of issued tokens.
+    """
+    try:
+        version = cache.incr(PERMISSIONS_VERSION_KEY)
+    except ValueError:
+        _initialize_version()
+        version = cache.incr(PERMISSIONS_VERSION_KEY)
+    logger.info(f"Permissions version bumped to {version}")
+    return version
@@ -1,4 +1,5 @@
-from apps.access.models import AccessGroups, AccessPermissions, AccessObjects, UserGroupAccess
+from apps.access.models import AccessGroups, UserGroupAccess
+from apps.access.logic.services.provision_access import ProvisionAccessPermissions
 from apps.administration.models import AdministratorUserDetails
 import json
 
@@ -80,12 +81,8 @@ class LoadAdminAccess:
                 "can_archive": True,
                 "can_restore": True
             }
-            admin_portal_objects = AccessObjects.objects.filter(module='admin_portal')
-            for obj in admin_portal_objects:
-                check = AccessPermissions.objects.filter(object=obj)
-                if not check.exists():
-                    AccessPermissions.objects.create(group=group_object, object=obj, **default_permissions)
-            return {"code": 201, "status": "success", "message": "Access permissions created successfully"}
+            template = {"objects": {"module": "admin_portal"}, "permissions": default_permissions}
+            return ProvisionAccessPermissions([group_object.id], [template]).execute()
         except Exception as e:
             print(f"Error creating access permissions: {e}")
             return {"code": 500, "status": "error", "message": str(e)}
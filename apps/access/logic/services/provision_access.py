@@ -0,0 +1,100 @@
+from django.db import transaction
+from apps.access.models import AccessObjects, AccessPermissions
+from apps.access.common.permissions.bitmask import PERMISSION_FIELDS
+from apps.access.common.permissions.engine import permission_engine
+from apps.access.common.permissions.version import bump_permissions_version
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger(__name__)
+
+# AccessObjects lookups a template may select its objects with
+TEMPLATE_OBJECT_LOOKUPS = ("module", "application", "model_name", "name__in", "id__in")
+
+class ProvisionAccessPermissions:
+    """
+    Set-based provisioning of AccessPermissions for many groups and templates at once.
+    A template selects access objects and carries the permission flags to grant on them:
+        {
+            "objects": {"module": "admin_portal"},
+            "permissions": {"can_view": True, "can_update": True},
+            "filter_query": "company_id = $company_id",  # optional
+        }
+    Every template is applied to every group. The missing (group, object) pairs are computed with a
+    single query over the existing permissions and bulk inserted in batches inside a single
+    transaction. Conflicting rows are skipped, so existing permissions are never modified; pairs
+    inserted by a concurrent request between the read and the insert are still counted as inserted.
+    When two templates select the same object, the first one wins.
+    Usage:
+        result = ProvisionAccessPermissions([group.id], [template]).execute()
+    Returns a dictionary with the following keys:
+    - 'code': HTTP status code (int)
+    - 'status': Status of the operation (str)
+    - 'message': A message describing the result (str)
+    - 'data': {"inserted": int, "skipped": int}
+    Attributes:
+        group_ids (list): Ids of the AccessGroups to provision.
+        templates (list): Permission templates as described above.
+        batch_size (int): Rows per INSERT statement.
+    """
+    def __init__(self, group_ids, templates, batch_size=500):
+        self.group_ids = list(dict.fromkeys(group_ids))
+        self.templates = templates
+        self.batch_size = batch_size
+
+    def execute(self):
+        try:
+            with transaction.atomic():
+                grants = self._resolve_templates()
+                object_ids = list(grants)
+                existing = set(
+                    AccessPermissions.objects.filter(group_id__in=self.group_ids, object_id__in=object_ids)
+                    .values_list("group_id", "object_id")
+                )
+                missing = [
+                    AccessPermissions(group_id=group_id, object_id=object_id, **grants[object_id])
+                    for group_id in self.group_ids
+                    for object_id in object_ids
+                    if (group_id, object_id) not in existing
+                ]
+                # ignore_conflicts skips pairs another request inserted since they were read
+                AccessPermissions.objects.bulk_create(missing, batch_size=self.batch_size, ignore_conflicts=True)
+                inserted = len(missing)
+                if missing:
+                    # Bulk inserts send no signals, invalidate the compiled permissions explicitly
+                    transaction.on_commit(self._invalidate_permissions)
+            total = len(self.group_ids) * len(object_ids)
+            logger.info(f"Provisioned {inserted} access permissions for {len(self.group_ids)} groups, skipped {total - inserted}.")
+            return {
+                "code": 201 if inserted else 200,
+                "status": "success",
+                "message": f"{inserted} access permissions created, {total - inserted} already existed",
+                "data": {"inserted": inserted, "skipped": total - inserted},
+            }
+        except ValueError as e:
+            logger.error(f"Invalid access permission template: {e}")
+            return {"code": 400, "status": "error", "message": str(e), "data": None}
+        except Exception as e:
+            logger.error(f"Error provisioning access permissions: {e}")
+            return {"code": 500, "status": "error", "message": str(e), "data": None}
+
+    def _resolve_templates(self):
+        """
+        Resolve the objects of every template into {object id: permission fields}.
+        """
+        grants = {}
+        for template in self.templates:
+            lookups = template.get("objects") or {}
+            unknown = set(lookups) - set(TEMPLATE_OBJECT_LOOKUPS)
+            if unknown:
+                raise ValueError(f"Unsupported object lookups in template: {', '.join(sorted(unknown))}")
+            permissions = template.get("permissions") or {}
+            fields = {field: bool(permissions.get(field, False)) for field in PERMISSION_FIELDS}
+            fields["filter_query"] = template.get("filter_query")
+            for object_id in AccessObjects.objects.filter(**lookups).values_list("id", flat=True):
+                grants.setdefault(object_id, fields)
+        return grants
+
+    @staticmethod
+    def _invalidate_permissions():
+        bump_permissions_version()
+        permission_engine.invalidate()
@@ -75,4 +75,18 @@ class UserGroupAccess(models.Model):
         unique_together = ('user', 'group')
 
     def __str__(self):
-        return f"{self.user.email} - {self.group.name}"
\ No newline at end of file
+        return f"{self.user.email} - {self.group.name}"
+
+class UserGroupAccessClosure(models.Model):
+    access = models.ForeignKey(UserGroupAccess, on_delete=models.CASCADE, related_name='closure_ancestors')
+    ancestor = models.ForeignKey(UserGroupAccess, on_delete=models.CASCADE, related_name='closure_descendants')
+    depth = models.PositiveIntegerField(default=0)  # 0 for the row itself, 1 for its group_inherit, ...
+
+    class Meta:
+        verbose_name = "User Group Access Closure"
+        verbose_name_plural = "User Group Access Closures"
+        db_table = 'access_user_group_closure'
+        unique_together = ('access', 'ancestor')
+
+    def __str__(self):
+        return f"{self.access_id} inherits {self.ancestor_id} (depth {self.depth})"
\ No newline at end of file
@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from apps.access.models import AccessGroups, AccessObjects, AccessPermissions, UserGroupAccess
+from apps.access.common.inheritance.group_closure import group_closure
+from apps.access.common.permissions.engine import permission_engine
+from apps.access.common.permissions.version import bump_permissions_version
+
+@receiver([post_save, post_delete], sender=AccessPermissions)
+def refresh_group_permissions(sender, instance, **kwargs):
+    """
+    Bump the permissions version and recompile the permissions of the affected group once the change
+    is committed, so neither this worker nor the others compile rows that may still be rolled back.
+    """
+    group_id = instance.group_id
+
+    def refresh():
+        version = bump_permissions_version()
+        permission_engine.refresh_group(group_id, version)
+
+    transaction.on_commit(refresh)
+
+@receiver([post_save, post_delete], sender=AccessGroups)
+@receiver([post_save, post_delete], sender=UserGroupAccess)
+def invalidate_permission_claims(sender, **kwargs):
+    """
+    Bump the permissions version so permission claims derived before this change are re-derived.
+    """
+    transaction.on_commit(lambda: permission_engine.advance_version(bump_permissions_version()))
+
+@receiver([post_save, post_delete], sender=AccessObjects)
+def invalidate_permission_matrix(sender, **kwargs):
+    """
+    Access objects are compiled into the matrix by name, so any change to them forces a rebuild.
+    """
+    transaction.on_commit(bump_permissions_version)
+
+@receiver(pre_save, sender=UserGroupAccess)
+def check_group_inheritance(sender, instance, raw=False, **kwargs):
+    """
+    Reject inheritance cycles and remember whether the group_inherit link changed.
+    """
+    if raw:
+        return
+    group_closure.check_cycle(instance)
+    if instance.pk is None:
+        instance._group_inherit_changed = True
+        return
+    previous = list(sender.objects.filter(pk=instance.pk).values_list("group_inherit_id", flat=True))
+    instance._group_inherit_changed = not previous or previous[0] != instance.group_inherit_id
+
+@receiver(post_save, sender=UserGroupAccess)
+def attach_group_inheritance(sender, instance, created, raw=False, **kwargs):
+    """
+    Keep the inheritance closure in step with the group_inherit link of the saved row.
+    """
+    if created or getattr(instance, "_group_inherit_changed", True):
+        group_closure.attach(instance)
+
+@receiver(pre_delete, sender=UserGroupAccess)
+def detach_group_inheritance(sender, instance, **kwargs):
+    """
+    Unlink the rows inheriting from the deleted row from the ancestors above it.
+    """
+    group_closure.detach(instance)
@@ -1,3 +1,193 @@
-from django.test import TestCase
+from unittest import mock
+from django.test import SimpleTestCase, TestCase, override_settings
+from apps.access.common.inheritance.group_closure import group_closure
+from apps.access.common.permissions.bitmask import PERMISSION_BITS
+from apps.access.common.permissions.claims import PERMISSIONS_CLAIM, PERMISSIONS_VERSION_CLAIM
+from apps.access.common.permissions.engine import permission_engine
+from apps.access.common.permissions.version import bump_permissions_version, get_permissions_version, permissions_version_is_shared
+from apps.access.common.permissions.row_filter import CompiledRowFilter, FilterParser, RowFilterError
+from apps.access.logic.services.provision_access import ProvisionAccessPermissions
+from apps.access.models import AccessGroups, AccessObjects, AccessPermissions, UserGroupAccess
+from apps.administration.models import AdministratorUserDetails
+from apps.company.models import CompanyDetails
+from apps.partner.models import PartnerDetails
+from apps.utils.common.auth.principal import RequestPrincipal
 
-# Create your tests here.
+class RowFilterParserTests(SimpleTestCase):
+    """
+    Syntax of the row filter language, independent of any model.
+    """
+    def test_and_binds_tighter_than_or(self):
+        tree = FilterParser("a = 1 or b = 2 and c = 3").parse()
+        self.assertEqual(tree[0], "or")
+        self.assertEqual(tree[1][1][0], "and")
+
+    def test_keywords_are_case_insensitive(self):
+        self.assertEqual(FilterParser("a = 1 AND b IS NOT NULL").parse()[0], "and")
+
+    def test_rejects_malformed_filters(self):
+        for text in ("", "a =", "a = 1 and", "(a = 1", "a == 1", "a not = 1", "a = $tenant_id", "a = 1 ; b = 2"):
+            with self.subTest(text=text), self.assertRaises(RowFilterError):
+                FilterParser(text).parse()
+
+    def test_rejects_deep_nesting(self):
+        with self.assertRaises(RowFilterError):
+            FilterParser("(" * 40 + "a = 1" + ")" * 40).parse()
+
+class CompiledRowFilterTests(TestCase):
+    """
+    Filters compiled against CompanyDetails and applied to real rows.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = PartnerDetails.objects.create(name="North")
+        cls.acme = CompanyDetails.objects.create(name="Acme", is_active=True, affiliated_partner=cls.partner)
+        cls.beta = CompanyDetails.objects.create(name="Beta", is_active=False)
+        cls.gamma = CompanyDetails.objects.create(name="Gamma Corp", is_active=True)
+
+    def _names(self, text, **variables):
+        row_filter = CompiledRowFilter.compile(text, CompanyDetails)
+        self.assertIsNone(row_filter.error)
+        return sorted(CompanyDetails.objects.filter(row_filter.bind(variables)).values_list("name", flat=True))
+
+    def test_comparisons_and_booleans(self):
+        self.assertEqual(self._names("is_active = true"), ["Acme", "Gamma Corp"])
+        self.assertEqual(self._names("is_active != true"), ["Beta"])
+        self.assertEqual(self._names("name startswith 'G' or name = \"Beta\""), ["Beta", "Gamma Corp"])
+
+    def test_variables_are_bound_per_request(self):
+        text = "id = $company_id"
+        self.assertEqual(self._names(text, company_id=self.acme.id), ["Acme"])
+        self.assertEqual(self._names(text, company_id=self.beta.id), ["Beta"])
+
+    def test_unset_variables_match_no_rows(self):
+        cases = (
+            ("id = $company_id", []),
+            # Would match every company without a partner if compared with NULL
+            ("affiliated_partner = $company_id", []),
+            ("id != $company_id", []),
+            (f"id in ({self.acme.id}, $company_id)", ["Acme"]),
+            (f"id not in ({self.acme.id}, $company_id)", []),
+        )
+        for text, expected in cases:
+            with self.subTest(text=text):
+                self.assertEqual(self._names(text, company_id=None), expected)
+                self.assertEqual(self._names(text), expected)
+        # An explicit null still compares with NULL
+        self.assertEqual(self._names("affiliated_partner = null"), ["Beta", "Gamma Corp"])
+
+    def test_in_not_in_and_null(self):
+        self.assertEqual(self._names(f"id in ({self.acme.id}, {self.beta.id})"), ["Acme", "Beta"])
+        self.assertEqual(self._names(f"id not in ({self.acme.id}, {self.beta.id})"), ["Gamma Corp"])
+        self.assertEqual(self._names("affiliated_partner is null"), ["Beta", "Gamma Corp"])
+        self.assertEqual(self._names("not (affiliated_partner is null)"), ["Acme"])
+
+    def test_follows_foreign_keys(self):
+        self.assertEqual(self._names("affiliated_partner.name = 'North'"), ["Acme"])
+
+    def test_invalid_fields_match_no_rows(self):
+        for text in ("missing = 1", "addresses.city = 'x'", "name.id = 1", "is_active ="):
+            with self.subTest(text=text):
+                row_filter = CompiledRowFilter.compile(text, CompanyDetails)
+                self.assertIsNotNone(row_filter.error)
+                self.assertFalse(CompanyDetails.objects.filter(row_filter.bind({})).exists())
+
+class ProvisionAccessPermissionsTests(TestCase):
+    """
+    Only the permissions a provisioning call inserts itself are reported as inserted.
+    """
+    templates = [{"objects": {"application": "company"}, "permissions": {"can_view": True}}]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.groups = [AccessGroups.objects.create(name=name, unique_id=name) for name in ("first", "second")]
+        cls.objects = list(AccessObjects.objects.filter(application="company"))
+
+    def _provision(self):
+        return ProvisionAccessPermissions([group.id for group in self.groups], self.templates, batch_size=2).execute()
+
+    def test_inserts_the_missing_permissions_once(self):
+        # The access objects are synced from the installed apps after migrate
+        self.assertGreater(len(self.objects), 1)
+        total = len(self.groups) * len(self.objects)
+        self.assertEqual(self._provision()["data"], {"inserted": total, "skipped": 0})
+        result = self._provision()
+        self.assertEqual(result["code"], 200)
+        self.assertEqual(result["data"], {"inserted": 0, "skipped": total})
+        self.assertEqual(AccessPermissions.objects.filter(group__in=self.groups).count(), total)
+
+    def test_existing_permissions_are_skipped_and_kept(self):
+        first = self.objects[0]
+        AccessPermissions.objects.create(group=self.groups[0], object=first, can_view=False, can_update=True)
+        total = len(self.groups) * len(self.objects)
+        self.assertEqual(self._provision()["data"], {"inserted": total - 1, "skipped": 1})
+        existing = AccessPermissions.objects.get(group=self.groups[0], object=first)
+        self.assertEqual((existing.can_view, existing.can_update), (False, True))
+        self.assertEqual(AccessPermissions.objects.filter(group__in=self.groups).count(), total)
+
+class PermissionEngineClaimsTests(TestCase):
+    """
+    Permission claims are only trusted when the permissions version is kept in a shared cache.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.object = AccessObjects.objects.get(name="company.CompanyDetails")
+        group = AccessGroups.objects.create(name="viewers", unique_id="viewers")
+        AccessPermissions.objects.create(group=group, object=cls.object, can_view=True)
+
+    def setUp(self):
+        permission_engine.rebuild(bump_permissions_version())
+
+    def _principal(self):
+        # The claims grant an update that no group of the caller grants any more
+        return RequestPrincipal({
+            "user_id": 0,
+            PERMISSIONS_CLAIM: {str(self.object.id): PERMISSION_BITS["update"]},
+            PERMISSIONS_VERSION_CLAIM: get_permissions_version(),
+        })
+
+    def test_per_process_cache_is_not_shared(self):
+        self.assertFalse(permissions_version_is_shared())
+        with override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://cache"}}):
+            self.assertTrue(permissions_version_is_shared())
+
+    def test_claims_are_ignored_with_a_per_process_cache(self):
+        principal = self._principal()
+        self.assertFalse(permission_engine.can(principal, "company.CompanyDetails", "update"))
+        self.assertFalse(permission_engine.restrict(CompanyDetails.objects.all(), principal, "update").exists())
+
+    def test_claims_are_used_with_a_shared_cache(self):
+        with mock.patch("apps.access.common.permissions.engine.permissions_version_is_shared", return_value=True):
+            self.assertTrue(permission_engine.can(self._principal(), "company.CompanyDetails", "update"))
+
+class GroupInheritanceTests(TestCase):
+    """
+    Groups are inherited through the group_inherit chain only while every row on it is active.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = AdministratorUserDetails.objects.create(name="Admin", email="admin@example.com", code="admin")
+        cls.groups = [AccessGroups.objects.create(name=name, unique_id=name) for name in ("own", "middle", "top")]
+        cls.top = UserGroupAccess.objects.create(group=cls.groups[2], unique_id="top")
+        cls.middle = UserGroupAccess.objects.create(group=cls.groups[1], group_inherit=cls.top, unique_id="middle")
+        cls.own = UserGroupAccess.objects.create(admin=cls.admin, group=cls.groups[0], group_inherit=cls.middle, unique_id="own")
+
+    def _names(self):
+        with self.assertNumQueries(1):
+            return sorted(group.name for group in group_closure.effective_groups("admin", self.admin.id))
+
+    def test_inherits_the_whole_chain(self):
+        self.assertEqual(self._names(), ["middle", "own", "top"])
+
+    def test_inactive_intermediate_row_cuts_the_chain(self):
+        self.middle.is_active = False
+        self.middle.save()
+        self.assertEqual(self._names(), ["own"])
+
+    def test_inactive_top_row_only_drops_its_group(self):
+        UserGroupAccess.objects.filter(pk=self.top.pk).update(is_active=False)
+        self.assertEqual(self._names(), ["middle", "own"])
+
+    def test_inactive_own_row_grants_nothing(self):
+        UserGroupAccess.objects.filter(pk=self.own.pk).update(is_active=False)
+        self.assertEqual(self._names(), [])
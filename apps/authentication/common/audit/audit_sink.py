@@ -0,0 +1,282 @@
+
+import atexit
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("AUDIT_SINK")
+
+class AuditWriteBehindBuffer:
+    """
+    Write-behind sink for audit rows such as login histories and login attempts.
+    Records are buffered in memory and written with one bulk_create per model, either when the
+    buffer reaches 'max_batch_size' records or every 'flush_interval' seconds, whichever comes first.
+    Flushing happens on a background thread so the request that produced the record does not wait
+    for the INSERT. The buffer is flushed once more when the worker shuts down.
+    Batches that cannot be written are appended to a spill file and replayed on the next flush,
+    so audit rows survive database outages and worker restarts. Every worker process shares the
+    spill file, so spilling and taking a file over for replay hold an exclusive lock on
+    '<spill_path>.lock'; a batch is therefore replayed by exactly one worker.
+    A replayed batch that cannot be written in bulk (e.g. the admin or company it references was
+    deleted meanwhile) is retried row by row; rows that still fail are moved to the dead-letter file
+    '<spill_path>.dead' instead of being spilled again, so one bad row never holds back the others.
+    The 'auto_now_add' timestamps of a record are taken when it is added and kept in the spill file;
+    replayed rows get them back, so an outage does not re-date them. Rows written without spilling
+    are stamped when the batch is written, up to 'flush_interval' seconds after the event.
+    Usage:
+        audit_sink.add(AdministratorLoginHistory(admin_id=admin_id, ip_address=ip_address))
+        audit_sink.flush()
+        audit_sink.stats()
+    Attributes:
+        max_batch_size (int): Number of buffered records that triggers an immediate flush.
+        flush_interval (float): Maximum number of seconds a record stays in the buffer.
+        spill_path (str): File receiving batches that could not be written to the database.
+    """
+    def __init__(self, max_batch_size=500, flush_interval=2.0, spill_path=None):
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.flushed = 0
+        self.spilled = 0
+        self.flushes = 0
+        self._buffer = {}
+        self._size = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def add(self, instance):
+        """
+        Queue an unsaved model instance for insertion.
+        When write-behind is disabled the instance is saved immediately.
+        """
+        if not getattr(settings, "AUDIT_WRITE_BEHIND_ENABLED", True):
+            instance.save()
+            return
+        self._ensure_flusher()
+        now = timezone.now()
+        for field in self._event_time_fields(instance._meta.model):
+            if getattr(instance, field.attname) is None:
+                setattr(instance, field.attname, now)
+        with self._lock:
+            self._buffer.setdefault(instance._meta.label, []).append(instance)
+            self._size += 1
+            full = self._size >= self.max_batch_size
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """
+        Write every buffered record, plus any previously spilled records, to the database.
+        Returns the number of records written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending, self._buffer, self._size = self._buffer, {}, 0
+            written = self._replay_spill_file()
+            for label, instances in pending.items():
+                written += self._bulk_create(label, instances)
+            if written:
+                self.flushes += 1
+                self.flushed += written
+            return written
+
+    def close(self):
+        """
+        Stop the background flusher and flush the remaining records.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buffered": self._size,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "spilled": self.spilled,
+            }
+
+    def _ensure_flusher(self):
+        # The flusher thread does not survive a fork, so restart it in each worker process.
+        if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-write-behind", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=self.flush_interval)
+            self._wakeup.clear()
+            if self._stopped.is_set():
+                break
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing audit buffer: {e}")
+
+    @staticmethod
+    def _event_time_fields(model):
+        return [field for field in model._meta.concrete_fields if getattr(field, "auto_now_add", False)]
+
+    def _bulk_create(self, label, instances, replay=False):
+        """
+        Write the instances with one bulk_create. A failing batch is spilled, a failing replayed
+        batch is retried row by row.
+        """
+        Model = apps.get_model(label)
+        fields = self._event_time_fields(Model)
+        # bulk_create stamps auto_now_add fields, the event times of replayed rows are restored after
+        event_times = [{field.attname: getattr(instance, field.attname) for field in fields} for instance in instances]
+        try:
+            with transaction.atomic():
+                Model.objects.bulk_create(instances, batch_size=self.max_batch_size)
+                if replay and fields:
+                    for instance, times in zip(instances, event_times):
+                        for attname, value in times.items():
+                            setattr(instance, attname, value)
+                    saved = [instance for instance in instances if instance.pk is not None]
+                    Model.objects.bulk_update(saved, [field.name for field in fields], batch_size=self.max_batch_size)
+            return len(instances)
+        except Exception as e:
+            if not replay:
+                logger.error(f"Error writing {len(instances)} {label} audit records, spilling to disk: {e}")
+                self._spill(label, instances)
+                return 0
+            logger.warning(f"Error replaying {len(instances)} {label} audit records, retrying row by row: {e}")
+            return self._write_rows(label, Model, instances, event_times)
+
+    def _write_rows(self, label, Model, instances, event_times):
+        """
+        Write replayed records one by one, each in its own transaction, and move the records that
+        fail to the dead-letter file.
+        """
+        written, failed = 0, []
+        for instance, times in zip(instances, event_times):
+            times = {attname: value for attname, value in times.items() if value is not None}
+            try:
+                with transaction.atomic():
+                    instance.pk = None
+                    instance.save(force_insert=True)
+                    if times:
+                        Model.objects.filter(pk=instance.pk).update(**times)
+                for attname, value in times.items():
+                    setattr(instance, attname, value)
+                written += 1
+            except Exception as e:
+                failed.append((instance, str(e)))
+        if failed:
+            self._dead_letter(label, failed)
+        return written
+
+    @staticmethod
+    def _record(label, instance, **extra):
+        fields = {
+            field.attname: getattr(instance, field.attname)
+            for field in instance._meta.concrete_fields
+            if not field.primary_key
+        }
+        return json.dumps(dict({"model": label, "fields": fields}, **extra), cls=DjangoJSONEncoder) + "\n"
+
+    @contextmanager
+    def _spill_lock(self):
+        """
+        Exclusive lock on the spill files across the worker processes.
+        """
+        with open(f"{self.spill_path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _spill(self, label, instances):
+        if not self.spill_path:
+            logger.critical(f"No spill file configured, {len(instances)} {label} audit records were lost.")
+            return
+        try:
+            with self._spill_lock(), open(self.spill_path, "a", encoding="utf-8") as f:
+                for instance in instances:
+                    f.write(self._record(label, instance))
+                f.flush()
+                os.fsync(f.fileno())
+            self.spilled += len(instances)
+        except Exception as e:
+            logger.critical(f"Error spilling {len(instances)} {label} audit records: {e}")
+
+    def _dead_letter(self, label, failed):
+        """
+        Append records that cannot be written to the dead-letter file with their error, for inspection.
+        """
+        logger.critical(f"{len(failed)} {label} audit records cannot be written, moving them to the dead-letter file.")
+        try:
+            with self._spill_lock(), open(f"{self.spill_path}.dead", "a", encoding="utf-8") as f:
+                for instance, error in failed:
+                    f.write(self._record(label, instance, error=error))
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            logger.critical(f"Error writing {len(failed)} {label} audit records to the dead-letter file: {e}")
+
+    def _replay_spill_file(self):
+        """
+        Re-insert the records of the spill file. The file is moved aside first so records that fail
+        again are spilled to a fresh file instead of being replayed twice. Moving, reading and
+        removing it happen under the spill lock, so no other worker can take over the same records.
+        """
+        if not self.spill_path or not (os.path.exists(self.spill_path) or os.path.exists(f"{self.spill_path}.replay")):
+            return 0
+        replay_path = f"{self.spill_path}.replay"
+        try:
+            with self._spill_lock():
+                # A leftover replay file means an earlier replay was interrupted, so finish that one first.
+                interrupted = os.path.exists(replay_path)
+                if not interrupted and not os.path.exists(self.spill_path):
+                    return 0
+                if not interrupted:
+                    os.replace(self.spill_path, replay_path)
+                spilled = {}
+                with open(replay_path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        Model = apps.get_model(record["model"])
+                        spilled.setdefault(record["model"], []).append(Model(**record["fields"]))
+                os.remove(replay_path)
+        except Exception as e:
+            logger.error(f"Error reading audit spill file {self.spill_path}: {e}")
+            return 0
+        written = 0
+        for label, instances in spilled.items():
+            written += self._bulk_create(label, instances, replay=True)
+        if written:
+            logger.info(f"Replayed {written} spilled audit records.")
+        return written
+
+audit_sink = AuditWriteBehindBuffer(
+    max_batch_size=getattr(settings, "AUDIT_BUFFER_MAX_SIZE", 500),
+    flush_interval=getattr(settings, "AUDIT_BUFFER_FLUSH_INTERVAL", 2.0),
+    spill_path=getattr(settings, "AUDIT_SPILL_FILE", None),
+)
+atexit.register(audit_sink.close)
@@ -4,6 +4,8 @@ import json
 from django.conf import settings
 from apps.authentication.common.context.context import AuthenticationContext
 from apps.utils.common.logger.logger import PortalLogger
+from apps.authentication.common.throttle.failed_login_counter import get_failed_login_counter
+from apps.authentication.common.audit.audit_sink import audit_sink
 from apps.authentication.common.strategy.login import CredentialsLogin, GoogleSSOLogin, DiscordSSOLogin, MFAAuthentication
 
 logger = PortalLogger("ADMIN_AUTH_SERVICE")
@@ -24,6 +26,7 @@ class AuthenticationService:
         self.access_permission_object = None
         self.access_user_group_object = None
         self.otp_object = None
+        self.failed_login_counter = get_failed_login_counter()
     
     def set_connect_key(self, connect_key):
         self.connect_key = connect_key
@@ -82,27 +85,30 @@ class AuthenticationService:
     def _log_login_history(self, user_object, ip_address):
         """
         Log the login history for the user.
+        The row is queued on the audit write-behind buffer and inserted in a later batch.
         """
+        user_id = getattr(user_object, "id", user_object)
         try:
-            self.owner_login_history_object.objects.create(**{f"{self.connect_key}": user_object}, ip_address=ip_address)
-        except self.owner_login_history_object.DoesNotExist:
-            logger.error(f"Failed to log login history for user ID {user_object.id}.")
-            return {"code": 500, "status": "error", "message": "Internal server error while logging login history.", "data": None}
+            audit_sink.add(self.owner_login_history_object(**{f"{self.connect_key}_id": user_id}, ip_address=ip_address))
         except Exception as e:
-            logger.error(f"Error logging login history for user ID {user_object.id}: {e}")
+            logger.error(f"Error logging login history for user ID {user_id}: {e}")
             return {"code": 500, "status": "error", "message": "Internal server error while logging login history.", "data": None}
 
     def _log_login_attempt(self, user_object, success, ip_address):
         """
         Log the login attempt for the user.
+        The attempt row is kept for auditing while the failed login counter tracks consecutive failures.
+        The row is queued on the audit write-behind buffer and inserted in a later batch.
         """
+        user_id = getattr(user_object, "id", user_object)
+        if success:
+            self.failed_login_counter.reset(self.connect_key, user_id, ip_address)
+        else:
+            self.failed_login_counter.increment(self.connect_key, user_id, ip_address)
         try:
-            self.owner_login_attempt_object.objects.create(**{self.connect_key: user_object}, success=success, ip_address=ip_address)
-        except self.owner_login_attempt_object.DoesNotExist:
-            logger.error(f"Failed to log login attempt for user ID {user_object.id}.")
-            return {"code": 500, "status": "error", "message": "Internal server error while logging login attempt.", "data": None}
+            audit_sink.add(self.owner_login_attempt_object(**{f"{self.connect_key}_id": user_id}, success=success, ip_address=ip_address))
         except Exception as e:
-            logger.error(f"Error logging login attempt for user ID {user_object.id}: {e}")
+            logger.error(f"Error logging login attempt for user ID {user_id}: {e}")
             return {"code": 500, "status": "error", "message": "Internal server error while logging login attempt.", "data": None}
 
     def _check_flag_ip_address(self, ip_address):
@@ -122,19 +128,12 @@ class AuthenticationService:
     def _check_user_ip_consecutive_failed_attempts(self, user_id, ip_address):
         """
         Check the number of consecutive failed login attempts for the user from the given IP address.
+        The count comes from the sliding-window failed login counter instead of scanning the attempt history.
         Returns the count of failed attempts.
         """
         try:
-            failed_attempts = self.owner_login_attempt_object.objects.filter(
-                **{f"{self.connect_key}": user_id, 'ip_address': ip_address}
-            ).order_by('-id')[:10]
-            consecutive_failed = 0
-            for attempt in failed_attempts:
-                if not attempt.success:
-                    consecutive_failed += 1
-                else:
-                    consecutive_failed = 0
-            if consecutive_failed >= 5:
+            consecutive_failed = self.failed_login_counter.count(self.connect_key, user_id, ip_address)
+            if consecutive_failed >= self.failed_login_counter.threshold:
                 logger.warning(f"Admin ID {user_id} has {consecutive_failed} consecutive failed login attempts from IP {ip_address}.")
                 return {"status": "failed", "message": "Too many consecutive failed login attempts. IP address has been flagged."}
             else:
@@ -2,8 +2,8 @@
 from datetime import timedelta
 import random
 from django.utils import timezone
-from django.contrib.auth.hashers import make_password
 from apps.utils.common.logger.logger import PortalLogger
+from apps.authentication.common.hashing.password_pool import password_hashing_pool, PasswordHashingUnavailable
 
 logger = PortalLogger(__name__)
 
@@ -100,7 +100,7 @@ class ChangeAccountPasswordService:
                 return {"code": 400, "status": "error", "message": "Invalid or expired OTP.", "data": None}
             else:
                 credential = self.owner_credential_obj.objects.get(**{self.connect_key: user})
-                credential.password = make_password(self.new_password)
+                credential.password = password_hashing_pool.make_password(self.new_password)
                 credential.save()
                 self.otp_obj.objects.filter(**{self.connect_key: user}, otp=self.otp, is_used=False).update(is_used=True)
                 return {
@@ -112,6 +112,9 @@ class ChangeAccountPasswordService:
         except self.owner_obj.DoesNotExist:
             logger.error(f"User with email {self.email} does not exist.")
             return {"code": 404, "status": "error", "message": "User not found.", "data": None}
+        except PasswordHashingUnavailable as e:
+            logger.error(f"Password hashing unavailable: {e}")
+            return {"code": 503, "status": "error", "message": "Password change is temporarily unavailable. Please try again.", "data": None}
 
     def _check_user_otp_validity(self, otp, user):
         """
@@ -0,0 +1,79 @@
+
+from dataclasses import dataclass
+from django.db.models import Exists, OuterRef
+from apps.access.common.inheritance.group_closure import group_closure
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger(__name__)
+
+@dataclass(frozen=True, slots=True)
+class LoginRecord:
+    """
+    Read-only snapshot of everything a credential login needs to decide on the outcome.
+    """
+    credential_id: int
+    password: str
+    credential_is_active: bool
+    owner_id: int
+    owner_is_active: bool
+    company_id: int | None
+    is_ip_flagged: bool
+    access_group_ids: tuple
+
+    @property
+    def is_active(self):
+        return self.credential_is_active and self.owner_is_active
+
+class LoginDataAccess:
+    """
+    Data access layer for the credential login flow of both administrators and users.
+    The credential, its owner, the owner's company id and the flagged-IP status are read in a
+    single SELECT, and the active access groups, inherited ones included, in a second one. No model instances are built.
+    Usage:
+        record = LoginDataAccess(authentication_service).fetch(username, ip_address)
+    Attributes:
+        parent (AuthenticationService): Provides the connect key and the owner models.
+    """
+    def __init__(self, parent):
+        self.parent = parent
+
+    def fetch(self, username, ip_address):
+        """
+        Load the login record for the username.
+        Returns a LoginRecord, or None if no credential exists for the username.
+        """
+        connect_key = self.parent.connect_key
+        flagged_ip = self.parent.flagged_ip_object.objects.filter(
+            **{connect_key: OuterRef(connect_key)}, ip_address=ip_address, is_flagged=True
+        )
+        row = (
+            self.parent.owner_credential_object.objects
+            .filter(username=username)
+            .annotate(is_ip_flagged=Exists(flagged_ip))
+            .values(
+                "id",
+                "password",
+                "is_active",
+                "is_ip_flagged",
+                f"{connect_key}_id",
+                f"{connect_key}__is_active",
+                f"{connect_key}__company_id",
+            )
+            .first()
+        )
+        if not row:
+            return None
+        owner_id = row[f"{connect_key}_id"]
+        return LoginRecord(
+            credential_id=row["id"],
+            password=row["password"],
+            credential_is_active=row["is_active"],
+            owner_id=owner_id,
+            owner_is_active=row[f"{connect_key}__is_active"],
+            company_id=row[f"{connect_key}__company_id"],
+            is_ip_flagged=row["is_ip_flagged"],
+            access_group_ids=self._fetch_access_group_ids(owner_id),
+        )
+
+    def _fetch_access_group_ids(self, owner_id):
+        return tuple(group_closure.effective_group_ids(self.parent.connect_key, owner_id))
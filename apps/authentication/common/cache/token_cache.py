@@ -0,0 +1,96 @@
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("JWT_TOKEN_CACHE")
+
+class VerifiedTokenCache:
+    """
+    Bounded, expiry-aware LRU cache of verified JWT payloads.
+    Tokens are keyed by their SHA-256 digest so the raw token is never kept in memory as a key.
+    An entry is dropped as soon as its 'exp' claim has passed, and the least recently used
+    entry is evicted when the cache is full.
+    Usage:
+        cache = VerifiedTokenCache(max_entries=1024)
+        cache.set(token, result, exp)
+        result = cache.get(token)
+        cache.stats()  # {"hits": 1, "misses": 0, "hit_ratio": 1.0, ...}
+    Attributes:
+        max_entries (int): The maximum number of verified tokens kept in memory.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that required a full decode.
+    """
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token):
+        """
+        Return the cached verification result for the token, or None on a miss.
+        Expired entries are removed on lookup.
+        """
+        key = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            result, exp = entry
+            if exp is not None and exp <= time.time():
+                del self._entries[key]
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def set(self, token, result, exp):
+        """
+        Store a verification result for the token until its expiration timestamp.
+        """
+        if self.max_entries <= 0:
+            return
+        key = self._digest(token)
+        with self._lock:
+            self._entries[key] = (result, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """
+        Return the cache counters as a dictionary.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / total) if total else 0.0,
+            }
+
+verified_token_cache = VerifiedTokenCache(max_entries=getattr(settings, "JWT_CACHE_MAX_ENTRIES", 1024))
@@ -0,0 +1,119 @@
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.contrib.auth import hashers
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("PASSWORD_HASHING_POOL")
+
+class PasswordHashingUnavailable(Exception):
+    """Raised when a password hash cannot be computed in time."""
+
+class PasswordHashingBusy(PasswordHashingUnavailable):
+    """Raised when the hashing queue is full."""
+
+class PasswordHashingTimeout(PasswordHashingUnavailable):
+    """Raised when a hash did not complete within the configured timeout."""
+
+def _init_process_worker():
+    # Spawned worker processes start without a configured Django
+    import django
+    django.setup()
+
+def _check_password(password, encoded):
+    return hashers.check_password(password, encoded)
+
+def _make_password(password):
+    return hashers.make_password(password)
+
+class PasswordHashingPool:
+    """
+    Executor for the deliberately expensive password hashing calls.
+    Running check_password and make_password on a dedicated pool keeps slow hashes from blocking
+    the request worker, and keeps an ASGI event loop responsive when the async entry points are used.
+    The number of hashes waiting for a worker is bounded; once the queue is full new requests are
+    rejected with PasswordHashingBusy instead of piling up.
+    Usage:
+        password_hashing_pool.check_password(password, encoded)
+        password_hashing_pool.make_password(password)
+        await password_hashing_pool.acheck_password(password, encoded)
+        await password_hashing_pool.amake_password(password)
+    Attributes:
+        kind (str): 'thread' or 'process'.
+        max_workers (int): Number of hashes computed concurrently.
+        max_queue (int): Number of hashes allowed to wait for a free worker.
+        timeout (float): Seconds to wait for a hash before raising PasswordHashingTimeout.
+    """
+    def __init__(self, kind="thread", max_workers=None, max_queue=64, timeout=10.0):
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_process_worker)
+                    else:
+                        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hashing")
+        return self._executor
+
+    def _submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            logger.warning("Password hashing queue is full, rejecting request.")
+            raise PasswordHashingBusy("Password hashing queue is full.")
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def _result(self, future):
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            logger.error(f"Password hashing did not complete within {self.timeout} seconds.")
+            raise PasswordHashingTimeout("Password hashing timed out.")
+
+    async def _aresult(self, future):
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Password hashing did not complete within {self.timeout} seconds.")
+            raise PasswordHashingTimeout("Password hashing timed out.")
+
+    def check_password(self, password, encoded):
+        return self._result(self._submit(_check_password, password, encoded))
+
+    def make_password(self, password):
+        return self._result(self._submit(_make_password, password))
+
+    async def acheck_password(self, password, encoded):
+        return await self._aresult(self._submit(_check_password, password, encoded))
+
+    async def amake_password(self, password):
+        return await self._aresult(self._submit(_make_password, password))
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+password_hashing_pool = PasswordHashingPool(
+    kind=getattr(settings, "PASSWORD_HASHING_EXECUTOR", "thread"),
+    max_workers=getattr(settings, "PASSWORD_HASHING_WORKERS", None),
+    max_queue=getattr(settings, "PASSWORD_HASHING_MAX_QUEUE", 64),
+    timeout=getattr(settings, "PASSWORD_HASHING_TIMEOUT", 10.0),
+)
@@ -4,6 +4,7 @@ from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 from apps.utils.common.logger.logger import PortalLogger
+from apps.authentication.common.cache.token_cache import verified_token_cache
 
 logger = PortalLogger("JWT_SERVICE")
 
@@ -24,9 +25,11 @@ class JWTService:
     def __init__(self):
         pass
     
-    def generate_jwt_token(self, user_id, company_id=None, expiration=None, type=None):
+    def generate_jwt_token(self, user_id, company_id=None, expiration=None, type=None, permissions=None, permissions_version=None):
         """
         Build a JWT token for the user.
+        When permissions are given, the bitmask per AccessObjects id is embedded as the 'perms' claim
+        together with the permissions version it was derived from as the 'pv' claim.
         Returns the JWT token as a string.
         """
         payload = {
@@ -35,6 +38,9 @@ class JWTService:
             "exp": expiration or (timezone.now() + timedelta(days=1)).timestamp(),
             "type": type or "access_token"
         }
+        if permissions is not None:
+            payload["perms"] = permissions
+            payload["pv"] = permissions_version
         token = jwt.encode(payload, settings.SECRET_KEY, algorithm="HS256")
         return token
 
@@ -43,13 +49,21 @@ class JWTService:
             """
             Decode a JWT token and return the payload.
             If the token is invalid or expired, it returns None.
+            Verified tokens are served from the verified token cache until they expire,
+            so repeated requests with the same token skip signature verification.
+            The cached result is shared between requests and must be treated as read-only.
             """
+            cached = verified_token_cache.get(token)
+            if cached is not None:
+                return cached
             decoded_token = self._decode_jwt_token(token)
             if decoded_token["result"] == "expired":
                 return {"status": "error", "message": "Token expired", "data": self.refresh_access_token(token)}
             if decoded_token["result"] == "invalid":
                 return {"status": "error", "message": "Invalid token", "data": None}
-            return {"status": "success", "message": "Token decoded successfully", "data": decoded_token["payload"]}
+            result = {"status": "success", "message": "Token decoded successfully", "data": decoded_token["payload"]}
+            verified_token_cache.set(token, result, decoded_token["payload"].get("exp"))
+            return result
         except Exception as e:
             logger.error(f"Error decoding JWT token: {e}")
             return {"status": "error", "message": "Error decoding token", "data": None}
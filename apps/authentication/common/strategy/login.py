@@ -1,8 +1,11 @@
 
-from django.contrib.auth.hashers import check_password
 from apps.authentication.common.abstract.abstract import LoginService
+from apps.authentication.common.authentication.login_query import LoginDataAccess
 from apps.authentication.common.jwt import JWTService
+from apps.authentication.common.hashing.password_pool import password_hashing_pool, PasswordHashingUnavailable
+from apps.access.common.permissions.claims import PermissionClaims
 from apps.utils.common.logger.logger import PortalLogger
+from django.conf import settings
 from django.utils import timezone
 from datetime import timedelta
 
@@ -26,47 +29,43 @@ class CredentialsLogin(LoginService):
         logger.info(f"Attempting to authenticate user with username: {username}")
 
         try:
-            user_data = self._fetch_details_and_credentials(username)
-            if not user_data['details'] or not user_data['credentials']:
+            ip_address = self.parent.request.META.get('REMOTE_ADDR')
+            record = self._fetch_login_record(username, ip_address)
+            if not record:
                 # If no user details or credentials are found, log the attempt and return an error
                 logger.error(f"User with username {username} does not exist or has no credentials.")
                 return {"code": 404, "status": "error", "message": "User not found or invalid credentials.", "data": None}
 
-            credential = user_data['credentials']
-            user = user_data['details']
-            ip_address = self.parent.request.META.get('REMOTE_ADDR')
-
-            if not (credential.is_active and user.is_active):
+            if not record.is_active:
                 # Log the attempt and return an error if the credential or user is inactive
-                self.parent._log_login_attempt(user.id, False, ip_address)
+                self.parent._log_login_attempt(record.owner_id, False, ip_address)
                 logger.error(f"Admin user with username {username} is inactive.")
                 return {"code": 403, "status": "error", "message": "Admin user is inactive.", "data": None}
 
-            login_attempt_check = self.parent._check_user_ip_consecutive_failed_attempts(user.id, ip_address)
+            login_attempt_check = self.parent._check_user_ip_consecutive_failed_attempts(record.owner_id, ip_address)
             if login_attempt_check['status'] == 'failed':
                 # If too many consecutive failed attempts, flag the IP address
-                flagged_ip = self.parent._check_flag_ip_address(ip_address)
-                if not flagged_ip:
-                    self.parent.flagged_ip_object.objects.create(**{f"{self.connect_key}": user.id}, ip_address=ip_address, is_flagged=True)
+                if not record.is_ip_flagged:
+                    self.parent.flagged_ip_object.objects.create(**{f"{self.parent.connect_key}_id": record.owner_id}, ip_address=ip_address, is_flagged=True)
                 return {"code": 429, "status": "error", "message": login_attempt_check['message'], "data": None}
             elif login_attempt_check['status'] == 'error':
                 return {"code": 500, "status": "error", "message": login_attempt_check['message'], "data": None}
             
-            if check_password(password, credential.password):
+            if password_hashing_pool.check_password(password, record.password):
                 # Log the successful login attempt
-                self.parent._log_login_history(user, ip_address)
-                self.parent._log_login_attempt(user, True, ip_address)
+                self.parent._log_login_history(record.owner_id, ip_address)
+                self.parent._log_login_attempt(record.owner_id, True, ip_address)
                 # Generate JWT tokens for the user
-                access_jwt = JWTService().generate_jwt_token(user.id, user.company.id if user.company else None, type="access_token")
-                refresh_jwt = JWTService().generate_jwt_token(user.id, user.company.id if user.company else None, expiration=timezone.now() + timedelta(days=30), type="refresh_token")
+                access_jwt = JWTService().generate_jwt_token(record.owner_id, record.company_id, type="access_token", **self._permission_claims(record))
+                refresh_jwt = JWTService().generate_jwt_token(record.owner_id, record.company_id, expiration=timezone.now() + timedelta(days=30), type="refresh_token")
                 return {
                     "code": 200, 
                     "status": "success", 
                     "message": "Authentication successful.", 
                     "data": {
                         "cookies": {
-                            "uid": user.id,
-                            "cid": user.company.id if user.company else None,
+                            "uid": record.owner_id,
+                            "cid": record.company_id,
                         },
                         "tokens": {
                             "access_token": access_jwt,
@@ -76,34 +75,35 @@ class CredentialsLogin(LoginService):
                 }
             else:
                 # Log the failed login attempt
-                self.parent._log_login_attempt(user.id, False, ip_address)
+                self.parent._log_login_attempt(record.owner_id, False, ip_address)
                 logger.error(f"Invalid password for user with username {username}.")
                 return {"code": 401, "status": "error", "message": "Invalid password.", "data": None}
+        except PasswordHashingUnavailable as e:
+            logger.error(f"Password verification unavailable: {e}")
+            return {"code": 503, "status": "error", "message": "Authentication is temporarily unavailable. Please try again.", "data": None}
         except Exception as e:
             logger.error(f"Error during user authentication: {e}")
             return {"code": 500, "status": "error", "message": "Internal server error.", "data": None}
     
-    def _fetch_details_and_credentials(self, username):
+    def _permission_claims(self, record):
         """
-        Fetch the user details and credentials based on the username.
-        Returns a tuple of (user_details, user_credentials).
+        Derive the permission claims embedded in the access token, if enabled by JWT_EMBED_PERMISSIONS.
+        """
+        if not getattr(settings, "JWT_EMBED_PERMISSIONS", False):
+            return {}
+        claims = PermissionClaims(self.parent.connect_key).derive(record.owner_id, group_ids=record.access_group_ids)
+        return {"permissions": claims["perms"], "permissions_version": claims["pv"]}
+
+    def _fetch_login_record(self, username, ip_address):
+        """
+        Fetch the credential, owner, company, flagged-IP status and access groups for the username.
+        Returns a LoginRecord, or None if the username has no credentials.
         """
         try:
-            credentials = self.parent.owner_credential_object.objects.select_related(f"{self.parent.connect_key}").filter(username=username).first()
-            if self.parent.connect_key == "admin":
-                user_details = credentials.admin if credentials else None
-            else:
-                user_details = credentials.user if credentials else None
-            return {"details": user_details, "credentials": credentials}
-        except self.parent.owner_object.DoesNotExist:
-            logger.error(f"User with username {username} does not exist.")
-            return {"details": None, "credentials": None}
-        except self.parent.owner_credential_object.DoesNotExist:
-            logger.error(f"Credentials for user with username {username} do not exist.")
-            return {"details": None, "credentials": None}
+            return LoginDataAccess(self.parent).fetch(username, ip_address)
         except Exception as e:
             logger.error(f"Error fetching user details and credentials: {e}")
-            return {"details": None, "credentials": None}
+            return None
 
 class GoogleSSOLogin(LoginService):
     def login(self, sso_token):
@@ -0,0 +1,195 @@
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("FAILED_LOGIN_COUNTER")
+
+class FailedLoginCounter(ABC):
+    """
+    Sliding-window counter of failed login attempts keyed by (principal, IP address).
+    The window is approximated with two fixed buckets: the count of the current bucket plus the
+    count of the previous bucket weighted by how much of it still overlaps the window.
+    This keeps increment, reset and count O(1) regardless of how many attempts were made.
+    Subclasses provide the storage for the buckets.
+    Usage:
+        counter = get_failed_login_counter()
+        counter.increment("admin", admin_id, ip_address)
+        counter.count("admin", admin_id, ip_address)
+        counter.reset("admin", admin_id, ip_address)
+    Attributes:
+        window_seconds (int): Length of the sliding window in seconds.
+        threshold (int): Number of failures within the window that blocks further logins.
+    """
+    def __init__(self, window_seconds=900, threshold=5):
+        self.window_seconds = window_seconds
+        self.threshold = threshold
+
+    def _key(self, connect_key, principal_id, ip_address):
+        return f"failed_login:{connect_key}:{principal_id}:{ip_address}"
+
+    def _bucket(self, now):
+        return int(now // self.window_seconds)
+
+    def _estimate(self, now, current, previous):
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        return int(current + previous * (1 - elapsed))
+
+    @abstractmethod
+    def increment(self, connect_key, principal_id, ip_address):
+        """
+        Record a failed attempt and return the failure count within the window.
+        """
+
+    @abstractmethod
+    def count(self, connect_key, principal_id, ip_address):
+        """
+        Return the failure count within the window.
+        """
+
+    @abstractmethod
+    def reset(self, connect_key, principal_id, ip_address):
+        """
+        Forget the failures of the principal from the IP address, e.g. after a successful login.
+        """
+
+    def is_blocked(self, connect_key, principal_id, ip_address):
+        return self.count(connect_key, principal_id, ip_address) >= self.threshold
+
+class InProcessFailedLoginCounter(FailedLoginCounter):
+    """
+    Failed login counter kept in the memory of the current worker.
+    Only suitable for single-process development: with several workers every worker counts on its
+    own, multiplying the attempts allowed. Must be opted into with LOGIN_FAILURE_COUNTER_BACKEND='memory'.
+    Entries are kept in the order they were last touched, so the ones whose window has passed sit
+    at the front and are pruned on every access. At most 'max_entries' keys are kept, the least
+    recently touched are dropped first, which bounds the memory an attacker rotating IP addresses
+    or user names can make the counter use.
+    """
+    def __init__(self, window_seconds=900, threshold=5, max_entries=100000):
+        super().__init__(window_seconds, threshold)
+        self.max_entries = max_entries
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, bucket):
+        """
+        Drop the entries last touched before the previous bucket. Must be called with the lock held.
+        """
+        while self._buckets:
+            key, entry = next(iter(self._buckets.items()))
+            if entry[0] >= bucket - 1 and len(self._buckets) <= self.max_entries:
+                return
+            del self._buckets[key]
+
+    def _roll(self, key, now):
+        """
+        Return the [bucket, current, previous] entry for the key, shifted to the bucket of 'now'.
+        Must be called with the lock held.
+        """
+        bucket = self._bucket(now)
+        entry = self._buckets.get(key)
+        if entry is None:
+            entry = [bucket, 0, 0]
+            self._buckets[key] = entry
+        else:
+            if entry[0] != bucket:
+                entry[2] = entry[1] if entry[0] == bucket - 1 else 0
+                entry[1] = 0
+                entry[0] = bucket
+            self._buckets.move_to_end(key)
+        self._prune(bucket)
+        return entry
+
+    def increment(self, connect_key, principal_id, ip_address):
+        now = time.time()
+        with self._lock:
+            entry = self._roll(self._key(connect_key, principal_id, ip_address), now)
+            entry[1] += 1
+            return self._estimate(now, entry[1], entry[2])
+
+    def count(self, connect_key, principal_id, ip_address):
+        now = time.time()
+        key = self._key(connect_key, principal_id, ip_address)
+        with self._lock:
+            if key not in self._buckets:
+                return 0
+            entry = self._roll(key, now)
+            if not entry[1] and not entry[2]:
+                del self._buckets[key]
+                return 0
+            return self._estimate(now, entry[1], entry[2])
+
+    def reset(self, connect_key, principal_id, ip_address):
+        with self._lock:
+            self._buckets.pop(self._key(connect_key, principal_id, ip_address), None)
+
+class CacheFailedLoginCounter(FailedLoginCounter):
+    """
+    Failed login counter stored in the Django cache framework.
+    Shares the counts between workers when a shared cache backend (e.g. Redis or Memcached) is configured.
+    """
+    def __init__(self, window_seconds=900, threshold=5, cache_alias="default"):
+        super().__init__(window_seconds, threshold)
+        self.cache = caches[cache_alias]
+
+    def _bucket_keys(self, key, now):
+        bucket = self._bucket(now)
+        return f"{key}:{bucket}", f"{key}:{bucket - 1}"
+
+    def increment(self, connect_key, principal_id, ip_address):
+        now = time.time()
+        current_key, previous_key = self._bucket_keys(self._key(connect_key, principal_id, ip_address), now)
+        # Buckets must outlive the window they are still weighted in
+        self.cache.add(current_key, 0, timeout=self.window_seconds * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # The bucket expired between add and incr
+            self.cache.set(current_key, 1, timeout=self.window_seconds * 2)
+            current = 1
+        previous = self.cache.get(previous_key, 0)
+        return self._estimate(now, current, previous)
+
+    def count(self, connect_key, principal_id, ip_address):
+        now = time.time()
+        current_key, previous_key = self._bucket_keys(self._key(connect_key, principal_id, ip_address), now)
+        values = self.cache.get_many([current_key, previous_key])
+        return self._estimate(now, values.get(current_key, 0), values.get(previous_key, 0))
+
+    def reset(self, connect_key, principal_id, ip_address):
+        now = time.time()
+        self.cache.delete_many(list(self._bucket_keys(self._key(connect_key, principal_id, ip_address), now)))
+
+FAILED_LOGIN_COUNTER_BACKENDS = {
+    "memory": InProcessFailedLoginCounter,
+    "cache": CacheFailedLoginCounter,
+}
+
+_failed_login_counter = None
+
+def get_failed_login_counter():
+    """
+    Return the process-wide failed login counter configured by LOGIN_FAILURE_COUNTER_BACKEND.
+    Defaults to the cache-backed counter, the in-process one is only used when asked for.
+    """
+    global _failed_login_counter
+    if _failed_login_counter is None:
+        backend = getattr(settings, "LOGIN_FAILURE_COUNTER_BACKEND", "cache")
+        options = {
+            "window_seconds": getattr(settings, "LOGIN_FAILURE_WINDOW_SECONDS", 900),
+            "threshold": getattr(settings, "LOGIN_FAILURE_THRESHOLD", 5),
+        }
+        if backend == "memory":
+            options["max_entries"] = getattr(settings, "LOGIN_FAILURE_MAX_ENTRIES", 100000)
+        else:
+            if backend not in FAILED_LOGIN_COUNTER_BACKENDS:
+                logger.warning(f"Unknown failed login counter backend '{backend}', falling back to 'cache'.")
+                backend = "cache"
+            options["cache_alias"] = getattr(settings, "LOGIN_FAILURE_CACHE_ALIAS", "default")
+        _failed_login_counter = FAILED_LOGIN_COUNTER_BACKENDS[backend](**options)
+    return _failed_login_counter
@@ -6,8 +6,8 @@ from apps.authentication.common.authentication.change_password import ChangeAcco
 from apps.authentication.common.authentication.authenticate import AuthenticationService
 
 class UserAuthService:
-    def __init__(self, user_service):
-        self.user_service = user_service
+    def __init__(self, request):
+        self.request = request
 
     def execute(self):
         service = AuthenticationService(self.request)
@@ -0,0 +1,89 @@
+
+import threading
+import time
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+from apps.authentication.common.hashing.password_pool import PasswordHashingPool, PasswordHashingUnavailable
+
+class Command(BaseCommand):
+    """
+    Benchmark the password hashing pool.
+    Simulates concurrent credential logins against a pool of each requested size and reports the
+    verified hashes per second together with the p50 and p99 latency of a single verification.
+    Usage:
+        python manage.py benchmark_password_hashing --pool-sizes 1,2,4,8 --logins 200 --concurrency 16
+    """
+    help = "Report password hashes/sec and p99 login latency for different password hashing pool sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pool-sizes", default="1,2,4,8", help="Comma separated list of pool sizes to benchmark.")
+        parser.add_argument("--kind", default="thread", choices=["thread", "process"], help="Executor type of the pool.")
+        parser.add_argument("--logins", type=int, default=200, help="Number of simulated logins per pool size.")
+        parser.add_argument("--concurrency", type=int, default=16, help="Number of concurrent simulated clients.")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Hashing timeout in seconds.")
+
+    def handle(self, *args, **options):
+        pool_sizes = [int(size) for size in options["pool_sizes"].split(",") if size.strip()]
+        encoded = hashers.make_password("benchmark-password")
+        self.stdout.write(f"hasher={hashers.identify_hasher(encoded).algorithm} kind={options['kind']} logins={options['logins']} concurrency={options['concurrency']}")
+        self.stdout.write(f"{'pool_size':>9} {'hashes/sec':>11} {'p50_ms':>9} {'p99_ms':>9} {'rejected':>9}")
+        for pool_size in pool_sizes:
+            result = self._run(pool_size, encoded, options)
+            self.stdout.write(
+                f"{pool_size:>9} {result['rate']:>11.1f} {result['p50'] * 1000:>9.1f} {result['p99'] * 1000:>9.1f} {result['rejected']:>9}"
+            )
+
+    def _run(self, pool_size, encoded, options):
+        pool = PasswordHashingPool(
+            kind=options["kind"],
+            max_workers=pool_size,
+            max_queue=options["concurrency"],
+            timeout=options["timeout"],
+        )
+        # Warm up the executor so worker start-up is not measured
+        pool.check_password("benchmark-password", encoded)
+        remaining = [options["logins"]]
+        latencies = []
+        rejected = [0]
+        lock = threading.Lock()
+
+        def client():
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                started = time.perf_counter()
+                try:
+                    pool.check_password("benchmark-password", encoded)
+                except PasswordHashingUnavailable:
+                    with lock:
+                        rejected[0] += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+
+        clients = [threading.Thread(target=client) for _ in range(options["concurrency"])]
+        started = time.perf_counter()
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        duration = time.perf_counter() - started
+        pool.shutdown()
+
+        latencies.sort()
+        return {
+            "rate": len(latencies) / duration if duration else 0.0,
+            "p50": self._percentile(latencies, 0.50),
+            "p99": self._percentile(latencies, 0.99),
+            "rejected": rejected[0],
+        }
+
+    @staticmethod
+    def _percentile(values, percentile):
+        if not values:
+            return 0.0
+        index = min(len(values) - 1, int(round(percentile * (len(values) - 1))))
+        return values[index]
@@ -1,3 +1,135 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from apps.access.models import AccessGroups, UserGroupAccess
+from apps.administration import models as admin_models
+from apps.authentication.common.audit.audit_sink import AuditWriteBehindBuffer
+from apps.authentication.common.authentication.authenticate import AuthenticationService
+from apps.authentication.common.authentication.login_query import LoginDataAccess
+from apps.authentication.common.throttle.failed_login_counter import get_failed_login_counter
+from apps.authentication.logic.services.admin_auth import AdminAuthService
+from apps.authentication.logic.services.user_auth import UserAuthService
+from apps.company.models import CompanyDetails
+from apps.user import models as user_models
 
-# Create your tests here.
+FAST_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS, AUDIT_WRITE_BEHIND_ENABLED=False)
+class CredentialLoginQueryTests(TestCase):
+    """
+    Query-count guards for the credential login flow.
+    A login reads the credential, owner, company and flagged-IP status in one query and the access
+    groups in a second one; the audit rows are the only writes.
+    """
+    ip_address = "10.0.0.1"
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = CompanyDetails.objects.create(name="Lead Light", email="company@example.com")
+        cls.group = AccessGroups.objects.create(name="Operators", unique_id="operators")
+        cls.admin = admin_models.AdministratorUserDetails.objects.create(
+            name="Admin", email="admin@example.com", code="ADM-1", company=cls.company
+        )
+        admin_models.AdministratorLoginCredential.objects.create(
+            admin=cls.admin, username="admin", password=make_password("secret", hasher="md5")
+        )
+        UserGroupAccess.objects.create(admin=cls.admin, group=cls.group, unique_id="admin-operators")
+        cls.user = user_models.UserDetails.objects.create(company=cls.company, email="user@example.com")
+        user_models.UserCredential.objects.create(
+            user=cls.user, username="user", password=make_password("secret", hasher="md5")
+        )
+
+    def setUp(self):
+        counter = get_failed_login_counter()
+        counter.reset("admin", self.admin.id, self.ip_address)
+        counter.reset("user", self.user.id, self.ip_address)
+
+    def _request(self, username, password):
+        body = json.dumps({"auth_type": "credential_login", "username": username, "password": password})
+        return RequestFactory().post("/", data=body, content_type="application/json", REMOTE_ADDR=self.ip_address)
+
+    def test_admin_login_record_is_loaded_in_two_queries(self):
+        service = AuthenticationService(self._request("admin", "secret"))
+        service.set_connect_key("admin")
+        service.set_owner_credential_object(admin_models.AdministratorLoginCredential)
+        service.set_flagged_ip_object(admin_models.AdministratorFlaggedIP)
+        with self.assertNumQueries(2):
+            record = LoginDataAccess(service).fetch("admin", self.ip_address)
+        self.assertEqual(record.owner_id, self.admin.id)
+        self.assertEqual(record.company_id, self.company.id)
+        self.assertEqual(record.access_group_ids, (self.group.id,))
+        self.assertFalse(record.is_ip_flagged)
+
+    def test_successful_admin_login_query_count(self):
+        # 2 reads plus the login history and login attempt inserts
+        with self.assertNumQueries(4):
+            result = AdminAuthService(self._request("admin", "secret")).execute()
+        self.assertEqual(result["code"], 200)
+        self.assertEqual(result["data"]["cookies"]["cid"], self.company.id)
+
+    def test_failed_admin_login_query_count(self):
+        # 2 reads plus the failed login attempt insert
+        with self.assertNumQueries(3):
+            result = AdminAuthService(self._request("admin", "wrong")).execute()
+        self.assertEqual(result["code"], 401)
+
+    def test_successful_user_login_query_count(self):
+        with self.assertNumQueries(4):
+            result = UserAuthService(self._request("user", "secret")).execute()
+        self.assertEqual(result["code"], 200)
+        self.assertEqual(result["data"]["cookies"]["uid"], self.user.id)
+
+    def test_unknown_username_costs_one_query(self):
+        with self.assertNumQueries(1):
+            result = AdminAuthService(self._request("nobody", "secret")).execute()
+        self.assertEqual(result["code"], 404)
+
+class AuditSpillReplayTests(TestCase):
+    """
+    Replaying spilled audit rows: bad rows are dead-lettered, good rows keep their event time.
+    """
+    label = "administration.AdministratorLoginHistory"
+
+    @classmethod
+    def setUpTestData(cls):
+        company = CompanyDetails.objects.create(name="Lead Light", email="company@example.com")
+        cls.admin = admin_models.AdministratorUserDetails.objects.create(
+            name="Admin", email="admin@example.com", code="ADM-1", company=company
+        )
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.spill_path = os.path.join(directory, "audit.ndjson")
+        self.sink = AuditWriteBehindBuffer(spill_path=self.spill_path)
+        # The spill file keeps millisecond precision
+        self.event_time = (timezone.now() - timedelta(hours=3)).replace(microsecond=0)
+
+    def _history(self, admin_id):
+        return admin_models.AdministratorLoginHistory(admin_id=admin_id, ip_address="10.0.0.1", login_time=self.event_time)
+
+    def test_replay_restores_the_event_time(self):
+        self.sink._spill(self.label, [self._history(self.admin.id) for _ in range(2)])
+        self.assertEqual(self.sink.flush(), 2)
+        times = admin_models.AdministratorLoginHistory.objects.values_list("login_time", flat=True)
+        self.assertEqual(list(times), [self.event_time, self.event_time])
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_failing_rows_are_dead_lettered_once(self):
+        # A row the database rejects makes the bulk insert of its batch fail
+        self.sink._spill(self.label, [self._history(self.admin.id), self._history(None), self._history(self.admin.id)])
+        self.assertEqual(self.sink.flush(), 2)
+        self.assertEqual(admin_models.AdministratorLoginHistory.objects.filter(login_time=self.event_time).count(), 2)
+        with open(f"{self.spill_path}.dead", encoding="utf-8") as f:
+            dead = [json.loads(line) for line in f]
+        self.assertEqual(len(dead), 1)
+        self.assertIsNone(dead[0]["fields"]["admin_id"])
+        self.assertIn("error", dead[0])
+        # Nothing is spilled again, so later flushes have nothing left to replay
+        self.assertFalse(os.path.exists(self.spill_path))
+        self.assertEqual(self.sink.flush(), 0)
@@ -8,8 +8,13 @@ from apps.company.logic import commands
 # Create your views here.
 class CompanySCRUDView(AdminAuthMiddleware):
     def get(self, request):
-        # Logic for handling GET requests
-        pass
+        # Logic for handling GET requests, a single company with ?id= and a page of companies otherwise
+        if "id" in request.GET:
+            command = UseCase(commands.CompanyRetrieveCommand(request))
+        else:
+            command = UseCase(commands.CompanyListCommand(request))
+        result = command.execute()
+        return BuildResponse(result).get_response()
 
     def post(self, request):
         # Logic for handling POST requests
@@ -47,4 +52,12 @@ class CompanyArchiveView(AdminAuthMiddleware):
         # Logic for handling archiving of a company
         command = UseCase(commands.CompanyArchiveCommand(request))
         result = command.execute()
-        return BuildResponse(result).patch_response()
\ No newline at end of file
+        return BuildResponse(result).patch_response()
+
+
+class CompanyImportView(AdminAuthMiddleware):
+    def post(self, request):
+        # Logic for handling bulk creation of companies from an upload
+        command = UseCase(commands.CompanyImportCommand(request))
+        result = command.execute()
+        return BuildResponse(result).post_response()
@@ -0,0 +1,226 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("COMPANY_CACHE")
+
+GLOBAL_GENERATION_KEY = "company:generation"
+
+class CompanyAggregateCache:
+    """
+    Two level read-through cache of company aggregates (the company with its related records).
+    L1 is a bounded LRU in process memory, L2 the Django cache 'cache_alias'. Entries are
+    namespaced by company id and by generation: every company has a generation counter in L2,
+    bumped to invalidate it, and a global generation invalidates every company at once. Keys of
+    older generations are never read again and expire from L2 on their own.
+    An L1 entry is trusted for 'l1_ttl' seconds; after that its generation is compared with L2
+    (one cache round trip, no database access). Changes made through this worker drop the L1 entry
+    immediately. L2, and with it the generations, is only shared by the workers when the cache
+    behind 'cache_alias' is, e.g. Redis or Memcached: then a change made through another worker is
+    seen at most 'l1_ttl' seconds late. With a process local cache (the utils.W001 system check
+    warns about it) every worker has its own L2 and may keep serving an aggregate until 'timeout'.
+    The generation is read before loading, so an aggregate loaded while the company changes is
+    stored under the generation that the change has already left behind.
+    Usage:
+        aggregate = company_cache.get(company_id, load_company_aggregate)
+        company_cache.invalidate(company_id)
+        with company_cache.batch():  # one invalidation per company for many changed rows
+            ...
+        company_cache.stats()  # hit ratios of L1, L2 and overall
+    Attributes:
+        cache_alias (str): The Django cache used as L2.
+        timeout (int): Seconds an aggregate is kept in L2.
+        l1_max_entries (int): Aggregates kept in process memory, 0 disables L1.
+        l1_ttl (float): Seconds an L1 entry is used without checking its generation.
+    """
+    def __init__(self, cache_alias="default", timeout=300, l1_max_entries=1024, l1_ttl=5.0):
+        self.cache_alias = cache_alias
+        self.timeout = timeout
+        self.l1_max_entries = l1_max_entries
+        self.l1_ttl = l1_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._batch = threading.local()
+        self._reset_counters()
+
+    def _reset_counters(self):
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @staticmethod
+    def _generation_key(company_id):
+        return f"company:{company_id}:generation"
+
+    @staticmethod
+    def _aggregate_key(company_id, generation):
+        return f"company:{company_id}:aggregate:{generation[0]}:{generation[1]}"
+
+    def _generation(self, company_id):
+        """
+        (global generation, company generation), created on first use.
+        """
+        keys = [GLOBAL_GENERATION_KEY, self._generation_key(company_id)]
+        values = self.cache.get_many(keys)
+        if len(values) < len(keys):
+            # Seed with the current time so a generation lost from L2 never comes back lower than before
+            seed = int(time.time() * 1000)
+            for key in keys:
+                if key not in values:
+                    self.cache.add(key, seed, timeout=None)
+            values = self.cache.get_many(keys)
+        return values.get(keys[0]), values.get(keys[1])
+
+    def get(self, company_id, loader):
+        """
+        Return the aggregate of the company, calling loader(company_id) on a miss of both levels.
+        A loader returning None (e.g. the company does not exist) is not cached.
+        The aggregate is shared between callers and must not be modified.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(company_id)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(company_id)
+                self.l1_hits += 1
+                return entry[1]
+
+        generation = self._generation(company_id)
+        if entry is not None and entry[0] == generation:
+            self._remember(company_id, generation, entry[1])
+            with self._lock:
+                self.l1_hits += 1
+            return entry[1]
+
+        key = self._aggregate_key(company_id, generation)
+        aggregate = self.cache.get(key)
+        if aggregate is not None:
+            with self._lock:
+                self.l2_hits += 1
+        else:
+            with self._lock:
+                self.misses += 1
+            aggregate = loader(company_id)
+            if aggregate is None:
+                return None
+            self.cache.set(key, aggregate, timeout=self.timeout)
+        self._remember(company_id, generation, aggregate)
+        return aggregate
+
+    def _remember(self, company_id, generation, aggregate):
+        if self.l1_max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[company_id] = (generation, aggregate, time.monotonic() + self.l1_ttl)
+            self._entries.move_to_end(company_id)
+            while len(self._entries) > self.l1_max_entries:
+                self._entries.popitem(last=False)
+
+    def _bump(self, key):
+        try:
+            self.cache.incr(key)
+        except ValueError:
+            # Not created yet, no aggregate can have been stored under it
+            pass
+
+    def invalidate(self, company_id):
+        """
+        Drop the company now and again when the current transaction commits, so a reader cannot
+        cache the rows as they were before the commit.
+        """
+        self.invalidate_many([company_id])
+
+    def invalidate_many(self, company_ids):
+        company_ids = list(company_ids)
+        if not company_ids:
+            return
+        pending = getattr(self._batch, "company_ids", None)
+        if pending is not None:
+            pending.update(company_ids)
+            return
+
+        def bump():
+            with self._lock:
+                for company_id in company_ids:
+                    self._entries.pop(company_id, None)
+            for company_id in company_ids:
+                self._bump(self._generation_key(company_id))
+
+        with self._lock:
+            self.invalidations += len(company_ids)
+        bump()
+        transaction.on_commit(bump)
+
+    @contextmanager
+    def batch(self):
+        """
+        Collect the invalidations made by this thread and apply them once per company on exit,
+        e.g. while deleting many rows of a few companies.
+        """
+        if getattr(self._batch, "company_ids", None) is not None:
+            yield
+            return
+        self._batch.company_ids = set()
+        try:
+            yield
+        finally:
+            company_ids, self._batch.company_ids = self._batch.company_ids, None
+            self.invalidate_many(company_ids)
+
+    def invalidate_all(self):
+        """
+        Drop every company, e.g. after a bulk UPDATE of companies selected by a filter.
+        """
+        def bump():
+            with self._lock:
+                self._entries.clear()
+            self._bump(GLOBAL_GENERATION_KEY)
+
+        with self._lock:
+            self.invalidations += 1
+        logger.info("Invalidated every cached company aggregate")
+        bump()
+        transaction.on_commit(bump)
+
+    def clear(self):
+        """
+        Empty L1 and reset the counters, L2 is left to its timeout.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._reset_counters()
+
+    def stats(self):
+        """
+        Return the cache counters as a dictionary.
+        """
+        with self._lock:
+            total = self.l1_hits + self.l2_hits + self.misses
+            return {
+                "l1_size": len(self._entries),
+                "l1_max_entries": self.l1_max_entries,
+                "l1_hits": self.l1_hits,
+                "l2_hits": self.l2_hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "l1_hit_ratio": (self.l1_hits / total) if total else 0.0,
+                "l2_hit_ratio": (self.l2_hits / (self.l2_hits + self.misses)) if self.l2_hits + self.misses else 0.0,
+                "hit_ratio": ((self.l1_hits + self.l2_hits) / total) if total else 0.0,
+            }
+
+company_cache = CompanyAggregateCache(
+    cache_alias=getattr(settings, "COMPANY_CACHE_ALIAS", "default"),
+    timeout=getattr(settings, "COMPANY_CACHE_TIMEOUT", 300),
+    l1_max_entries=getattr(settings, "COMPANY_CACHE_L1_MAX_ENTRIES", 1024),
+    l1_ttl=getattr(settings, "COMPANY_CACHE_L1_TTL", 5.0),
+)
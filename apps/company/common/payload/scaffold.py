@@ -3,7 +3,7 @@ from apps.utils.common.validation.general_validations import FieldSpecificValida
 
 COMPANY_SCAFFOLD = {
     "details": {
-        "companyName": {"type": str, "required": True, "validator": field_validation_service().email},
+        "companyName": {"type": str, "required": True, "validator": field_validation_service().name},
         "phone": {"type": str, "required": True, "validator": field_validation_service().phone},
         "email": {"type": str, "required": True, "validator": field_validation_service().email},
         "affiliatedPartner": {"type": int, "required": False},
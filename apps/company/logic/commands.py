@@ -1,19 +1,36 @@
 
 import json
+import os
+import tempfile
 import traceback
 import sys
+from django.conf import settings
 from apps.utils.common.logger.logger import PortalLogger
-from apps.company.logic.services.crud.company import ArchiveCompany, CreateCompanyRecords, RestoreCompany, UpdateCompanyRecords, DeleteCompany
+from apps.company.logic.services.crud.company import ArchiveCompany, CreateCompanyRecords, ListCompanyRecords, RestoreCompany, RetrieveCompanyRecord, UpdateCompanyRecords, DeleteCompany, company_queryset
 from apps.utils.common.abstract.create_interface import CreateCommand
+from apps.company.logic.services.crud.company_import import IMPORT_FORMATS, ImportCompanyRecords, detect_import_format, run_company_import
 from apps.company.logic.services.validate import company as validate_company
+from apps.utils.logic.services.background_jobs import background_jobs
+from apps.access.common.permissions.engine import permission_engine
 
 logger = PortalLogger(__name__)
+COMPANY_OBJECT = "company.CompanyDetails"
+
+def permission_denied(request, action):
+    """
+    Return an error response if the caller may not perform the action on companies, otherwise None.
+    """
+    if permission_engine.can(request.principal, COMPANY_OBJECT, action):
+        return None
+    logger.warning(f"Permission denied: {request.principal} cannot {action} {COMPANY_OBJECT}")
+    return {"code": 403, "status": "error", "message": f"Permission denied: cannot {action} companies.", "data": None}
 
 # ADD verification layer to every command to check the validity of action
 class CompanyCreateCommand(CreateCommand):
     def __init__(self, request):
         self.request = request
         self.body = json.loads(request.body)
+        self.principal = request.principal
     
     def create(self):
         try:
@@ -24,6 +41,7 @@ class CompanyCreateCommand(CreateCommand):
             ).create()
             if not result["success"]:
                 return {"code": result["code"], "success": False, "message": result["message"], "data": None}
+            logger.info(f"Company created by {self.principal}")
             return {"code": 201, "success": True, "message": "Company created successfully", "data": None}
         except KeyError as e:
             logger.error(f"KeyError: {str(e)} - {traceback.format_exc()}")
@@ -67,7 +85,10 @@ class CompanyCreateCommand(CreateCommand):
 
     def execute(self):
         # Check User Permissions
-        
+        denied = permission_denied(self.request, "create")
+        if denied:
+            return denied
+
         validation_result = self.validate()
         if not validation_result["success"]:
             return {"code": validation_result["code"], "status": "error", "message": validation_result["message"], "data": None}
@@ -90,11 +111,14 @@ class CompanyUpdateCommand:
                 company_id=self.body.get("id"),
                 company_details=self.body.get("details"),
                 address=self.body.get("address"),
-                bank_account=self.body.get("bankAccount")
+                bank_account=self.body.get("bankAccount"),
+                queryset=company_queryset(self.request, "update"),
+                if_match=self.request.headers.get("If-Match"),
+                updated_at=self.body.get("updatedAt"),
             ).update()
             if not result["success"]:
-                return {"code": result["code"], "success": False, "message": result["message"], "data": None}
-            return {"code": 200, "success": True, "message": "Company updated successfully", "data": None}
+                return {"code": result["code"], "success": False, "message": result["message"], "data": result["data"]}
+            return {"code": 200, "success": True, "message": result["message"], "data": result["data"]}
         except KeyError as e:
             logger.error(f"KeyError: {str(e)} - {traceback.format_exc()}")
             return {"code": 400, "success": False, "message": f"Missing key in request body: {str(e)}", "data": None}
@@ -106,62 +130,48 @@ class CompanyUpdateCommand:
             return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
     
     def validate(self):
-        # Logic to validate the updated company details
+        # Only the fields present in the request are validated, the others are left unchanged
         try:
-            # Validate the request body
-            payload_validate = validate_company.ValidateCompanyPayload(self.body).validate()
-            if not payload_validate["success"]:
-                return {"code": 400, "success": False, "message": payload_validate["message"], "data": None}
-            
-            # Validate company details
-            details_validate = validate_company.ValidateCompanyDetails(self.body.get("company_details")).validate()
-            if not details_validate["success"]:
-                return {"code": 400, "success": False, "message": details_validate["message"], "data": None}
-
-            # Validate company address
-            address_validate = validate_company.ValidateCompanyAddress(self.body.get("address")).validate()
-            if not address_validate["success"]:
-                return {"code": 400, "success": False, "message": address_validate["message"], "data": None}
-
-            # Validate company bank account
-            bank_account_validate = validate_company.ValidateCompanyBankAccount(self.body.get("bank_account")).validate()
-            if not bank_account_validate["success"]:
-                return {"code": 400, "success": False, "message": bank_account_validate["message"], "data": None}
-
-            return {"code": 200, "success": True, "message": "Validation successful", "data": None}
-        except json.JSONDecodeError:
-            logger.error("Invalid JSON format in request body")
-            return {"code": 400, "success": False, "message": "Invalid JSON format", "data": None}
+            return validate_company.ValidateCompanyPatch(self.body).validate()
         except Exception as e:
             logger.error(f"Internal server error: {str(e)}")
             return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
 
     def execute(self):
         # Logic to update an existing company
+        denied = permission_denied(self.request, "update")
+        if denied:
+            return denied
+
         validation_result = self.validate()
         if not validation_result["success"]:
             return {"code": validation_result["code"], "status": "error", "message": validation_result["message"], "data": None}
 
         # Update company records
         result = self.update()
-        if not result.get("success", True):
-            return {"code": 500, "status": "error", "message": "Failed to update company records", "data": None}
+        # The new version, or the current one after a failed precondition, doubles as the ETag
+        etag = (result["data"] or {}).get("etag")
+        if not result["success"]:
+            return {"code": result["code"], "status": "error", "message": result["message"], "data": result["data"], "etag": etag}
 
-        return {"code": 200, "status": "success", "message": "Company updated successfully", "data": None}
+        return {"code": 200, "status": "success", "message": result["message"], "data": result["data"], "etag": etag}
 
 class CompanyArchiveCommand:
     def __init__(self, request):
         self.request = request
 
     def execute(self):
+        denied = permission_denied(self.request, "archive")
+        if denied:
+            return denied
         try:
             # Logic to archive a company
             archive_service = ArchiveCompany(self.request)
             result = archive_service.archive()
             if not result["success"]:
                 logger.error(f"Error while archiving company: {result['message']}")
-                return {"code": result["code"], "status": "error", "message": result["message"], "data": None}
-            return {"code": 200, "status": "success", "message": "Company archived successfully", "data": None}
+                return {"code": result["code"], "status": "error", "message": result["message"], "data": result["data"]}
+            return {"code": 200, "status": "success", "message": result["message"], "data": result["data"]}
         except Exception as e:
             logger.error(f"Error while archiving company: {str(e)}")
             return {"code": 500, "status": "error", "message": f"Internal server error: {str(e)}", "data": None}
@@ -171,14 +181,17 @@ class CompanyRestoreCommand:
         self.request = request
 
     def execute(self):
+        denied = permission_denied(self.request, "restore")
+        if denied:
+            return denied
         try:
             # Logic to restore a company
             restore_service = RestoreCompany(self.request)
             result = restore_service.restore()
             if not result["success"]:
                 logger.error(f"Error while restoring company: {result['message']}")
-                return {"code": result["code"], "status": "error", "message": result["message"], "data": None}
-            return {"code": 200, "status": "success", "message": "Company restored successfully", "data": None}
+                return {"code": result["code"], "status": "error", "message": result["message"], "data": result["data"]}
+            return {"code": 200, "status": "success", "message": result["message"], "data": result["data"]}
         except Exception as e:
             logger.error(f"Error while restoring company: {str(e)}")
             return {"code": 500, "status": "error", "message": f"Internal server error: {str(e)}", "data": None}
@@ -189,22 +202,122 @@ class CompanyDeleteCommand:
 
     def execute(self):
         # Logic to delete a company
+        denied = permission_denied(self.request, "delete")
+        if denied:
+            return denied
         try:
             delete_service = DeleteCompany(self.request)
             result = delete_service.delete()
             if not result["success"]:
                 logger.error(f"Error while deleting company: {result['message']}")
-                return {"code": result["code"], "status": "error", "message": result["message"], "data": None}
-            return {"code": 204, "status": "success", "message": "Company deleted successfully", "data": None}
+                return {"code": result["code"], "status": "error", "message": result["message"], "data": result["data"]}
+            return {"code": result["code"], "status": "success", "message": result["message"], "data": result["data"]}
         except Exception as e:
             logger.error(f"Error while deleting company: {str(e)}")
             return {"code": 500, "status": "error", "message": f"Internal server error: {str(e)}", "data": None}
 
+class CompanyImportCommand:
+    """
+    Create companies in bulk from an NDJSON or CSV upload, sent as the multipart field 'file' or as
+    the raw request body. The format comes from the 'format' query parameter, the file name or the
+    content type. Uploads larger than COMPANY_IMPORT_SYNC_MAX_BYTES, or any upload with
+    'background=true', are imported by a background job whose id is returned with a 202.
+    """
+    def __init__(self, request):
+        self.request = request
+        self.principal = request.principal
+
+    def execute(self):
+        denied = permission_denied(self.request, "create")
+        if denied:
+            return denied
+        path = None
+        try:
+            upload = self.request.FILES.get("file")
+            import_format = self.request.GET.get("format") or detect_import_format(
+                upload.name if upload else "", upload.content_type if upload else self.request.content_type
+            )
+            if import_format not in IMPORT_FORMATS:
+                return {"code": 400, "status": "error", "message": "Unsupported import format, expected ndjson or csv", "data": None}
+            path, size = self._store(upload)
+            if size == 0:
+                return {"code": 400, "status": "error", "message": "The upload is empty", "data": None}
+
+            background = self.request.GET.get("background") == "true"
+            if background or size > getattr(settings, "COMPANY_IMPORT_SYNC_MAX_BYTES", 1024 * 1024):
+                job = background_jobs.submit(
+                    "company.import", run_company_import, path, import_format,
+                    owner_id=self.principal.user_id,
+                )
+                # The job owns the file from now on
+                path = None
+                logger.info(f"Company import job {job.pk} queued by {self.principal}")
+                return {"code": 202, "status": "success", "message": "Company import started", "data": {"jobId": job.pk, "status": job.status}}
+
+            report = ImportCompanyRecords(path, import_format).execute()
+            logger.info(f"Company import by {self.principal}: {report['created']} created, {report['failed']} failed")
+            return {"code": 200, "status": "success", "message": f"Imported {report['created']} of {report['total']} companies", "data": report}
+        except (ValueError, UnicodeDecodeError) as e:
+            return {"code": 400, "status": "error", "message": f"Invalid upload: {str(e)}", "data": None}
+        except Exception as e:
+            logger.error(f"Error while importing companies: {str(e)}")
+            return {"code": 500, "status": "error", "message": f"Internal server error: {str(e)}", "data": None}
+        finally:
+            if path:
+                os.remove(path)
+
+    def _store(self, upload):
+        """
+        Copy the upload to a temporary file, chunk by chunk, so rows can be streamed from disk.
+        """
+        descriptor, path = tempfile.mkstemp(prefix="company_import_")
+        size = 0
+        with os.fdopen(descriptor, "wb") as f:
+            chunks = upload.chunks() if upload else [self.request.body]
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        return path, size
+
+class CompanyListCommand:
+    def __init__(self, request):
+        self.request = request
+
+    def execute(self):
+        # Logic to list the companies visible to the caller, one page at a time
+        denied = permission_denied(self.request, "view")
+        if denied:
+            return denied
+        try:
+            result = ListCompanyRecords(company_queryset(self.request, "view"), self.request.GET).list(self.request)
+            if not result["success"]:
+                return {"code": result["code"], "status": "error", "message": result["message"], "data": None}
+            return {"code": result["code"], "status": "success", "message": result["message"], "data": result["data"], "etag": result["etag"]}
+        except Exception as e:
+            logger.error(f"Error while listing companies: {str(e)}")
+            return {"code": 500, "status": "error", "message": f"Internal server error: {str(e)}", "data": None}
+
 class CompanyRetrieveCommand:
-    def __init__(self, company_id):
-        self.company_id = company_id
+    def __init__(self, request):
+        self.request = request
+        self.company_id = request.GET.get("id")
 
     def execute(self):
-        # Logic to retrieve a company's details
-        pass
+        # Logic to retrieve a company's details, answering 304 when the client's copy is current
+        denied = permission_denied(self.request, "view")
+        if denied:
+            return denied
+        if not self.company_id or not self.company_id.isdigit():
+            return {"code": 400, "status": "error", "message": "Invalid id, expected a company id.", "data": None}
+        try:
+            result = RetrieveCompanyRecord(company_queryset(self.request, "view"), int(self.company_id), self.request).retrieve()
+            if not result["success"]:
+                return {"code": result["code"], "status": "error", "message": result["message"], "data": None}
+            return {
+                "code": result["code"], "status": "success", "message": result["message"], "data": result["data"],
+                "etag": result["etag"], "last_modified": result["last_modified"],
+            }
+        except Exception as e:
+            logger.error(f"Error while retrieving company: {str(e)}")
+            return {"code": 500, "status": "error", "message": f"Internal server error: {str(e)}", "data": None}
     
\ No newline at end of file
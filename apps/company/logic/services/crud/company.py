@@ -1,10 +1,355 @@
 
+import hashlib
 import json
+from datetime import datetime, time, timedelta
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F, Max, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from apps.utils.common.logger.logger import PortalLogger
-from apps.company.models import CompanyDetails, CompanyAddress, CompanyBankAccount
+from apps.utils.common.pagination.keyset import CursorError, KeysetPage
+from apps.utils.common.response.conditional import is_not_modified
+from apps.company.common.payload.scaffold import COMPANY_SCAFFOLD
+from apps.company.common.cache.aggregate_cache import company_cache
+from apps.company.models import CompanyDetails, CompanyAddress, CompanyBankAccount, CompanyAPIKeys
+from apps.subscription.models import SubscriptionCompany
+from apps.company.logic.services.crud.company_deletion import CascadePlan, run_company_deletion
+from apps.access.common.permissions.engine import permission_engine
+from apps.utils.logic.services.background_jobs import background_jobs
 
 logger = PortalLogger(__name__)
 
+# API field name -> model attribute, the inverse of RecordAdapter
+COMPANY_FIELDS = {
+    "id": "id",
+    "companyName": "name",
+    "email": "email",
+    "phone": "phone",
+    "affiliatedPartner": "affiliated_partner_id",
+    "website": "website",
+    "taxId": "tax_id",
+    "establishedDate": "established_date",
+    "description": "description",
+    "isActive": "is_active",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at",
+}
+ADDRESS_FIELDS = {
+    "id": "id",
+    "addressLine1": "address_line1",
+    "addressLine2": "address_line2",
+    "city": "city",
+    "state": "state",
+    "postalCode": "postal_code",
+    "country": "country",
+}
+BANK_ACCOUNT_FIELDS = {
+    "id": "id",
+    "accountNumber": "account_number",
+    "accountName": "account_name",
+    "bankName": "bank_name",
+    "ifscCode": "ifsc_code",
+}
+# The secret key is never read back
+API_KEY_FIELDS = {
+    "id": "id",
+    "accessKey": "access_key",
+    "description": "description",
+    "isActive": "is_active",
+    "isRevoked": "is_revoked",
+    "expiresAt": "expires_at",
+    "lastUsedAt": "last_used_at",
+    "createdAt": "created_at",
+}
+SUBSCRIPTION_FIELDS = {
+    "id": "id",
+    "subscriptionPlan": "subscription_plan_id",
+    "startDate": "start_date",
+    "endDate": "end_date",
+    "monthlyFee": "monthly_fee",
+    "annualFee": "annual_fee",
+    "isActive": "is_active",
+}
+# Fields a PATCH may change, per payload group
+COMPANY_UPDATE_FIELDS = {key: attname for key, attname in COMPANY_FIELDS.items() if key in COMPANY_SCAFFOLD["details"]}
+ADDRESS_UPDATE_FIELDS = {key: attname for key, attname in ADDRESS_FIELDS.items() if key in COMPANY_SCAFFOLD["address"]}
+BANK_ACCOUNT_UPDATE_FIELDS = {key: attname for key, attname in BANK_ACCOUNT_FIELDS.items() if key in COMPANY_SCAFFOLD["bankAccount"]}
+# Embeddable relations: API name -> (related name, model, fields)
+COMPANY_EMBEDS = {
+    "addresses": ("addresses", CompanyAddress, ADDRESS_FIELDS),
+    "bankAccounts": ("bank_accounts", CompanyBankAccount, BANK_ACCOUNT_FIELDS),
+}
+# Relations read with a single company: API name -> (related name, model, fields)
+COMPANY_AGGREGATE = dict(COMPANY_EMBEDS, **{
+    "apiKeys": ("api_keys", CompanyAPIKeys, API_KEY_FIELDS),
+    "subscriptions": ("subscriptions", SubscriptionCompany, SUBSCRIPTION_FIELDS),
+})
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+# Filters accepted by the listing and by the bulk operations
+COMPANY_FILTERS = ("isActive", "affiliatedPartner", "createdFrom", "createdTo")
+MAX_BULK_IDS = 1000
+
+def company_etag(company_id, last_modified):
+    """
+    Strong ETag of a company with its records, from the latest updated_at among them. Deleting a
+    record touches the company (see apps.company.signals), so deletions change it as well.
+    """
+    return f'"{company_id}-{int(last_modified.timestamp() * 1_000_000)}"'
+
+def _newest_child(model):
+    return Subquery(
+        model.objects.filter(company=OuterRef("pk")).order_by().values("company").annotate(newest=Max("updated_at")).values("newest")[:1]
+    )
+
+def annotate_last_modified(queryset):
+    """
+    Annotate 'last_modified': the latest updated_at of each company and of the records of its
+    aggregate (see COMPANY_AGGREGATE), computed by the database in the same query as the companies.
+    """
+    return queryset.annotate(last_modified=Greatest(
+        F("updated_at"),
+        *(Coalesce(_newest_child(model), F("updated_at")) for _, model, _ in COMPANY_AGGREGATE.values()),
+    ))
+
+def load_company_aggregate(company_id):
+    """
+    A company with the records of COMPANY_AGGREGATE, one query per table, as cached by company_cache:
+    {"data": serialized company, "last_modified": latest updated_at}, or None when it does not exist.
+    """
+    company = CompanyDetails.objects.prefetch_related(
+        *(Prefetch(related_name, queryset=model.objects.order_by("id")) for related_name, model, _ in COMPANY_AGGREGATE.values())
+    ).filter(pk=company_id).first()
+    if company is None:
+        return None
+    data = {field: getattr(company, attname) for field, attname in COMPANY_FIELDS.items()}
+    last_modified = company.updated_at
+    for api_name, (related_name, model, related_fields) in COMPANY_AGGREGATE.items():
+        records = list(getattr(company, related_name).all())
+        data[api_name] = [{field: getattr(record, attname) for field, attname in related_fields.items()} for record in records]
+        last_modified = max([last_modified, *(record.updated_at for record in records)])
+    return {"data": data, "last_modified": last_modified}
+
+def company_version(company_id):
+    """
+    Current version of a company, with one query: {"etag", "updatedAt"}, or None when it does not exist.
+    """
+    row = annotate_last_modified(CompanyDetails.objects.filter(pk=company_id)).values("updated_at", "last_modified").first()
+    if row is None:
+        return None
+    return {"etag": company_etag(company_id, row["last_modified"]), "updatedAt": row["updated_at"]}
+
+def company_queryset(request, action="view"):
+    """
+    Companies the caller may perform the action on, with the row filters of their access groups applied.
+    Companies pending deletion are left out for every action.
+    """
+    queryset = CompanyDetails.objects.filter(pending_deletion=False)
+    return permission_engine.restrict(queryset, request.principal, action)
+
+def filter_companies(queryset, filters):
+    """
+    Apply the whitelisted company filters, given as query parameters or as JSON values:
+    isActive (true/false), affiliatedPartner (id), createdFrom / createdTo (ISO date or datetime,
+    a date 'createdTo' includes the whole day). Missing or empty filters are ignored.
+    :raises ValueError: For an invalid filter value.
+    """
+    is_active = filters.get("isActive")
+    if is_active not in (None, ""):
+        if isinstance(is_active, str) and is_active.lower() in ("true", "false"):
+            is_active = is_active.lower() == "true"
+        if not isinstance(is_active, bool):
+            raise ValueError("Invalid isActive, expected true or false.")
+        queryset = queryset.filter(is_active=is_active)
+    partner = filters.get("affiliatedPartner")
+    if partner not in (None, ""):
+        if isinstance(partner, str) and partner.isdigit():
+            partner = int(partner)
+        if not isinstance(partner, int) or isinstance(partner, bool):
+            raise ValueError("Invalid affiliatedPartner, expected an id.")
+        queryset = queryset.filter(affiliated_partner_id=partner)
+    created_from = filters.get("createdFrom")
+    if created_from:
+        queryset = queryset.filter(created_at__gte=_parse_moment(created_from, "createdFrom"))
+    created_to = filters.get("createdTo")
+    if created_to:
+        if isinstance(created_to, str) and parse_datetime(created_to) is None and parse_date(created_to) is not None:
+            # A plain date includes the whole day, compared as a range to keep the column indexable
+            queryset = queryset.filter(created_at__lt=_parse_moment(created_to, "createdTo") + timedelta(days=1))
+        else:
+            queryset = queryset.filter(created_at__lte=_parse_moment(created_to, "createdTo"))
+    return queryset
+
+def _parse_moment(value, name):
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except (TypeError, ValueError):
+        moment = None
+    if moment is None:
+        raise ValueError(f"Invalid {name}, expected an ISO date or datetime.")
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+class ListCompanyRecords:
+    """
+    One page of companies, paginated with a keyset cursor on (name, id).
+    Query parameters:
+    - limit: page size, 25 by default and at most 100
+    - cursor: the 'nextCursor' of the previous page
+    - isActive, affiliatedPartner, createdFrom, createdTo (see filter_companies)
+    - fields: comma separated API fields to return, all by default
+    - embed: comma separated relations to include, 'addresses' and/or 'bankAccounts'
+    A page costs one query plus one per embedded relation, twice that for the page where the named
+    companies run out and the companies without a name begin (see KeysetPage). With the (name, id)
+    index of company_details in place every query starts at the cursor, so the cost does not grow
+    with the depth of the page.
+    Usage:
+        result = ListCompanyRecords(company_queryset(request, "view"), request.GET).list()
+    Attributes:
+        queryset (QuerySet): Companies the caller may view.
+        params (QueryDict): The query parameters of the request.
+    """
+    def __init__(self, queryset, params):
+        self.queryset = queryset
+        self.params = params
+
+    def validator(self, rows, embeds, next_cursor):
+        """
+        Weak ETag of a page, from the rows read for it: the id and updated_at of every company and
+        embedded record, the next cursor and the query parameters. A company or record deleted from
+        the page changes it too; lists carry no Last-Modified, no timestamp records such deletions.
+        """
+        parts = ["&".join(sorted(f"{name}={value}" for name, value in self.params.items())), str(next_cursor)]
+        for company in rows:
+            parts.append(f"{company.pk}:{int(company.updated_at.timestamp() * 1_000_000)}")
+            for related_name, _, _ in embeds.values():
+                parts.extend(
+                    f"{related_name}.{related.pk}:{int(related.updated_at.timestamp() * 1_000_000)}"
+                    for related in getattr(company, related_name).all()
+                )
+        return f'W/"{hashlib.md5("|".join(parts).encode("utf-8")).hexdigest()}"'
+
+    def list(self, request=None):
+        """
+        :param request: When given, the page carries an ETag and a page unchanged since the client's
+            If-None-Match is answered with 304 before it is serialized.
+        """
+        try:
+            limit = self._limit()
+            fields = self._fields(self.params.get("fields"), COMPANY_FIELDS)
+            embeds = self._embeds()
+            queryset = self._filter(self.queryset)
+            # The sort key is always read, the cursor is built from it, and updated_at for the ETag
+            queryset = queryset.only(*{COMPANY_FIELDS[field] for field in fields} | {"id", "name", "updated_at"})
+            for related_name, model, related_fields in embeds.values():
+                attributes = set(related_fields.values()) | {"company_id", "updated_at"}
+                queryset = queryset.prefetch_related(
+                    Prefetch(related_name, queryset=model.objects.only(*attributes).order_by("id"))
+                )
+            rows, next_cursor = KeysetPage("name", limit).fetch(queryset, self.params.get("cursor"))
+        except (CursorError, ValueError) as e:
+            return {"code": 400, "success": False, "message": str(e), "data": None}
+
+        etag = None
+        if request is not None:
+            etag = self.validator(rows, embeds, next_cursor)
+            if is_not_modified(request, etag=etag):
+                return {"code": 304, "success": True, "message": "Companies not modified", "data": None, "etag": etag}
+        results = []
+        for company in rows:
+            item = {field: getattr(company, COMPANY_FIELDS[field]) for field in fields}
+            for api_name, (related_name, model, related_fields) in embeds.items():
+                item[api_name] = [
+                    {field: getattr(related, attribute) for field, attribute in related_fields.items()}
+                    for related in getattr(company, related_name).all()
+                ]
+            results.append(item)
+        data = {"results": results, "nextCursor": next_cursor, "hasMore": next_cursor is not None}
+        return {"code": 200, "success": True, "message": "Companies retrieved successfully", "data": data, "etag": etag}
+
+    def _limit(self):
+        value = self.params.get("limit")
+        if value in (None, ""):
+            return DEFAULT_PAGE_SIZE
+        try:
+            limit = int(value)
+        except ValueError:
+            raise ValueError("Invalid limit, expected a number.")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"Invalid limit, expected a number between 1 and {MAX_PAGE_SIZE}.")
+        return limit
+
+    @staticmethod
+    def _fields(value, available):
+        if not value:
+            return list(available)
+        fields = [field.strip() for field in value.split(",") if field.strip()]
+        unknown = [field for field in fields if field not in available]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return list(dict.fromkeys(fields))
+
+    def _embeds(self):
+        value = self.params.get("embed")
+        if not value:
+            return {}
+        return {name: COMPANY_EMBEDS[name] for name in self._fields(value, COMPANY_EMBEDS)}
+
+    def _filter(self, queryset):
+        return filter_companies(queryset, self.params)
+
+class RetrieveCompanyRecord:
+    """
+    A company with its addresses, bank accounts, API keys and subscriptions, answering conditional
+    requests.
+    The validators are read first, in one query which also checks that the company is visible:
+    the ETag (see company_etag) and Last-Modified, the latest updated_at of the company and its
+    records. When the client's If-None-Match or If-Modified-Since shows its copy is current the
+    result is a 304 and the company is neither loaded nor serialized. Otherwise the aggregate comes
+    from company_cache; a cached aggregate older than the validators (a change made through another
+    worker within the L1 TTL) is reloaded, so the body always matches the ETag sent with it.
+    Usage:
+        result = RetrieveCompanyRecord(company_queryset(request, "view"), 1, request).retrieve()
+        result["etag"], result["last_modified"]  # emitted as headers by BuildResponse
+    Attributes:
+        queryset (QuerySet): Companies the caller may view.
+        company_id (int): The company to read.
+        request (HttpRequest): Carries the conditional headers, optional.
+    """
+    def __init__(self, queryset, company_id, request=None):
+        self.queryset = queryset
+        self.company_id = company_id
+        self.request = request
+
+    def retrieve(self):
+        try:
+            row = annotate_last_modified(self.queryset.filter(pk=self.company_id)).values("last_modified").first()
+            if row is None:
+                logger.error("Company details not found.")
+                return {"code": 404, "success": False, "message": "Company details not found", "data": None}
+            validators = {"etag": company_etag(self.company_id, row["last_modified"]), "last_modified": row["last_modified"]}
+            if self.request is not None and is_not_modified(self.request, **validators):
+                return dict({"code": 304, "success": True, "message": "Company not modified", "data": None}, **validators)
+
+            aggregate = company_cache.get(self.company_id, load_company_aggregate)
+            if aggregate is not None and aggregate["last_modified"] != row["last_modified"]:
+                company_cache.invalidate(self.company_id)
+                aggregate = company_cache.get(self.company_id, load_company_aggregate)
+            if aggregate is None:
+                logger.error("Company details not found.")
+                return {"code": 404, "success": False, "message": "Company details not found", "data": None}
+            validators = {"etag": company_etag(self.company_id, aggregate["last_modified"]), "last_modified": aggregate["last_modified"]}
+            return dict({"code": 200, "success": True, "message": "Company retrieved successfully", "data": aggregate["data"]}, **validators)
+        except Exception as e:
+            logger.error(f"Internal server error: {str(e)}")
+            return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
+
 class RecordAdapter:
     def adapt_company_details(self, record):
         try:
@@ -107,85 +452,184 @@ class CreateCompanyRecords:
             logger.error(f"Internal server error: {str(e)}")
 
 class UpdateCompanyRecords:
-    def __init__(self, company_id, company_details, address, bank_account):
+    """
+    Partial update of a company, its address and its bank account.
+    Only the fields present in the request are considered, and of those only the ones whose value
+    differs from the stored row are written, with save(update_fields=...). A record without changes
+    is not written at all. The rows are locked with SELECT ... FOR UPDATE for the duration of the
+    update, so the preconditions are checked against the rows that are written:
+    - 'if_match': the If-Match header, matched against the company ETag (see company_etag)
+    - 'updated_at': the 'updatedAt' of the company as last read by the client
+    A failed precondition answers 412 with the current ETag and updatedAt, as does a successful
+    update, so the client can continue without reading the company again.
+    Usage:
+        result = UpdateCompanyRecords(1, {"companyName": "Acme"}, None, None, if_match='"1-1700000000000000"').update()
+    """
+    def __init__(self, company_id, company_details, address, bank_account, queryset=None, if_match=None, updated_at=None):
         self.company_id = company_id
         self.company_details = company_details
         self.address = address
         self.bank_account = bank_account
+        self.queryset = queryset if queryset is not None else CompanyDetails.objects.all()
+        self.if_match = if_match
+        self.updated_at = updated_at
 
     def update(self):
         """Update company records."""
         try:
-            company_obj = self.update_company_details()
-            if not company_obj["success"]:
-                return {"code": company_obj["code"], "success": False, "message": company_obj["message"], "data": None}
-            self.update_company_address(company_obj["data"])
-            self.update_company_bank_account(company_obj["data"])
-            return {"code": 200, "success": True, "message": "Company records updated successfully", "data": None}
-        except Exception as e:
-            logger.error(f"Internal server error: {str(e)}")
-            return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
-    
-    def update_company_details(self):
-        """Update company details."""
-        try:
-            adapted_details = RecordAdapter().adapt_company_details(self.company_details)
-            if not adapted_details:
-                logger.error("Invalid data format for company records.")
-                return {"code": 400, "success": False, "message": "Invalid data format", "data": None}
-            
-            obj = CompanyDetails.objects.filter(id=self.company_id).first()
-            if not obj:
-                logger.error("Company details not found.")
-                return {"code": 404, "success": False, "message": "Company details not found", "data": None}
-            
-            for key, value in adapted_details.items():
-                setattr(obj, key, value)
-            obj.save()
-            
-            return {"code": 200, "success": True, "message": "Company details updated successfully", "data": obj}
-        except Exception as e:
-            logger.error(f"Internal server error: {str(e)}")
-            return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
+            with transaction.atomic():
+                # Visibility first, the lock is then taken on the plain row
+                if not self.queryset.filter(id=self.company_id).exists():
+                    logger.error("Company details not found.")
+                    return {"code": 404, "success": False, "message": "Company details not found", "data": None}
+                company = CompanyDetails.objects.select_for_update().get(id=self.company_id)
+                address = CompanyAddress.objects.select_for_update().filter(company=company).order_by("id").first()
+                bank_account = CompanyBankAccount.objects.select_for_update().filter(company=company).order_by("id").first()
+                if self.address and address is None:
+                    logger.error("Company address not found.")
+                    return {"code": 404, "success": False, "message": "Company address not found", "data": None}
+                if self.bank_account and bank_account is None:
+                    logger.error("Company bank account not found.")
+                    return {"code": 404, "success": False, "message": "Company bank account not found", "data": None}
 
-    def update_company_address(self, company):
-        """Update company address."""
-        try:
-            adapted_address = RecordAdapter().adapt_address(self.address, fkey=company)
-            if not adapted_address:
-                logger.error("Invalid data format for company address.")
-                return {"code": 400, "success": False, "message": "Invalid data format for address", "data": None}
-            
-            obj = CompanyAddress.objects.filter(company=company).first()
-            if not obj:
-                logger.error("Company address not found.")
-                return {"code": 404, "success": False, "message": "Company address not found", "data": None}
-            
-            for key, value in adapted_address.items():
-                setattr(obj, key, value)
-            obj.save()
-            
+                current = self._version(company)
+                failed = self.check_preconditions(company, current)
+                if failed:
+                    return failed
+
+                changed = {
+                    "details": self.apply_changes(company, self.company_details, COMPANY_UPDATE_FIELDS),
+                    "address": self.apply_changes(address, self.address, ADDRESS_UPDATE_FIELDS),
+                    "bankAccount": self.apply_changes(bank_account, self.bank_account, BANK_ACCOUNT_UPDATE_FIELDS),
+                }
+            changed = {group: fields for group, fields in changed.items() if fields}
+            if changed:
+                current = self._version(company)
+            message = "Company records updated successfully" if changed else "Company records are unchanged"
+            return {"code": 200, "success": True, "message": message, "data": dict(current, changed=changed)}
+        except ValidationError as e:
+            return {"code": 400, "success": False, "message": "; ".join(e.messages), "data": None}
         except Exception as e:
             logger.error(f"Internal server error: {str(e)}")
             return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
 
-    def update_company_bank_account(self, company):
-        """Update company bank account."""
+    def check_preconditions(self, company, current):
+        """
+        Return a 412 result when If-Match or updatedAt do not match the current rows, otherwise None.
+        :param current: The current version of the company, see company_version.
+        """
+        if self.if_match:
+            tags = [tag.strip() for tag in self.if_match.split(",")]
+            if "*" not in tags and current["etag"] not in tags:
+                logger.warning(f"If-Match precondition failed for company {company.pk}")
+                return {"code": 412, "success": False, "message": "Precondition failed: the company was modified", "data": current}
+        if self.updated_at:
+            expected = parse_datetime(str(self.updated_at))
+            if expected is None:
+                raise ValidationError("Invalid updatedAt, expected an ISO datetime.")
+            if timezone.is_naive(expected):
+                expected = timezone.make_aware(expected)
+            # Responses carry updatedAt with millisecond precision
+            stored = company.updated_at.replace(microsecond=company.updated_at.microsecond // 1000 * 1000)
+            if stored != expected.replace(microsecond=expected.microsecond // 1000 * 1000):
+                logger.warning(f"updatedAt precondition failed for company {company.pk}")
+                return {"code": 412, "success": False, "message": "Precondition failed: the company was modified", "data": current}
+        return None
+
+    @staticmethod
+    def apply_changes(obj, record, field_map):
+        """
+        Set the fields of the record that differ from the row and save only those.
+        :return: The API names of the changed fields.
+        """
+        if not record or obj is None:
+            return []
+        changed = {}
+        for key, attname in field_map.items():
+            if key not in record:
+                continue
+            value = obj._meta.get_field(attname).to_python(record[key])
+            if getattr(obj, attname) != value:
+                setattr(obj, attname, value)
+                changed[key] = attname
+        if changed:
+            obj.save(update_fields=[*changed.values(), "updated_at"])
+        return list(changed)
+
+    @staticmethod
+    def _version(company):
+        # Computed like the ETag of the read endpoints, over the whole aggregate
+        return company_version(company.pk)
+
+def select_companies(queryset, body):
+    """
+    Narrow the queryset to the companies a bulk operation targets: a single 'id', an 'ids' list
+    or a 'filter' object of whitelisted filters (see filter_companies).
+    :return: (queryset, the requested ids, or None when selecting by filter)
+    :raises ValueError: For a missing or invalid selection.
+    """
+    if "ids" in body or "id" in body:
+        ids = body.get("ids") if "ids" in body else [body.get("id")]
+        if not isinstance(ids, list) or not ids:
+            raise ValueError("Expected 'ids' to be a non-empty list of company ids.")
+        ids = [int(value) if isinstance(value, str) and value.isdigit() else value for value in ids]
+        if not all(isinstance(value, int) and not isinstance(value, bool) for value in ids):
+            raise ValueError("Expected 'ids' to be a non-empty list of company ids.")
+        if len(ids) > MAX_BULK_IDS:
+            raise ValueError(f"At most {MAX_BULK_IDS} ids are accepted per request, use a filter instead.")
+        ids = list(dict.fromkeys(ids))
+        return queryset.filter(pk__in=ids), ids
+    filters = body.get("filter")
+    if not isinstance(filters, dict) or not filters:
+        raise ValueError("Specify 'id', 'ids' or a non-empty 'filter'.")
+    unknown = [name for name in filters if name not in COMPANY_FILTERS]
+    if unknown:
+        raise ValueError(f"Unknown filters: {', '.join(unknown)}")
+    return filter_companies(queryset, filters), None
+
+class SetCompanyActive:
+    """
+    Archive or restore companies with a single UPDATE of is_active and updated_at.
+    Companies selected by id are resolved first with one query, so the ids that do not exist or
+    are not visible to the caller can be reported; companies already in the target state are left
+    untouched and counted as unchanged.
+    Usage:
+        result = SetCompanyActive(company_queryset(request, "archive"), body, is_active=False).execute()
+        result["data"]  # {"updated": 2, "unchanged": 1, "notFound": [9]}
+    Attributes:
+        queryset (QuerySet): Companies the caller may perform the operation on.
+        body (dict): 'id', 'ids' or 'filter', see select_companies.
+        is_active (bool): The state to set.
+    """
+    def __init__(self, queryset, body, is_active):
+        self.queryset = queryset
+        self.body = body
+        self.is_active = is_active
+
+    def execute(self):
+        action = "restored" if self.is_active else "archived"
         try:
-            adapted_bank_account = RecordAdapter().adapt_bank_account(self.bank_account, fkey=company)
-            if not adapted_bank_account:
-                logger.error("Invalid data format for company bank account.")
-                return {"code": 400, "success": False, "message": "Invalid data format for bank account", "data": None}
-            
-            obj = CompanyBankAccount.objects.filter(company=company).first()
-            if not obj:
-                logger.error("Company bank account not found.")
-                return {"code": 404, "success": False, "message": "Company bank account not found", "data": None}
-
-            for key, value in adapted_bank_account.items():
-                setattr(obj, key, value)
-            obj.save()
-            
+            queryset, ids = select_companies(self.queryset, self.body)
+        except ValueError as e:
+            return {"code": 400, "success": False, "message": str(e), "data": None}
+        try:
+            not_found, found = [], None
+            if ids is not None:
+                found = set(queryset.values_list("pk", flat=True))
+                not_found = [pk for pk in ids if pk not in found]
+                if not found:
+                    logger.error("Company not found.")
+                    return {"code": 404, "success": False, "message": "Company not found", "data": {"updated": 0, "unchanged": 0, "notFound": not_found}}
+                # Visibility was checked above, the UPDATE only needs the primary keys
+                queryset = CompanyDetails.objects.filter(pk__in=found)
+            updated = queryset.filter(is_active=not self.is_active).update(is_active=self.is_active, updated_at=timezone.now())
+            # A bulk UPDATE sends no signals
+            if found is not None:
+                company_cache.invalidate_many(found)
+            elif updated:
+                company_cache.invalidate_all()
+            data = {"updated": updated, "unchanged": len(found) - updated if found is not None else None, "notFound": not_found}
+            return {"code": 200, "success": True, "message": f"{updated} companies {action} successfully", "data": data}
         except Exception as e:
             logger.error(f"Internal server error: {str(e)}")
             return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
@@ -196,18 +640,8 @@ class ArchiveCompany:
         self.body = json.loads(request.body)
 
     def archive(self):
-        """Archive a company."""
-        try:
-            company = CompanyDetails.objects.filter(id=self.body.get("id")).first()
-            if not company:
-                logger.error("Company not found.")
-                return {"code": 404, "success": False, "message": "Company not found", "data": None}
-            company.is_active = False
-            company.save()
-            return {"code": 200, "success": True, "message": "Company archived successfully", "data": None}
-        except Exception as e:
-            logger.error(f"Internal server error: {str(e)}")
-            return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
+        """Archive the companies selected by id, ids or filter."""
+        return SetCompanyActive(company_queryset(self.request, "archive"), self.body, is_active=False).execute()
 
 class RestoreCompany:
     def __init__(self, request):
@@ -215,18 +649,8 @@ class RestoreCompany:
         self.body = json.loads(request.body)
 
     def restore(self):
-        """Restore an archived company."""
-        try:
-            company = CompanyDetails.objects.filter(id=self.body.get("id")).first()
-            if not company:
-                logger.error("Company not found.")
-                return {"code": 404, "success": False, "message": "Company not found", "data": None}
-            company.is_active = True
-            company.save()
-            return {"code": 200, "success": True, "message": "Company restored successfully", "data": None}
-        except Exception as e:
-            logger.error(f"Internal server error: {str(e)}")
-            return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
+        """Restore the archived companies selected by id, ids or filter."""
+        return SetCompanyActive(company_queryset(self.request, "restore"), self.body, is_active=True).execute()
 
 class DeleteCompany:
     def __init__(self, request):
@@ -234,14 +658,37 @@ class DeleteCompany:
         self.body = json.loads(request.body)
 
     def delete(self):
-        """Delete a company."""
+        """
+        Mark the companies selected by id, ids or filter as pending deletion and queue a background
+        job deleting them with their dependents in chunks (see ChunkedCompanyDeletion).
+        Companies still referenced by protected rows are refused with a 409 and left untouched.
+        """
         try:
-            company = CompanyDetails.objects.filter(id=self.body.get("id")).first()
-            if not company:
-                logger.error("Company not found.")
-                return {"code": 404, "success": False, "message": "Company not found", "data": None}
-            company.delete()
-            return {"code": 200, "success": True, "message": "Company deleted successfully", "data": None}
+            queryset, ids = select_companies(company_queryset(self.request, "delete"), self.body)
+        except ValueError as e:
+            return {"code": 400, "success": False, "message": str(e), "data": None}
+        try:
+            with transaction.atomic():
+                company_ids = list(queryset.select_for_update().values_list("pk", flat=True))
+                not_found = [pk for pk in ids if pk not in set(company_ids)] if ids is not None else []
+                if not company_ids:
+                    logger.error("Company not found.")
+                    return {"code": 404, "success": False, "message": "Company not found", "data": {"pending": 0, "notFound": not_found}}
+                blocking = CascadePlan().blocking(company_ids)
+                if blocking:
+                    logger.error(f"Companies {company_ids} are still referenced by {blocking}.")
+                    message = f"Companies are still referenced by {', '.join(blocking)}"
+                    return {"code": 409, "success": False, "message": message, "data": {"blockedBy": blocking, "notFound": not_found}}
+                # Hidden from every other operation from now on. is_active is left alone so a
+                # deletion refused by the job leaves the companies as they were
+                CompanyDetails.objects.filter(pk__in=company_ids).update(pending_deletion=True, updated_at=timezone.now())
+                company_cache.invalidate_many(company_ids)
+                job = background_jobs.submit(
+                    "company.delete", run_company_deletion, company_ids,
+                    owner_id=self.request.principal.user_id,
+                )
+            data = {"jobId": job.pk, "pending": len(company_ids), "notFound": not_found}
+            return {"code": 202, "success": True, "message": f"{len(company_ids)} companies scheduled for deletion", "data": data}
         except Exception as e:
             logger.error(f"Internal server error: {str(e)}")
-            return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
\ No newline at end of file
+            return {"code": 500, "success": False, "message": f"Internal server error: {str(e)}", "data": None}
@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Q
+from apps.utils.common.logger.logger import PortalLogger
+from apps.utils.logic.services.dependency_loader import dependency_levels
+from apps.company.common.cache.aggregate_cache import company_cache
+from apps.company.models import CompanyDetails
+from apps.company.signals import batch_touches
+
+logger = PortalLogger(__name__)
+
+class DeletionBlocked(Exception):
+    """
+    Raised when rows protected from deletion still reference the companies.
+    """
+
+class CascadePlan:
+    """
+    Every table reached by cascading deletes from CompanyDetails, ordered leaf first.
+    The reverse relations are walked from CompanyDetails; per model the plan keeps the lookups
+    leading back to the company and what deleting the company does to the rows:
+    - CASCADE: the rows are deleted
+    - SET_NULL: the foreign key is cleared
+    - PROTECT / RESTRICT: deletion is refused while such rows exist
+    Other behaviours (DO_NOTHING, SET_DEFAULT, ...) are left to the database.
+    Deleting the tables in 'order' never removes a row that is still referenced by a row of a
+    later table, so every chunk is deleted without Django having to collect dependents.
+    """
+    def __init__(self, root=CompanyDetails):
+        self.root = root
+        self.cascade = {}
+        self.set_null = []
+        self.protected = []
+        self._walk()
+        labels = {model._meta.label: model for model in self.cascade}
+        levels, _ = dependency_levels(list(labels))
+        # dependency_levels puts parents first, deletion goes the other way round
+        self.order = [labels[label] for level in reversed(levels) for label in level]
+
+    def _walk(self):
+        pending = [(self.root, "pk")]
+        seen = {self.root}
+        while pending:
+            model, path = pending.pop(0)
+            for relation in model._meta.related_objects:
+                if not (relation.one_to_many or relation.one_to_one):
+                    continue
+                related, field = relation.related_model, relation.field
+                lookup = f"{field.name}__{path}" if path != "pk" else field.name
+                on_delete = field.remote_field.on_delete
+                if on_delete is models.CASCADE:
+                    if related is model:
+                        # Self references are resolved by the chunk delete of the model itself
+                        continue
+                    self.cascade.setdefault(related, []).append(lookup)
+                    if related not in seen:
+                        seen.add(related)
+                        pending.append((related, lookup))
+                elif on_delete is models.SET_NULL:
+                    self.set_null.append((related, field, lookup))
+                elif on_delete in (models.PROTECT, models.RESTRICT):
+                    self.protected.append((related, lookup))
+
+    def blocking(self, company_ids):
+        """
+        Return the labels of the protected models with rows still referencing the companies.
+        """
+        return sorted({
+            model._meta.label for model, lookup in self.protected
+            if model._default_manager.filter(**{f"{lookup}__in": company_ids}).exists()
+        })
+
+    def rows(self, model, company_ids):
+        condition = Q()
+        for lookup in self.cascade[model]:
+            condition |= Q(**{f"{lookup}__in": company_ids})
+        return model._default_manager.filter(condition)
+
+class ChunkedCompanyDeletion:
+    """
+    Deletes companies and everything depending on them in bounded chunks, table by table, leaf first.
+    Instead of one company.delete(), which loads every dependent row into memory and deletes them
+    all in one long transaction, every table of the CascadePlan is emptied of the rows of the
+    companies 'chunk_size' primary keys at a time, each chunk in its own short transaction.
+    Foreign keys declared SET_NULL are cleared the same way before their targets are deleted.
+    The deletion can be interrupted and run again: every step only looks at the rows left.
+    Usage:
+        result = ChunkedCompanyDeletion([1, 2]).execute(context)
+        result  # {"deleted": {"user.UserDetails": 120, ..., "company.CompanyDetails": 2}}
+    Attributes:
+        company_ids (list): Companies to delete, marked pending deletion beforehand.
+        chunk_size (int): Rows deleted per transaction.
+    """
+    def __init__(self, company_ids, chunk_size=None):
+        self.company_ids = list(company_ids)
+        self.chunk_size = chunk_size or getattr(settings, "COMPANY_DELETION_CHUNK_SIZE", 1000)
+        self.plan = CascadePlan()
+        self.deleted = {}
+        self._processed = 0
+
+    def execute(self, context=None):
+        """
+        :param context: Optional JobContext receiving the number of deleted rows.
+        :raises DeletionBlocked: When protected rows reference the companies.
+        """
+        blocking = self.plan.blocking(self.company_ids)
+        if blocking:
+            raise DeletionBlocked(f"{', '.join(blocking)} rows still reference the companies.")
+        roots = self.plan.root._default_manager.filter(pk__in=self.company_ids)
+        total = sum(self.plan.rows(model, self.company_ids).count() for model in self.plan.order) + roots.count()
+        if context:
+            context.progress(0, total=total, force=True)
+
+        # The delete signals of every row would invalidate and touch the companies one row at a time
+        with company_cache.batch(), batch_touches():
+            for model, field, lookup in self.plan.set_null:
+                self._in_chunks(
+                    model._default_manager.filter(**{f"{lookup}__in": self.company_ids}),
+                    lambda pks, model=model, field=field: model._default_manager.filter(pk__in=pks).update(**{field.name: None}),
+                )
+            for model in self.plan.order:
+                self._delete(model, self.plan.rows(model, self.company_ids), context, total)
+            self._delete(self.plan.root, roots, context, total)
+
+        if context:
+            context.progress(self._processed, total=total, force=True)
+        logger.info(f"Deleted companies {self.company_ids}: {self.deleted}")
+        return {"companies": self.company_ids, "deleted": self.deleted}
+
+    def _delete(self, model, queryset, context, total):
+        label = model._meta.label
+
+        def delete_chunk(pks):
+            # Dependents are gone already, so the collector has nothing left to load
+            _, per_model = model._default_manager.filter(pk__in=pks).delete()
+            for deleted_label, count in per_model.items():
+                self.deleted[deleted_label] = self.deleted.get(deleted_label, 0) + count
+            self._processed += len(pks)
+            if context:
+                context.progress(self._processed, total=total)
+
+        self._in_chunks(queryset, delete_chunk)
+        self.deleted.setdefault(label, 0)
+
+    def _in_chunks(self, queryset, apply):
+        while True:
+            pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:self.chunk_size])
+            if not pks:
+                return
+            with transaction.atomic():
+                apply(pks)
+
+def run_company_deletion(context, company_ids):
+    """
+    Background job entry point. When the deletion is refused the companies are no longer pending.
+    """
+    try:
+        return ChunkedCompanyDeletion(company_ids).execute(context)
+    except DeletionBlocked:
+        CompanyDetails.objects.filter(pk__in=company_ids).update(pending_deletion=False)
+        raise
@@ -0,0 +1,202 @@
+import csv
+import json
+import os
+from django.conf import settings
+from django.db import transaction
+from apps.utils.common.logger.logger import PortalLogger
+from apps.utils.common.validation.general_validations import GeneralValidationService as validation_service
+from apps.company.common.payload.scaffold import COMPANY_SCAFFOLD
+from apps.company.common.cache.aggregate_cache import company_cache
+from apps.company.logic.services.crud.company import RecordAdapter
+from apps.company.models import CompanyDetails, CompanyAddress, CompanyBankAccount
+from apps.partner.models import PartnerDetails
+
+logger = PortalLogger(__name__)
+
+IMPORT_FORMATS = ("ndjson", "csv")
+# CSV column -> payload group, the scaffold field names are unique across the groups
+CSV_COLUMNS = {field: group for group, fields in COMPANY_SCAFFOLD.items() for field in fields}
+
+def detect_import_format(file_name="", content_type=""):
+    """
+    Import format from the file extension or the content type, None when neither tells.
+    """
+    extension = os.path.splitext(file_name or "")[1].lower()
+    if extension == ".csv" or "csv" in (content_type or ""):
+        return "csv"
+    if extension in (".ndjson", ".jsonl") or "ndjson" in (content_type or "") or "jsonl" in (content_type or ""):
+        return "ndjson"
+    return None
+
+def read_import_rows(path, import_format):
+    """
+    Yield (row number, payload or None, error or None) for every row of the upload.
+    NDJSON rows are payloads as accepted by the create endpoint: {"details", "address", "bankAccount"}.
+    CSV rows have one column per scaffold field; empty cells are treated as missing and integer
+    fields are converted.
+    """
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if import_format == "ndjson":
+            number = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                number += 1
+                try:
+                    payload = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield number, None, f"Invalid JSON: {e}"
+                    continue
+                yield number, payload, None
+        else:
+            reader = csv.DictReader(f)
+            unknown = [column for column in reader.fieldnames or [] if column not in CSV_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown CSV columns: {', '.join(unknown)}")
+            for number, record in enumerate(reader, start=1):
+                yield number, *_payload_from_csv(record)
+
+def _payload_from_csv(record):
+    payload = {group: {} for group in COMPANY_SCAFFOLD}
+    for column, value in record.items():
+        if column is None or value is None or value.strip() == "":
+            continue
+        group = CSV_COLUMNS[column]
+        if COMPANY_SCAFFOLD[group][column]["type"] is int:
+            try:
+                value = int(value)
+            except ValueError:
+                return None, f"Invalid type for field: {column}"
+        payload[group][column] = value
+    return payload, None
+
+def validate_company_row(payload):
+    """
+    Validate one import row against COMPANY_SCAFFOLD, returning the first error or None.
+    """
+    if not isinstance(payload, dict):
+        return "Row must be an object"
+    for group, scaffold in COMPANY_SCAFFOLD.items():
+        if not isinstance(payload.get(group), dict):
+            return f"Missing required payload group: {group}"
+        result = validation_service(scaffold).validate(payload[group])
+        if not result["success"]:
+            return f"{group}: {result['message']}"
+    return None
+
+class ImportCompanyRecords:
+    """
+    Create companies with their address and bank account from an NDJSON or CSV upload.
+    Every row is validated against COMPANY_SCAFFOLD while the file is streamed; valid rows are
+    collected into chunks of 'batch_size' and each chunk is written in one transaction with a
+    bulk_create per table (details, addresses, bank accounts). Affiliated partners are verified
+    with one query per chunk. When a chunk cannot be written in bulk it is retried row by row to
+    pinpoint the failing rows. bulk_create sends no save signals, so the cached aggregates of the
+    created companies are invalidated explicitly; rows written one by one go through the signals.
+    The report lists every failed row with its number and error.
+    Usage:
+        report = ImportCompanyRecords("/tmp/companies.csv", "csv").execute()
+        report  # {"total": 2, "created": 1, "failed": 1, "errors": [{"row": 2, "message": "..."}]}
+    Attributes:
+        path (str): Path of the uploaded file.
+        import_format (str): "ndjson" or "csv".
+        batch_size (int): Rows written per transaction.
+    """
+    def __init__(self, path, import_format, batch_size=None):
+        if import_format not in IMPORT_FORMATS:
+            raise ValueError(f"Unknown import format '{import_format}', expected one of {', '.join(IMPORT_FORMATS)}.")
+        self.path = path
+        self.import_format = import_format
+        self.batch_size = batch_size or getattr(settings, "COMPANY_IMPORT_BATCH_SIZE", 500)
+        self.report = {"total": 0, "created": 0, "failed": 0, "errors": []}
+        self._adapter = RecordAdapter()
+
+    def execute(self, context=None):
+        """
+        :param context: Optional JobContext receiving the number of processed rows.
+        """
+        chunk = []
+        for number, payload, error in read_import_rows(self.path, self.import_format):
+            self.report["total"] += 1
+            error = error or validate_company_row(payload)
+            if error:
+                self._error(number, error)
+            else:
+                chunk.append((number, payload))
+            if len(chunk) >= self.batch_size:
+                self._write(chunk)
+                chunk = []
+                if context:
+                    context.progress(self.report["total"])
+        if chunk:
+            self._write(chunk)
+        if context:
+            context.progress(self.report["total"], total=self.report["total"], force=True)
+        self.report["errors"].sort(key=lambda error: error["row"])
+        logger.info(f"Imported {self.report['created']} of {self.report['total']} companies, {self.report['failed']} failed")
+        return self.report
+
+    def _write(self, chunk):
+        chunk = self._verify_partners(chunk)
+        if not chunk:
+            return
+        try:
+            with transaction.atomic():
+                companies = CompanyDetails.objects.bulk_create([self._company(payload) for _, payload in chunk])
+                CompanyAddress.objects.bulk_create([
+                    CompanyAddress(**self._adapter.adapt_address(payload["address"], fkey=company))
+                    for (_, payload), company in zip(chunk, companies)
+                ])
+                CompanyBankAccount.objects.bulk_create([
+                    CompanyBankAccount(**self._adapter.adapt_bank_account(payload["bankAccount"], fkey=company))
+                    for (_, payload), company in zip(chunk, companies)
+                ])
+                company_cache.invalidate_many(company.pk for company in companies)
+            self.report["created"] += len(companies)
+        except Exception as e:
+            logger.warning(f"Bulk import of {len(chunk)} companies failed, retrying row by row: {e}")
+            for number, payload in chunk:
+                self._write_row(number, payload)
+
+    def _write_row(self, number, payload):
+        try:
+            with transaction.atomic():
+                company = self._company(payload)
+                company.save()
+                CompanyAddress.objects.create(**self._adapter.adapt_address(payload["address"], fkey=company))
+                CompanyBankAccount.objects.create(**self._adapter.adapt_bank_account(payload["bankAccount"], fkey=company))
+            self.report["created"] += 1
+        except Exception as e:
+            self._error(number, str(e))
+
+    def _company(self, payload):
+        values = self._adapter.adapt_company_details(payload["details"])
+        values["affiliated_partner_id"] = values.pop("affiliated_partner")
+        return CompanyDetails(**values)
+
+    def _verify_partners(self, chunk):
+        wanted = {payload["details"].get("affiliatedPartner") for _, payload in chunk} - {None}
+        if not wanted:
+            return chunk
+        found = set(PartnerDetails.objects.filter(pk__in=wanted).values_list("pk", flat=True))
+        verified = []
+        for number, payload in chunk:
+            partner = payload["details"].get("affiliatedPartner")
+            if partner is not None and partner not in found:
+                self._error(number, f"details: Affiliated partner {partner} not found")
+            else:
+                verified.append((number, payload))
+        return verified
+
+    def _error(self, number, message):
+        self.report["failed"] += 1
+        self.report["errors"].append({"row": number, "message": message})
+
+def run_company_import(context, path, import_format):
+    """
+    Background job entry point: import the file and remove it afterwards.
+    """
+    try:
+        return ImportCompanyRecords(path, import_format).execute(context)
+    finally:
+        os.remove(path)
@@ -59,4 +59,34 @@ class ValidateCompanyBankAccount:
         if not result:
             logger.error("Validation failed for company bank account.")
             return {"code": 400, "success": False, "message": "Validation failed for company bank account.", "data": None}
-        return {"code": 200, "success": True, "message": "Validation successful", "data": self.bank_account}
\ No newline at end of file
+        return {"code": 200, "success": True, "message": "Validation successful", "data": self.bank_account}
+
+class ValidateCompanyPatch:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def validate(self):
+        """
+        Validate a partial update: the company id, and every field present in the 'details',
+        'address' and 'bankAccount' groups against its scaffold rule. Missing fields are left as they are.
+        """
+        if not isinstance(self.payload, dict) or not self.payload.get("id"):
+            return {"code": 400, "success": False, "message": "Missing required field: id", "data": None}
+        for group, rules in COMPANY_SCAFFOLD.items():
+            record = self.payload.get(group)
+            if record is None:
+                continue
+            if not isinstance(record, dict):
+                return {"code": 400, "success": False, "message": f"Invalid payload group: {group}", "data": None}
+            unknown = [key for key in record if key not in rules]
+            if unknown:
+                return {"code": 400, "success": False, "message": f"Unknown fields in {group}: {', '.join(unknown)}", "data": None}
+            cleared = [key for key, rule in rules.items() if rule.get("required") and key in record and record[key] is None]
+            if cleared:
+                return {"code": 400, "success": False, "message": f"Required fields cannot be cleared in {group}: {', '.join(cleared)}", "data": None}
+            present = {key: rule for key, rule in rules.items() if key in record and record[key] is not None}
+            result = validation_service(present).validate(record)
+            if not result["success"]:
+                logger.error(f"Validation failed for company {group}: {result['message']}")
+                return {"code": 400, "success": False, "message": f"{group}: {result['message']}", "data": None}
+        return {"code": 200, "success": True, "message": "Validation successful", "data": self.payload}
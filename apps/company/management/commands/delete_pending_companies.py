@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.company.logic.services.crud.company_deletion import ChunkedCompanyDeletion
+from apps.company.models import CompanyDetails
+
+class Command(BaseCommand):
+    """
+    Finish the deletion of companies left pending, e.g. when the server restarted while the
+    background job was running. The deletion picks up with the rows that are left.
+    Usage:
+        python manage.py delete_pending_companies --chunk-size 1000
+    """
+    help = "Delete the companies marked pending deletion, in chunks, leaf tables first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=None, help="Rows deleted per transaction.")
+
+    def handle(self, *args, **options):
+        company_ids = list(CompanyDetails.objects.filter(pending_deletion=True).values_list("pk", flat=True))
+        if not company_ids:
+            self.stdout.write("No companies are pending deletion.")
+            return
+        result = ChunkedCompanyDeletion(company_ids, chunk_size=options["chunk_size"]).execute()
+        for label, count in result["deleted"].items():
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Deleted {len(company_ids)} companies."))
@@ -12,6 +12,7 @@ class CompanyDetails(models.Model):
     established_date = models.DateField(blank=True, null=True)
     description = models.TextField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
+    pending_deletion = models.BooleanField(default=False)  # set while a background job deletes the company
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -20,6 +21,10 @@ class CompanyDetails(models.Model):
         verbose_name_plural = "Company Details"
         ordering = ['name']
         db_table = 'company_details'
+        indexes = [
+            # Keyset pagination of the company listing
+            models.Index(fields=['name', 'id'], name='company_details_name_id_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -32,6 +37,7 @@ class CompanyAddress(models.Model):
     state = models.CharField(max_length=100)
     postal_code = models.CharField(max_length=20)
     country = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Company Address"
@@ -48,6 +54,7 @@ class CompanyBankAccount(models.Model):
     account_name = models.CharField(max_length=255)
     bank_name = models.CharField(max_length=255)
     ifsc_code = models.CharField(max_length=20, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Company Bank Account"
@@ -0,0 +1,60 @@
+import threading
+from contextlib import contextmanager
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.company.common.cache.aggregate_cache import company_cache
+from apps.company.models import CompanyAddress, CompanyAPIKeys, CompanyBankAccount, CompanyDetails
+from apps.subscription.models import SubscriptionCompany
+
+_touches = threading.local()
+
+def touch_companies(company_ids):
+    """
+    Move the updated_at of the companies forward. A deleted record leaves no timestamp behind, so
+    without this the ETag and Last-Modified of its company (see company_etag) would not change.
+    """
+    company_ids = set(company_ids)
+    if not company_ids:
+        return
+    pending = getattr(_touches, "company_ids", None)
+    if pending is not None:
+        pending.update(company_ids)
+        return
+    CompanyDetails.objects.filter(pk__in=company_ids).update(updated_at=timezone.now())
+
+@contextmanager
+def batch_touches():
+    """
+    Collect the companies touched by this thread and touch them with one UPDATE on exit, e.g.
+    while deleting many records of a few companies.
+    """
+    if getattr(_touches, "company_ids", None) is not None:
+        yield
+        return
+    _touches.company_ids = set()
+    try:
+        yield
+    finally:
+        company_ids, _touches.company_ids = _touches.company_ids, None
+        touch_companies(company_ids)
+
+@receiver([post_save, post_delete], sender=CompanyDetails)
+def invalidate_company(sender, instance, **kwargs):
+    """
+    Drop the cached aggregate of the saved or deleted company.
+    """
+    company_cache.invalidate(instance.pk)
+
+@receiver([post_save, post_delete], sender=CompanyAddress)
+@receiver([post_save, post_delete], sender=CompanyBankAccount)
+@receiver([post_save, post_delete], sender=CompanyAPIKeys)
+@receiver([post_save, post_delete], sender=SubscriptionCompany)
+def invalidate_company_records(sender, instance, **kwargs):
+    """
+    Drop the cached aggregate of the company the saved or deleted record belongs to; a deletion
+    also touches the company, since it changes the aggregate.
+    """
+    if kwargs["signal"] is post_delete:
+        touch_companies([instance.company_id])
+    company_cache.invalidate(instance.company_id)
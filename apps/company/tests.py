@@ -1,3 +1,363 @@
-from django.test import TestCase
+import json
+import os
+from unittest import mock
+from django.core.cache import caches
+from django.db import DatabaseError, connection, models
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from apps.access.common.permissions.engine import permission_engine
+from apps.access.common.permissions.version import bump_permissions_version
+from apps.access.models import AccessGroups, AccessObjects, AccessPermissions, UserGroupAccess
+from apps.administration.models import AdministratorUserDetails
+from apps.company.common.cache.aggregate_cache import company_cache
+from apps.company.logic.services.crud.company import DeleteCompany, SetCompanyActive, UpdateCompanyRecords, company_version, load_company_aggregate
+from apps.company.logic.services.crud.company_import import ImportCompanyRecords, _payload_from_csv
+from apps.company.logic.services.crud.company_deletion import CascadePlan, ChunkedCompanyDeletion, DeletionBlocked, run_company_deletion
+from apps.company.models import CompanyAddress, CompanyBankAccount, CompanyDetails
+from apps.user.models import UserDetails
+from apps.utils.common.auth.principal import RequestPrincipal
+from apps.utils.models import BackgroundJob
 
-# Create your tests here.
+FIXTURES = os.path.join(os.path.dirname(__file__), "test", "fixtures")
+
+def create_admin(code, **permissions):
+    """
+    Create an administrator whose only group grants the permissions on companies.
+    """
+    admin = AdministratorUserDetails.objects.create(name=code, email=f"{code}@example.com", code=code)
+    group = AccessGroups.objects.create(name=code, unique_id=code)
+    company_object = AccessObjects.objects.get(name="company.CompanyDetails")
+    AccessPermissions.objects.create(group=group, object=company_object, **permissions)
+    UserGroupAccess.objects.create(admin=admin, group=group, unique_id=code)
+    return admin
+
+def admin_request(admin, body=None):
+    request = RequestFactory().post("/", data=json.dumps(body or {}), content_type="application/json")
+    request.principal = RequestPrincipal({"user_id": admin.id}, "admin")
+    return request
+
+class CompanyAggregateCacheTests(TestCase):
+    """
+    The cached company aggregate follows changes made to the company and to its records.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = CompanyDetails.objects.create(name="Acme", email="acme@example.com")
+        cls.addresses = [
+            CompanyAddress.objects.create(
+                company=cls.company, address_line1=line, city="Makati", state="NCR", postal_code="1200", country="PH"
+            )
+            for line in ("1 Main St", "2 Side St")
+        ]
+        CompanyBankAccount.objects.create(company=cls.company, account_number="1", account_name="Acme", bank_name="Bank")
+
+    def setUp(self):
+        caches[company_cache.cache_alias].clear()
+        company_cache.clear()
+        self.loads = 0
+
+    def _get(self):
+        def loader(company_id):
+            self.loads += 1
+            return load_company_aggregate(company_id)
+        return company_cache.get(self.company.id, loader)
+
+    def test_aggregate_is_loaded_once(self):
+        self._get()
+        with self.assertNumQueries(0):
+            aggregate = self._get()
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(len(aggregate["data"]["addresses"]), 2)
+
+    def test_child_delete_invalidates_the_aggregate(self):
+        before = self._get()
+        self.addresses[1].delete()
+        after = self._get()
+        self.assertEqual(self.loads, 2)
+        self.assertEqual([address["addressLine1"] for address in after["data"]["addresses"]], ["1 Main St"])
+        # The deletion touches the company, so the aggregate's validators move forward as well
+        self.assertGreater(after["last_modified"], before["last_modified"])
+
+    def test_bulk_child_delete_invalidates_the_aggregate(self):
+        self._get()
+        CompanyBankAccount.objects.filter(company=self.company).delete()
+        self.assertEqual(self._get()["data"]["bankAccounts"], [])
+        self.assertEqual(self.loads, 2)
+
+    def test_child_save_invalidates_the_aggregate(self):
+        self._get()
+        address = self.addresses[0]
+        address.city = "Taguig"
+        address.save()
+        self.assertEqual(self._get()["data"]["addresses"][0]["city"], "Taguig")
+
+    def test_batch_invalidates_each_company_once(self):
+        self._get()
+        with company_cache.batch():
+            for address in self.addresses:
+                address.delete()
+            # Applied when the batch ends
+            self.assertEqual(len(self._get()["data"]["addresses"]), 2)
+        self.assertEqual(self._get()["data"]["addresses"], [])
+
+class CascadePlanTests(SimpleTestCase):
+    """
+    The tables reached from CompanyDetails, in an order that never deletes a referenced row first.
+    """
+    def test_dependents_come_before_the_rows_they_reference(self):
+        plan = CascadePlan()
+        position = {model: index for index, model in enumerate(plan.order)}
+        self.assertEqual(set(position), set(plan.cascade))
+        for model in plan.order:
+            for field in model._meta.concrete_fields:
+                target = field.related_model if field.many_to_one or field.one_to_one else None
+                if target in position and target is not model and field.remote_field.on_delete is models.CASCADE:
+                    with self.subTest(model=model._meta.label, field=field.name):
+                        self.assertLess(position[model], position[target])
+
+    def test_set_null_references_are_cleared_not_deleted(self):
+        plan = CascadePlan()
+        self.assertIn(("access.UserGroupAccess", "group_inherit"), [(model._meta.label, field.name) for model, field, _ in plan.set_null])
+        self.assertEqual(plan.protected, [])
+
+class ChunkedCompanyDeletionTests(TestCase):
+    """
+    Chunked deletion of a company with its dependents, SET_NULL references from other companies
+    and the resumption of an interrupted run.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = CompanyDetails.objects.create(name="Acme", email="acme@example.com")
+        cls.other = CompanyDetails.objects.create(name="Beta", email="beta@example.com")
+        for line in ("1 Main St", "2 Side St", "3 Back St"):
+            CompanyAddress.objects.create(
+                company=cls.company, address_line1=line, city="Makati", state="NCR", postal_code="1200", country="PH"
+            )
+        user = UserDetails.objects.create(company=cls.company, email="user@acme.example.com")
+        other_user = UserDetails.objects.create(company=cls.other, email="user@beta.example.com")
+        group = AccessGroups.objects.create(name="acme", unique_id="acme", company=cls.company)
+        other_group = AccessGroups.objects.create(name="beta", unique_id="beta", company=cls.other)
+        inherited = UserGroupAccess.objects.create(user=user, group=group, company=cls.company, unique_id="acme-user")
+        cls.inheriting = UserGroupAccess.objects.create(
+            user=other_user, group=other_group, company=cls.other, group_inherit=inherited, unique_id="beta-user"
+        )
+
+    def _assert_deleted(self):
+        self.assertFalse(CompanyDetails.objects.filter(pk=self.company.pk).exists())
+        self.assertFalse(CompanyAddress.objects.filter(company_id=self.company.pk).exists())
+        self.assertFalse(UserDetails.objects.filter(company_id=self.company.pk).exists())
+        self.assertFalse(AccessGroups.objects.filter(company_id=self.company.pk).exists())
+        # The access of the other company survives without the inherited group
+        self.inheriting.refresh_from_db()
+        self.assertIsNone(self.inheriting.group_inherit_id)
+        self.assertTrue(CompanyDetails.objects.filter(pk=self.other.pk).exists())
+
+    def test_deletes_the_company_and_its_dependents(self):
+        result = ChunkedCompanyDeletion([self.company.pk], chunk_size=2).execute()
+        self._assert_deleted()
+        self.assertEqual(result["deleted"]["company.CompanyAddress"], 3)
+        self.assertEqual(result["deleted"]["company.CompanyDetails"], 1)
+
+    def test_interrupted_deletion_resumes_with_the_rows_left(self):
+        deletion = ChunkedCompanyDeletion([self.company.pk], chunk_size=1)
+        in_chunks, chunks = deletion._in_chunks, []
+
+        def interrupted(queryset, apply):
+            def apply_chunk(pks):
+                if len(chunks) == 3:
+                    raise RuntimeError("Worker stopped")
+                chunks.append(pks)
+                apply(pks)
+            in_chunks(queryset, apply_chunk)
+
+        deletion._in_chunks = interrupted
+        with self.assertRaises(RuntimeError):
+            deletion.execute()
+        self.assertTrue(CompanyDetails.objects.filter(pk=self.company.pk).exists())
+        ChunkedCompanyDeletion([self.company.pk]).execute()
+        self._assert_deleted()
+
+class DeleteCompanyTests(TestCase):
+    """
+    Scheduling a company deletion, and refusing it while protected rows reference the company.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_admin("deleter", can_view=True, can_delete=True)
+        cls.company = CompanyDetails.objects.create(name="Acme", email="acme@example.com")
+
+    def setUp(self):
+        permission_engine.rebuild(bump_permissions_version())
+
+    def _delete(self):
+        return DeleteCompany(admin_request(self.admin, {"id": self.company.pk})).delete()
+
+    def test_refused_deletion_leaves_the_company_as_it_was(self):
+        result = self._delete()
+        self.assertEqual(result["code"], 202)
+        self.company.refresh_from_db()
+        self.assertEqual((self.company.pending_deletion, self.company.is_active), (True, True))
+        with mock.patch.object(CascadePlan, "blocking", return_value=["billing.CompanyBilling"]):
+            with self.assertRaises(DeletionBlocked):
+                run_company_deletion(None, [self.company.pk])
+        self.company.refresh_from_db()
+        self.assertEqual((self.company.pending_deletion, self.company.is_active), (False, True))
+
+    def test_protected_rows_are_reported_before_scheduling(self):
+        with mock.patch.object(CascadePlan, "blocking", return_value=["billing.CompanyBilling"]):
+            result = self._delete()
+        self.assertEqual(result["code"], 409)
+        self.assertEqual(result["data"]["blockedBy"], ["billing.CompanyBilling"])
+        self.assertFalse(CompanyDetails.objects.get(pk=self.company.pk).pending_deletion)
+        self.assertFalse(BackgroundJob.objects.exists())
+
+class UpdateCompanyRecordsTests(TestCase):
+    """
+    Partial updates write only the changed columns and honour If-Match and updatedAt.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = CompanyDetails.objects.create(name="Acme", email="acme@example.com")
+        CompanyAddress.objects.create(
+            company=cls.company, address_line1="1 Main St", city="Makati", state="NCR", postal_code="1200", country="PH"
+        )
+        CompanyBankAccount.objects.create(company=cls.company, account_number="1", account_name="Acme", bank_name="Bank")
+
+    def _update(self, details=None, address=None, **preconditions):
+        return UpdateCompanyRecords(self.company.pk, details, address, None, **preconditions).update()
+
+    def test_identical_values_are_not_written(self):
+        # Existence check, the three locked rows and the version, inside a savepoint; the version
+        # read for the preconditions is returned as is
+        with self.assertNumQueries(7), CaptureQueriesContext(connection) as queries:
+            result = self._update({"companyName": "Acme", "email": "acme@example.com"}, {"city": "Makati"})
+        self.assertEqual(result["code"], 200)
+        self.assertEqual(result["data"]["changed"], {})
+        self.assertFalse([query for query in queries.captured_queries if query["sql"].startswith("UPDATE")])
+
+    def test_only_changed_columns_are_written(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = self._update({"companyName": "Acme", "phone": "555"}, {"city": "Taguig", "country": "PH"})
+        self.assertEqual(result["data"]["changed"], {"details": ["phone"], "address": ["city"]})
+        updates = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 2)
+        company_update = next(sql for sql in updates if "company_details" in sql)
+        self.assertIn('"phone"', company_update)
+        self.assertNotIn('"name"', company_update)
+        address_update = next(sql for sql in updates if "company_address" in sql)
+        self.assertIn('"city"', address_update)
+        self.assertNotIn('"country"', address_update)
+
+    def test_stale_if_match_is_refused_with_the_current_etag(self):
+        current = company_version(self.company.pk)
+        result = self._update({"companyName": "Renamed"}, if_match=f'"{self.company.pk}-1"')
+        self.assertEqual(result["code"], 412)
+        self.assertEqual(result["data"]["etag"], current["etag"])
+        self.assertEqual(CompanyDetails.objects.get(pk=self.company.pk).name, "Acme")
+
+    def test_stale_updated_at_is_refused_with_the_current_etag(self):
+        current = company_version(self.company.pk)
+        result = self._update({"companyName": "Renamed"}, updated_at="2000-01-01T00:00:00Z")
+        self.assertEqual(result["code"], 412)
+        self.assertEqual(result["data"]["etag"], current["etag"])
+        self.assertEqual(CompanyDetails.objects.get(pk=self.company.pk).name, "Acme")
+
+    def test_current_if_match_updates_and_returns_the_new_etag(self):
+        current = company_version(self.company.pk)
+        result = self._update({"companyName": "Renamed"}, if_match=current["etag"], updated_at=current["updatedAt"].isoformat())
+        self.assertEqual(result["code"], 200)
+        self.assertNotEqual(result["data"]["etag"], current["etag"])
+        self.assertEqual(result["data"]["etag"], company_version(self.company.pk)["etag"])
+
+class ImportCompanyRecordsTests(TestCase):
+    """
+    Imports of the NDJSON and CSV fixtures, each holding two valid rows, one invalid row and one
+    row referencing an unknown partner.
+    """
+    def _import(self, name, import_format, batch_size=None):
+        return ImportCompanyRecords(os.path.join(FIXTURES, name), import_format, batch_size=batch_size).execute()
+
+    def _assert_imported(self, report, errors):
+        self.assertEqual((report["total"], report["created"], report["failed"]), (4, 2, 2))
+        self.assertEqual(report["errors"], errors)
+        self.assertEqual(list(CompanyDetails.objects.values_list("name", flat=True)), ["Acme Corp", "Gamma Ltd"])
+        self.assertEqual(
+            sorted(CompanyAddress.objects.values_list("company__name", "city")), [("Acme Corp", "Makati"), ("Gamma Ltd", "Taguig")]
+        )
+        self.assertEqual(CompanyBankAccount.objects.count(), 2)
+
+    def test_ndjson_rows_are_written_in_bulk(self):
+        with CaptureQueriesContext(connection) as queries:
+            report = self._import("companies.ndjson", "ndjson")
+        self._assert_imported(report, [
+            {"row": 2, "message": "details: Validation failed for field: phone"},
+            {"row": 3, "message": "details: Affiliated partner 999999 not found"},
+        ])
+        inserts = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("INSERT")]
+        # One bulk INSERT per table for the whole chunk
+        self.assertEqual(len(inserts), 3)
+
+    def test_csv_cells_are_converted_to_the_scaffold_types(self):
+        report = self._import("companies.csv", "csv")
+        self._assert_imported(report, [
+            {"row": 2, "message": "Invalid type for field: affiliatedPartner"},
+            {"row": 3, "message": "details: Affiliated partner 999999 not found"},
+        ])
+        payload, error = _payload_from_csv({"companyName": "Acme", "affiliatedPartner": "7", "website": " "})
+        self.assertIsNone(error)
+        self.assertEqual(payload["details"], {"companyName": "Acme", "affiliatedPartner": 7})
+
+    def test_failed_bulk_write_is_retried_row_by_row(self):
+        with mock.patch.object(CompanyAddress.objects, "bulk_create", side_effect=DatabaseError("bulk insert failed")):
+            report = self._import("companies.ndjson", "ndjson", batch_size=10)
+        # The companies of the failed bulk write were rolled back and written again one by one
+        self._assert_imported(report, [
+            {"row": 2, "message": "details: Validation failed for field: phone"},
+            {"row": 3, "message": "details: Affiliated partner 999999 not found"},
+        ])
+
+class SetCompanyActiveTests(TestCase):
+    """
+    Archiving and restoring companies with a single UPDATE, reporting unchanged and unknown ids.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.active = CompanyDetails.objects.create(name="Acme", email="acme@example.com")
+        cls.archived = CompanyDetails.objects.create(name="Beta", email="beta@example.com", is_active=False)
+        cls.hidden = CompanyDetails.objects.create(name="Gamma", email="gamma@example.com")
+
+    def _archive(self, body):
+        # The caller cannot see 'hidden'
+        return SetCompanyActive(CompanyDetails.objects.exclude(pk=self.hidden.pk), body, is_active=False).execute()
+
+    def test_archives_with_a_single_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            result = self._archive({"ids": [self.active.pk, self.archived.pk]})
+        self.assertEqual(result["code"], 200)
+        updates = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("UPDATE")]
+        self.assertEqual(len(updates), 1)
+        # The visibility read and the UPDATE
+        self.assertEqual(len(queries.captured_queries), 2)
+        self.assertFalse(CompanyDetails.objects.filter(pk__in=[self.active.pk, self.archived.pk], is_active=True).exists())
+
+    def test_companies_already_archived_are_unchanged(self):
+        result = self._archive({"ids": [self.active.pk, self.archived.pk]})
+        self.assertEqual(result["data"], {"updated": 1, "unchanged": 1, "notFound": []})
+        result = self._archive({"ids": [self.active.pk, self.archived.pk]})
+        self.assertEqual(result["data"], {"updated": 0, "unchanged": 2, "notFound": []})
+
+    def test_invisible_and_missing_ids_are_not_found(self):
+        missing = self.hidden.pk + 100
+        result = self._archive({"ids": [self.active.pk, self.hidden.pk, missing]})
+        self.assertEqual(result["data"], {"updated": 1, "unchanged": 0, "notFound": [self.hidden.pk, missing]})
+        self.assertTrue(CompanyDetails.objects.get(pk=self.hidden.pk).is_active)
+        result = self._archive({"ids": [self.hidden.pk, missing]})
+        self.assertEqual(result["code"], 404)
+        self.assertEqual(result["data"]["notFound"], [self.hidden.pk, missing])
+
+    def test_restore_by_filter_counts_only_the_updated_rows(self):
+        body = {"filter": {"isActive": "false"}}
+        with self.assertNumQueries(1):
+            result = SetCompanyActive(CompanyDetails.objects.all(), body, is_active=True).execute()
+        self.assertEqual(result["data"], {"updated": 1, "unchanged": None, "notFound": []})
+        self.assertTrue(CompanyDetails.objects.get(pk=self.archived.pk).is_active)
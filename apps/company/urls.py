@@ -7,4 +7,5 @@ urlpatterns = [
     path('operations', views.CompanySCRUDView.as_view(), name='company_scrud'),
     path('operations/restore', views.CompanyRestoreView.as_view(), name='company_restore'),
     path('operations/archive', views.CompanyArchiveView.as_view(), name='company_archive'),
+    path('operations/import', views.CompanyImportView.as_view(), name='company_import'),
 ]
@@ -1,8 +1,9 @@
 
+from apps.utils.common.auth.admin_auth import AdminAuthMiddleware
 from apps.utils.common.auth.code_auth import CodeAuthView
 from apps.utils.common.response.response_builder import BuildResponse
 from apps.utils.common.use_case.use_case import UseCase
-from apps.utils.logic.commands import DataLoaderCommand, LoadAppObjectsCommand
+from apps.utils.logic.commands import BackgroundJobStatusCommand, DataLoaderCommand, LoadAppObjectsCommand
 
 # Create your views here.
 class DataLoaderView(CodeAuthView):
@@ -16,3 +17,9 @@ class LoadAppObjects(CodeAuthView):
         execute_use_case = UseCase(LoadAppObjectsCommand(request))
         result = execute_use_case.execute()
         return BuildResponse(result).post_response()
+
+class BackgroundJobStatusView(AdminAuthMiddleware):
+    def get(self, request):
+        execute_use_case = UseCase(BackgroundJobStatusCommand(request))
+        result = execute_use_case.execute()
+        return BuildResponse(result).get_response()
@@ -1,6 +1,30 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_migrate
+
+
+def sync_app_objects(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    from apps.access.models import AccessObjects
+    from apps.utils.logic.services.load_app_objects import LoadAppObjects
+    # The apps ship no migrations, so on a fresh database the table may not exist yet
+    if AccessObjects._meta.db_table not in connections[using].introspection.table_names():
+        return
+    LoadAppObjects(using=using).execute()
 
 
 class UtilsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.utils'
+
+    def ready(self):
+        from apps.utils import checks
+        from apps.utils.common.logger.logger import PortalLogger
+        # System checks do not run under the application server, so production workers log it as well
+        local_aliases = checks.process_local_cache_aliases()
+        if local_aliases and not settings.DEBUG:
+            PortalLogger("UTILS").warning(
+                f"Caches {local_aliases} are per-process: permission and company cache changes are not shared between workers."
+            )
+        # Keep AccessObjects in step with the installed models after every migrate
+        post_migrate.connect(sync_app_objects, sender=self)
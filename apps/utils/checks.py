@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends keeping their data in the memory of a single process
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+def shared_cache_aliases():
+    """
+    Cache aliases holding state that every worker process must see.
+    """
+    aliases = {"default", getattr(settings, "COMPANY_CACHE_ALIAS", "default")}
+    if getattr(settings, "LOGIN_FAILURE_COUNTER_BACKEND", "cache") != "memory":
+        aliases.add(getattr(settings, "LOGIN_FAILURE_CACHE_ALIAS", "default"))
+    return sorted(aliases)
+
+def process_local_cache_aliases():
+    """
+    The shared cache aliases configured with a backend that is not shared between processes.
+    """
+    caches = getattr(settings, "CACHES", {})
+    return [
+        alias for alias in shared_cache_aliases()
+        if caches.get(alias, {}).get("BACKEND", PROCESS_LOCAL_CACHE_BACKENDS[0]) in PROCESS_LOCAL_CACHE_BACKENDS
+    ]
+
+@register(Tags.caches)
+def check_shared_caches(app_configs, **kwargs):
+    """
+    Warn when the permissions version, the company cache or the failed login counts live in a
+    per-process cache: changes made through one worker would never reach the others.
+    """
+    return [
+        Warning(
+            f"Cache '{alias}' uses a per-process backend, changes to permissions, cached companies and failed login counts are not seen by other workers.",
+            hint="Point CACHES (DJANGO_CACHE_BACKEND / DJANGO_CACHE_LOCATION) at a shared backend such as Redis, or run a single worker.",
+            id="utils.W001",
+        )
+        for alias in process_local_cache_aliases()
+    ]
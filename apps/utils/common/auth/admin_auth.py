@@ -3,8 +3,10 @@ import traceback
 import sys
 from django.views import View
 from apps.utils.common.logger.logger import PortalLogger
+from apps.access.common.permissions.claims import PERMISSIONS_VERSION_CLAIM
 from apps.utils.common.response.response_builder import BuildResponse
 from apps.authentication.common.jwt import JWTService
+from apps.utils.common.auth.principal import RequestPrincipal
 from django.conf import settings
 
 logger = PortalLogger(__name__)
@@ -14,10 +16,10 @@ class AdminAuthMiddleware(View):
         """
         Middleware to handle admin authentication.
         This middleware checks if the user is authenticated as an admin before processing the request.
+        On success the decoded claims are attached to the request as 'request.principal'.
         """
         try:
             auth_header = request.META.get('HTTP_AUTHORIZATION', '')
-            logger.info(f"Token value is {auth_header}")
             if not auth_header.startswith('Bearer '):
                 logger.error("Missing or invalid Authorization header")
                 return self._fetch_appropriate_response({
@@ -28,10 +30,8 @@ class AdminAuthMiddleware(View):
                 }, request.method)
             
             token = auth_header.split(' ')[1]
-            logger.info(f"Token value is {token}")
 
             payload = JWTService().decode_jwt_for_user_token(token)
-            logger.info(f"Decoded payload is {payload}")
             if payload.get("status") == "error":
                 return self._fetch_appropriate_response({
                     "code": 401,
@@ -39,7 +39,9 @@ class AdminAuthMiddleware(View):
                     "message": payload["message"],
                     "data": None
                 }, request.method)
-            logger.info(f"Payload is {payload}")
+            request.principal = RequestPrincipal(payload["data"], connect_key="admin")
+            # Only the subject and the permissions version, tokens and claims stay out of the logs
+            logger.info(f"Authenticated {request.principal} pv={request.principal.claims.get(PERMISSIONS_VERSION_CLAIM)}")
             return super().dispatch(request, *args, **kwargs)
         except Exception as e:
             logger.error(f"An error occurred during authentication: {e} (Line: {sys.exc_info()[-1].tb_lineno})")
@@ -0,0 +1,99 @@
+
+from functools import cached_property
+from apps.administration.models import AdministratorUserDetails
+from apps.user.models import UserDetails
+from apps.company.models import CompanyDetails
+from apps.access.common.inheritance.group_closure import group_closure
+from apps.access.common.permissions.claims import PERMISSIONS_CLAIM, PermissionClaims
+from apps.utils.common.logger.logger import PortalLogger
+
+logger = PortalLogger("REQUEST_PRINCIPAL")
+
+OWNER_MODELS = {
+    "admin": AdministratorUserDetails,
+    "user": UserDetails,
+}
+
+class RequestPrincipal:
+    """
+    Request-scoped view of the authenticated caller.
+    The principal is built once by the authentication middleware from the decoded token claims
+    and attached to the request as 'request.principal'.
+    The owner row, the company and the access groups are loaded lazily and memoized, so each of
+    them hits the database at most once per request and only when something actually reads it.
+    Usage:
+        principal = request.principal
+        principal.user_id
+        principal.company_id
+        principal.owner          # AdministratorUserDetails or UserDetails
+        principal.company        # CompanyDetails
+        principal.access_groups  # list of AccessGroups
+        principal.permissions    # {access object id: permission bitmask}
+    Attributes:
+        claims (dict): The decoded token claims.
+        connect_key (str): Either 'admin' or 'user', selects the owner model.
+    """
+    def __init__(self, claims, connect_key="admin"):
+        self.claims = claims or {}
+        self.connect_key = connect_key
+
+    @property
+    def user_id(self):
+        return self.claims.get("user_id")
+
+    @property
+    def company_id(self):
+        return self.claims.get("company_id")
+
+    @cached_property
+    def owner(self):
+        """
+        The AdministratorUserDetails or UserDetails row of the caller, or None if it does not exist.
+        """
+        owner_model = OWNER_MODELS.get(self.connect_key)
+        if not owner_model or self.user_id is None:
+            return None
+        return owner_model.objects.filter(id=self.user_id).first()
+
+    @cached_property
+    def company(self):
+        """
+        The CompanyDetails row of the caller's company, or None for principals without a company.
+        """
+        if self.company_id is None:
+            return None
+        return CompanyDetails.objects.filter(id=self.company_id).first()
+
+    @cached_property
+    def access_groups(self):
+        """
+        The active access groups of the caller, including the groups inherited through group_inherit.
+        """
+        if self.user_id is None:
+            return []
+        return list(group_closure.effective_groups(self.connect_key, self.user_id))
+
+    @property
+    def access_group_ids(self):
+        return [group.id for group in self.access_groups]
+
+    @cached_property
+    def permissions(self):
+        """
+        The permission bitmasks per AccessObjects id.
+        Taken from the token claims when they are current, otherwise re-derived from the database.
+        """
+        return PermissionClaims(self.connect_key).resolve(self.claims)
+
+    @property
+    def has_permission_claims(self):
+        """
+        Whether the access token embeds permission claims, see PermissionEngine.can.
+        """
+        return PERMISSIONS_CLAIM in self.claims
+
+    def has_permission(self, object_id, action):
+        return PermissionClaims.allows(self.permissions, object_id, action)
+
+    def __repr__(self):
+        return f"RequestPrincipal({self.connect_key}={self.user_id}, company={self.company_id})"
@@ -0,0 +1,142 @@
+import codecs
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+class FixtureFormatError(ValueError):
+    """
+    Raised when a fixture file is neither a JSON array nor NDJSON, or is truncated.
+    """
+
+class FixtureReader:
+    """
+    Incremental reader for DataLoader fixture files.
+    Yields one {"object", "action", "data"} entry at a time, so memory stays constant regardless
+    of the size of the file. Two formats are accepted and detected from the first character:
+    - a top-level JSON array of entries, parsed chunk by chunk with JSONDecoder.raw_decode
+    - NDJSON, one entry per line; blank lines are skipped
+    'offset' is the byte offset right after the last yielded entry; a reader created with that
+    'start_offset' continues with the next entry, which is what checkpointed loads resume from.
+    Usage:
+        reader = FixtureReader("apps/administration/data/superadmin.json")
+        for entry in reader:
+            ...
+            checkpoint = reader.offset
+    Attributes:
+        path (str): Path of the fixture file.
+        chunk_size (int): Number of bytes read at a time.
+        start_offset (int): Byte offset to start reading from, 0 or an earlier 'offset'.
+    """
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, start_offset=0):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.start_offset = start_offset
+        self.offset = start_offset
+        self.format = None
+        self._decoder = json.JSONDecoder()
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            self.format, content_start = self._detect_format(f)
+            if self.format is None:
+                return
+            # Never hand the byte order mark to the parser
+            self.offset = max(self.start_offset, content_start)
+            f.seek(self.offset)
+            if self.format == "ndjson":
+                yield from self._iter_ndjson(f)
+            else:
+                yield from self._iter_array(f, resume=self.offset > content_start)
+
+    def _detect_format(self, f):
+        content_start = len(codecs.BOM_UTF8) if f.read(len(codecs.BOM_UTF8)) == codecs.BOM_UTF8 else 0
+        f.seek(content_start)
+        while True:
+            chunk = f.read(self.chunk_size)
+            if not chunk:
+                return None, content_start
+            stripped = chunk.lstrip()
+            if stripped:
+                return ("array" if stripped[:1] == b"[" else "ndjson"), content_start
+
+    def _iter_ndjson(self, f):
+        for line in f:
+            offset = self.offset + len(line)
+            line = line.strip()
+            if line:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise FixtureFormatError(f"{self.path}: invalid JSON at byte {self.offset}: {e}")
+                self.offset = offset
+                yield entry
+            else:
+                self.offset = offset
+
+    def _iter_array(self, f, resume=False):
+        """
+        Parse the array with a small state machine over a sliding text buffer.
+        'expect' is what may come next: the opening bracket, the first value, a value, a separator
+        or the end of the file. Text before 'mark' has been consumed and counted in bytes; it is
+        dropped from the buffer whenever more data is read.
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        buffer, position, mark, eof = "", 0, 0, False
+        expect = "separator" if resume else "open"
+
+        while True:
+            # Skip whitespace, refilling the buffer when it runs dry
+            while True:
+                while position < len(buffer) and buffer[position] in " \t\r\n":
+                    position += 1
+                if position < len(buffer) or eof:
+                    break
+                buffer, position, mark, eof = self._refill(f, decoder, buffer, position, mark)
+
+            if position >= len(buffer):
+                if expect == "end":
+                    return
+                raise FixtureFormatError(f"{self.path}: unexpected end of file, the JSON array is not closed.")
+
+            char = buffer[position]
+            if expect == "open":
+                if char != "[":
+                    raise FixtureFormatError(f"{self.path}: expected '[' at the start of the file.")
+                position, expect = position + 1, "first"
+            elif expect == "separator":
+                if char == ",":
+                    position, expect = position + 1, "value"
+                elif char == "]":
+                    position, expect = position + 1, "end"
+                else:
+                    raise FixtureFormatError(f"{self.path}: expected ',' or ']' at byte {self.offset}.")
+            elif expect == "end":
+                raise FixtureFormatError(f"{self.path}: unexpected data after the end of the JSON array.")
+            elif expect == "first" and char == "]":
+                position, expect = position + 1, "end"
+            else:
+                try:
+                    entry, end = self._decoder.raw_decode(buffer, position)
+                    # A value ending exactly at the end of the buffer may be cut short, e.g. a number
+                    complete = end < len(buffer) or eof
+                except json.JSONDecodeError as e:
+                    if eof:
+                        raise FixtureFormatError(f"{self.path}: invalid JSON at byte {self.offset}: {e}")
+                    complete = False
+                if not complete:
+                    buffer, position, mark, eof = self._refill(f, decoder, buffer, position, mark)
+                    continue
+                self.offset += len(buffer[mark:end].encode("utf-8"))
+                position, mark, expect = end, end, "separator"
+                yield entry
+                continue
+
+            # Account for the consumed punctuation and whitespace
+            self.offset += len(buffer[mark:position].encode("utf-8"))
+            mark = position
+
+    def _refill(self, f, decoder, buffer, position, mark):
+        chunk = f.read(self.chunk_size)
+        eof = not chunk
+        buffer = buffer[mark:] + decoder.decode(chunk, final=eof)
+        return buffer, position - mark, 0, eof
@@ -0,0 +1,96 @@
+import base64
+import binascii
+import json
+from django.db.models import Q
+
+class CursorError(ValueError):
+    """
+    Raised for a cursor that was not produced by encode_cursor or does not fit the ordering.
+    """
+
+def encode_cursor(values):
+    """
+    Opaque, URL safe token for the sort key values of the last row of a page.
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(token, size):
+    """
+    Sort key values of a cursor made by encode_cursor.
+    :raises CursorError: When the token is malformed or does not hold 'size' values.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw.decode("utf-8"))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorError("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != size:
+        raise CursorError("Invalid cursor.")
+    return values
+
+class KeysetPage:
+    """
+    Keyset (seek) pagination ordered by a nullable column and then the primary key, NULLs last.
+    Instead of an OFFSET, every page continues after the sort key of the last row of the previous
+    page. The rows with a value are read with a sargable lower bound on (column, pk), so with an
+    index on (column, pk) the database starts the index range at the cursor and each page costs
+    the same however deep it is. The rows without a value are read in a second query, ordered by
+    primary key, only once the rows with a value no longer fill the page; a cursor inside that tail
+    reads only the tail.
+    Usage:
+        page = KeysetPage("name", limit=25)
+        rows, next_cursor = page.fetch(queryset, request.GET.get("cursor"))
+    Attributes:
+        field (str): Column the rows are ordered by, the primary key breaks ties.
+        limit (int): Rows per page.
+    """
+    def __init__(self, field, limit):
+        self.field = field
+        self.limit = limit
+
+    def valued(self, queryset, value=None, pk=None):
+        """
+        Rows with a value that sort after (value, pk), or all of them without a cursor.
+        """
+        if value is None:
+            queryset = queryset.filter(**{f"{self.field}__isnull": False})
+        else:
+            # The >= bound alone is what lets the database seek into the (column, pk) index
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__gte": value})
+                & (Q(**{f"{self.field}__gt": value}) | Q(**{self.field: value, "pk__gt": pk}))
+            )
+        return queryset.order_by(self.field, "pk")
+
+    def nulls(self, queryset, pk=None):
+        """
+        Rows without a value, after the primary key 'pk' when given.
+        """
+        queryset = queryset.filter(**{f"{self.field}__isnull": True})
+        if pk is not None:
+            queryset = queryset.filter(pk__gt=pk)
+        return queryset.order_by("pk")
+
+    def fetch(self, queryset, cursor=None):
+        """
+        Evaluate one page of the queryset, reading a single extra row to know whether more follow.
+        :return: (rows, next cursor or None on the last page)
+        :raises CursorError: For an invalid cursor.
+        """
+        value, pk = None, None
+        if cursor:
+            value, pk = decode_cursor(cursor, 2)
+            if not isinstance(pk, int) or isinstance(pk, bool):
+                raise CursorError("Invalid cursor.")
+        if cursor and value is None:
+            rows = list(self.nulls(queryset, pk)[:self.limit + 1])
+        else:
+            rows = list(self.valued(queryset, value, pk)[:self.limit + 1])
+            if len(rows) <= self.limit:
+                rows += list(self.nulls(queryset)[:self.limit + 1 - len(rows)])
+        if len(rows) <= self.limit:
+            return rows, None
+        rows = rows[:self.limit]
+        last = rows[-1]
+        return rows, encode_cursor([getattr(last, self.field), last.pk])
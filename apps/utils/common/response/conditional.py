@@ -0,0 +1,23 @@
+from django.utils.http import parse_etags, parse_http_date_safe
+
+def _weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+def is_not_modified(request, etag=None, last_modified=None):
+    """
+    Whether a conditional GET can be answered with 304 Not Modified.
+    If-None-Match is compared with the weak comparison of RFC 9110 and, when present, takes
+    precedence over If-Modified-Since, which is compared with the second precision of HTTP dates.
+    :param etag: The quoted ETag of the current representation, None when it has none.
+    :param last_modified: The aware datetime of the last change, None when it has none.
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        if etag is None:
+            return False
+        tags = parse_etags(if_none_match)
+        return "*" in tags or _weak(etag) in {_weak(tag) for tag in tags}
+    if_modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    if if_modified_since is None or last_modified is None:
+        return False
+    return int(last_modified.timestamp()) <= if_modified_since
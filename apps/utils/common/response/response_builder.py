@@ -1,4 +1,5 @@
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date
 from django.conf import settings
 from http import HTTPStatus
 
@@ -59,6 +60,9 @@ HTTP_STATUS_CODES = {
     505: {"status": HTTPStatus.HTTP_VERSION_NOT_SUPPORTED, "message": "HTTP Version Not Supported"},
 }
 
+ALLOWED_HEADERS = "Content-Type,X-Auth-Token,Origin,Authorization,Cookie,If-Match,If-None-Match,If-Modified-Since"
+EXPOSED_HEADERS = "ETag,Last-Modified"
+
 class BuildResponse:
     """
     A class to build HTTP responses with CORS headers and standardized status codes.
@@ -70,12 +74,16 @@ class BuildResponse:
     The class can be initialized with a result dictionary that contains the response details.
     It provides methods to generate responses for different HTTP methods and an OPTIONS handler.
     Usage of this class allows for consistent response formatting across the application.
+    The result may also carry cache validators, emitted as headers and exposed to the client:
+    'etag' (quoted ETag), 'last_modified' (aware datetime) and 'headers' (further headers).
+    A result with code 304 is answered without a body, as HTTP requires.
     Example:
     response_builder = BuildResponse(result={
         'code': 200,
         'status': 'success',
         'message': 'Request was successful',
-        'data': {'key': 'value'}
+        'data': {'key': 'value'},
+        'etag': '"1-1700000000000000"',
     })
     """
     def __init__(self, result=None):
@@ -83,6 +91,9 @@ class BuildResponse:
         self.status = result.get('status')
         self.message = result.get('message')
         self.data = result.get('data', [])
+        self.etag = result.get('etag')
+        self.last_modified = result.get('last_modified')
+        self.headers = result.get('headers') or {}
     
     def _build_response_body(self):
         return {
@@ -94,34 +105,46 @@ class BuildResponse:
     def _set_cors_headers(self, response, method):
         response['Access-Control-Allow-Origin'] = settings.CLIENT_SERVICE_URL
         response["Access-Control-Allow-Methods"] = method
-        response["Access-Control-Allow-Headers"] = "Content-Type,X-Auth-Token,Origin,Authorization,Cookie"
+        response["Access-Control-Allow-Headers"] = ALLOWED_HEADERS
+        response["Access-Control-Expose-Headers"] = EXPOSED_HEADERS
         response["Access-Control-Allow-Credentials"] = "true"
         return response
 
+    def _set_validator_headers(self, response):
+        if self.etag:
+            response["ETag"] = self.etag
+        if self.last_modified:
+            response["Last-Modified"] = http_date(self.last_modified.timestamp())
+        if self.etag or self.last_modified:
+            # Clients may keep the representation but have to revalidate it on every use
+            response["Cache-Control"] = "private, no-cache"
+        for key, value in self.headers.items():
+            response[key] = value
+        return response
+
+    def _build_response(self, method):
+        if self.code == 304:
+            response = HttpResponseNotModified()
+        else:
+            status_code = HTTP_STATUS_CODES.get(self.code, HTTPStatus.OK)["status"]
+            response = JsonResponse(self._build_response_body(), status=status_code, safe=False)
+        self._set_validator_headers(response)
+        return self._set_cors_headers(response, method)
+
     def get_response(self):
-        status_code = HTTP_STATUS_CODES.get(self.code, HTTPStatus.OK)["status"]
-        response = JsonResponse(self._build_response_body(), status=status_code, safe=False)
-        return self._set_cors_headers(response, "GET")
+        return self._build_response("GET")
 
     def post_response(self):
-        status_code = HTTP_STATUS_CODES.get(self.code, HTTPStatus.OK)["status"]
-        response = JsonResponse(self._build_response_body(), status=status_code, safe=False)
-        return self._set_cors_headers(response, "POST")
+        return self._build_response("POST")
     
     def put_response(self):
-        status_code = HTTP_STATUS_CODES.get(self.code, HTTPStatus.OK)["status"]
-        response = JsonResponse(self._build_response_body(), status=status_code, safe=False)
-        return self._set_cors_headers(response, "PUT")
+        return self._build_response("PUT")
 
     def patch_response(self):
-        status_code = HTTP_STATUS_CODES.get(self.code, HTTPStatus.OK)["status"]
-        response = JsonResponse(self._build_response_body(), status=status_code, safe=False)
-        return self._set_cors_headers(response, "PATCH")
+        return self._build_response("PATCH")
 
     def delete_response(self):
-        status_code = HTTP_STATUS_CODES.get(self.code, HTTPStatus.OK)["status"]
-        response = JsonResponse(self._build_response_body(), status=status_code, safe=False)
-        return self._set_cors_headers(response, "DELETE")
+        return self._build_response("DELETE")
 
     @staticmethod
     def options_handler():
@@ -129,7 +152,7 @@ class BuildResponse:
         response['allow'] = 'get,post,put,delete,options'
         response['Access-Control-Allow-Origin'] = settings.CLIENT_SERVICE_URL
         response["Access-Control-Allow-Methods"] = 'POST'
-        response["Access-Control-Allow-Headers"] = "Content-Type,X-Auth-Token,Origin,Authorization,Cookie"
+        response["Access-Control-Allow-Headers"] = ALLOWED_HEADERS
         response["Access-Control-Allow-Credentials"] = "true"
         return response
     
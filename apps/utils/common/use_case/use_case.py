@@ -13,6 +13,7 @@ class UseCase:
     - 'status': Status of the operation (str)
     - 'message': A message describing the result (str)
     - 'data': The data returned by the command (list or dict)
+    Further keys, such as the 'etag' and 'last_modified' validators, are passed on to BuildResponse.
     If the response does not match this format, an error will be logged and a default error response will be returned.
     Usage:
         use_case = UseCase(SomeCommand(request))
@@ -35,14 +35,19 @@ class FieldSpecificValidationService:
     """
     Field-specific validation service for incoming data.
     This service validates data against specific field rules.
-    It includes methods for validating email, tax ID, phone numbers, and dates.
+    It includes methods for validating names, email, tax ID, phone numbers, and dates.
     Usage:
         validation_service = FieldSpecificValidationService()
+        is_valid_name = validation_service.name("Acme Corporation")
         is_valid_email = validation_service.email("test@example.com")
         is_valid_tax_id = validation_service.tax_id("123-456-789")
         is_valid_phone = validation_service.phone("09123456789")
         is_valid_date = validation_service.date("2023-01-01")
     """
+    def name(self, name):
+        """Validate a display name: not blank and at most 255 characters."""
+        return bool(name.strip()) and len(name) <= 255
+
     def email(self, email):
         """Validate email format."""
         pattern = r"^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$"
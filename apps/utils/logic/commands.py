@@ -1,5 +1,6 @@
 import json
 from apps.utils.logic.services.load_app_objects import LoadAppObjects
+from apps.utils.models import BackgroundJob
 from apps.utils.logic.services.data_loader import DataLoader
 
 class DataLoaderCommand():
@@ -18,7 +19,8 @@ class DataLoaderCommand():
         
         file_path = self.body.get('file_path', '')
         app_name = self.body.get('app_name', '')
-        data_loader = DataLoader(file_path=file_path, app_name=app_name)
+        force = bool(self.body.get('force', False))
+        data_loader = DataLoader(file_path=file_path, app_name=app_name, force=force)
         result = data_loader.execute()
         return result
 
@@ -29,4 +31,35 @@ class LoadAppObjectsCommand():
     def execute(self):
         data_loader = LoadAppObjects(request=self.request)
         result = data_loader.execute()
-        return result
\ No newline at end of file
+        return result
+
+class BackgroundJobStatusCommand():
+    def __init__(self, request):
+        self.request = request
+
+    def execute(self):
+        job_id = self.request.GET.get('id', '')
+        if not job_id.isdigit():
+            return {"code": 400, "status": "error", "message": "Job id is required", "data": None}
+        owner_id = self.request.principal.user_id
+        # Jobs are only visible to the principal that started them
+        job = BackgroundJob.objects.filter(pk=int(job_id), owner_id=owner_id).first()
+        if not job:
+            return {"code": 404, "status": "error", "message": "Job not found", "data": None}
+        return {
+            "code": 200,
+            "status": "success",
+            "message": "Job status retrieved successfully",
+            "data": {
+                "jobId": job.pk,
+                "jobType": job.job_type,
+                "status": job.status,
+                "processed": job.processed,
+                "total": job.total,
+                "result": job.result,
+                "error": job.error or None,
+                "createdAt": job.created_at,
+                "startedAt": job.started_at,
+                "finishedAt": job.finished_at,
+            }
+        }
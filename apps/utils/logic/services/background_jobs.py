@@ -0,0 +1,84 @@
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from apps.utils.common.logger.logger import PortalLogger
+from apps.utils.models import BackgroundJob
+
+logger = PortalLogger("BACKGROUND_JOBS")
+
+class JobContext:
+    """
+    Handed to a running job to report its progress.
+    Progress is written with a single UPDATE of the job row, at most every 'progress_every' items
+    unless forced, so reporting stays cheap for jobs processing many small items.
+    """
+    def __init__(self, job_id, progress_every=100):
+        self.job_id = job_id
+        self.progress_every = progress_every
+        self._reported = 0
+
+    def progress(self, processed, total=None, force=False):
+        if not force and processed - self._reported < self.progress_every:
+            return
+        self._reported = processed
+        values = {"processed": processed, "updated_at": timezone.now()}
+        if total is not None:
+            values["total"] = total
+        BackgroundJob.objects.filter(pk=self.job_id).update(**values)
+
+class BackgroundJobRunner:
+    """
+    Runs long operations off the request worker and records their state in BackgroundJob rows.
+    A job is a callable taking a JobContext followed by its arguments and returning a JSON
+    serializable result. submit() creates the job row and starts the job once the surrounding
+    transaction commits; the caller answers with the job id and the client polls the job status.
+    Jobs run on a bounded thread pool in this process, each thread with its own database
+    connection, which is closed when the job ends. A job interrupted by a restart of the process
+    stays 'running'.
+    Usage:
+        job = background_jobs.submit("company.import", import_companies, path, owner_id=principal.user_id)
+        ...
+        BackgroundJob.objects.get(pk=job.pk).status  # pending, running, succeeded or failed
+    Attributes:
+        max_workers (int): Number of jobs run concurrently, further jobs wait for a free worker.
+    """
+    def __init__(self, max_workers=2):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="background-job")
+        return self._executor
+
+    def submit(self, job_type, fn, *args, owner_id=None):
+        job = BackgroundJob.objects.create(job_type=job_type, owner_id=owner_id)
+        transaction.on_commit(lambda: self._get_executor().submit(self._run, job.pk, fn, args))
+        logger.info(f"Queued {job_type} job {job.pk}")
+        return job
+
+    def _run(self, job_id, fn, args):
+        try:
+            BackgroundJob.objects.filter(pk=job_id).update(status="running", started_at=timezone.now())
+            result = fn(JobContext(job_id), *args)
+            BackgroundJob.objects.filter(pk=job_id).update(status="succeeded", result=result, finished_at=timezone.now())
+            logger.info(f"Background job {job_id} succeeded")
+        except Exception as e:
+            logger.error(f"Background job {job_id} failed: {e} - {traceback.format_exc()}")
+            BackgroundJob.objects.filter(pk=job_id).update(status="failed", error=str(e), finished_at=timezone.now())
+        finally:
+            connections.close_all()
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+background_jobs = BackgroundJobRunner(max_workers=getattr(settings, "BACKGROUND_JOB_WORKERS", 2))
@@ -0,0 +1,288 @@
+from django.apps import apps
+from django.db import transaction
+from django.db.models.signals import post_save, pre_save
+from django.utils import timezone
+from apps.utils.common.logger import logger
+
+logger = logger.PortalLogger("BATCH_UPSERT")
+
+SUPPORTED_ACTIONS = ("create", "update")
+
+class EntryError(Exception):
+    """
+    Raised for a fixture entry that cannot be applied; the entry is reported and skipped.
+    """
+
+class ModelPlan:
+    """
+    Per-model metadata resolved once per run: the writable fields by name and attname, and
+    whether save signals have to be honoured.
+    """
+    def __init__(self, model):
+        self.model = model
+        self.label = f"{model._meta.app_label}.{model.__name__}"
+        self.fields = {}
+        for field in model._meta.concrete_fields:
+            if field.primary_key:
+                continue
+            self.fields[field.name] = field
+            self.fields[field.attname] = field
+        self.auto_now_fields = [field for field in model._meta.concrete_fields if getattr(field, "auto_now", False)]
+        # Models with save receivers (e.g. the access models) are written row by row so the receivers still run
+        self.has_signals = pre_save.has_listeners(model) or post_save.has_listeners(model)
+
+    def adapt(self, data):
+        """
+        Map the entry data to {attname: value} and collect the foreign key values to verify.
+        """
+        values, foreign_keys = {}, []
+        for key, value in data.items():
+            field = self.fields.get(key)
+            if field is None:
+                raise EntryError(f"{self.label} has no field '{key}'")
+            values[field.attname] = value
+            if field.is_relation and field.many_to_one and value is not None:
+                foreign_keys.append((field, value))
+        return values, foreign_keys
+
+class PendingEntry:
+    __slots__ = ("index", "object_path", "action", "pk", "values", "foreign_keys", "key")
+
+    def __init__(self, index, object_path, action, pk, values, foreign_keys, key=None):
+        self.key = key
+        self.index = index
+        self.object_path = object_path
+        self.action = action
+        self.pk = pk
+        self.values = values
+        self.foreign_keys = foreign_keys
+
+class BatchUpsertEngine:
+    """
+    Applies DataLoader entries in batches grouped by model instead of row by row.
+    Entries are buffered per model; once 'batch_size' entries are pending, every model group is
+    flushed in the order the models first appeared, inside one transaction per flush. Per group:
+    - foreign key values are verified with one query per related model
+    - the existing primary keys are read with one query
+    - new rows are inserted with bulk_create, existing rows written with bulk_update
+    When a bulk statement fails the group is retried row by row to pinpoint the failing entries.
+    Models with save signal receivers are always written row by row so the receivers run.
+    Usage:
+        engine = BatchUpsertEngine(batch_size=1000)
+        for entry in FixtureReader(path):
+            engine.add(entry)
+        engine.flush()
+        engine.results    # [{"object": "app.Model", "id": 1}, ...] in entry order
+        engine.errors     # [{"object": "app.Model", "id": 1, "error": "..."}, ...]
+        engine.summary()  # {"app.Model": {"created": 1, "updated": 0, "failed": 0}}
+    Attributes:
+        batch_size (int): Number of pending entries that triggers a flush.
+        on_flush (callable): Optional callback run with the engine inside the transaction of every
+            flush, after the batch was written; a checkpoint saved there commits with the batch.
+        keep_results (bool): Collect 'results'; long running loads that only need 'summary' turn it off.
+    """
+    def __init__(self, batch_size=1000, on_flush=None, keep_results=True):
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.keep_results = keep_results
+        self.results = []
+        self.errors = []
+        self.failed_keys = set()
+        self.stats = {}
+        self._plans = {}
+        self._batch_results = []
+        self._pending = {}
+        self._pending_count = 0
+        self._index = 0
+
+    def add(self, entry, key=None):
+        """
+        Buffer one {"object", "action", "data"} entry, flushing when the batch is full.
+        Entries without an object, action or data are ignored, as are unknown actions.
+        :param key: Optional caller key of the entry, collected in 'failed_keys' when the entry fails.
+        """
+        object_path = entry.get("object")
+        action = entry.get("action")
+        obj_data = entry.get("data")
+        if not (object_path and action and obj_data) or action not in SUPPORTED_ACTIONS:
+            return
+        index, self._index = self._index, self._index + 1
+        try:
+            plan = self._plan(object_path)
+            data = dict(obj_data)
+            pk = data.pop("id", None)
+            if action == "update" and not pk:
+                logger.error(f"ID not provided for update action on {object_path}")
+                self._result(index, object_path, None)
+                return
+            values, foreign_keys = plan.adapt(data)
+        except EntryError as e:
+            self._error(index, object_path, obj_data.get("id"), str(e), key)
+            return
+        self._pending.setdefault(plan, []).append(PendingEntry(index, object_path, action, pk, values, foreign_keys, key))
+        self._pending_count += 1
+        if self._pending_count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write every pending entry in a single transaction.
+        'on_flush' runs in that transaction too, even when nothing is pending.
+        """
+        pending, self._pending, self._pending_count = self._pending, {}, 0
+        if pending or self.on_flush:
+            with transaction.atomic():
+                for plan, entries in pending.items():
+                    self._flush_model(plan, entries)
+                if self.on_flush:
+                    self.on_flush(self)
+        if self.keep_results:
+            # Models are written group by group, report the results in entry order
+            self._batch_results.sort()
+            self.results.extend({"object": object_path, "id": pk} for _, object_path, pk in self._batch_results)
+        self._batch_results = []
+
+    def summary(self):
+        """
+        Per-model counts of created, updated and failed entries.
+        """
+        return dict(self.stats)
+
+    def _plan(self, object_path):
+        plan = self._plans.get(object_path)
+        if plan is None:
+            try:
+                app_label, model_name = object_path.split(".")
+                plan = ModelPlan(apps.get_model(app_label, model_name))
+            except (LookupError, ValueError) as e:
+                raise EntryError(f"Model not found for {object_path}: {e}")
+            self._plans[object_path] = plan
+        return plan
+
+    def _flush_model(self, plan, entries):
+        entries = self._verify_foreign_keys(plan, entries)
+        if not entries:
+            return
+        pks = {entry.pk for entry in entries if entry.pk}
+        existing = set(plan.model.objects.filter(pk__in=pks).values_list("pk", flat=True)) if pks else set()
+        # Rows created by an earlier entry of this flush exist by the time a later update is applied
+        applicable, created = [], set()
+        for entry in entries:
+            if entry.action == "update" and entry.pk not in existing and entry.pk not in created:
+                self._error(entry.index, entry.object_path, entry.pk, f"{plan.label} matching query does not exist for id {entry.pk}", entry.key)
+                continue
+            if entry.action == "create" and entry.pk:
+                created.add(entry.pk)
+            applicable.append(entry)
+        entries = applicable
+        if plan.has_signals:
+            self._write_rows(plan, entries, existing)
+            return
+        try:
+            with transaction.atomic():
+                self._write_bulk(plan, entries, existing)
+        except Exception as e:
+            logger.warning(f"Bulk write of {len(entries)} {plan.label} entries failed, retrying row by row: {e}")
+            self._write_rows(plan, entries, existing)
+
+    def _verify_foreign_keys(self, plan, entries):
+        """
+        Check every referenced row exists, with one query per related model.
+        Entries referencing a missing row are reported and dropped.
+        """
+        wanted = {}
+        for entry in entries:
+            for field, value in entry.foreign_keys:
+                wanted.setdefault(field, set()).add(value)
+        found = {}
+        for field, values in wanted.items():
+            target = field.target_field.attname
+            found[field] = set(
+                field.related_model._default_manager.filter(**{f"{target}__in": values}).values_list(target, flat=True)
+            )
+            if field.related_model is plan.model:
+                # Rows of the same batch are inserted in the same transaction
+                found[field] |= {entry.pk for entry in entries if entry.pk}
+        verified = []
+        for entry in entries:
+            missing = [field.name for field, value in entry.foreign_keys if value not in found[field]]
+            if missing:
+                self._error(entry.index, entry.object_path, entry.pk, f"Related rows not found for: {', '.join(missing)}", entry.key)
+            else:
+                verified.append(entry)
+        return verified
+
+    def _write_bulk(self, plan, entries, existing):
+        model = plan.model
+        creates, updates = {}, {}
+        for entry in entries:
+            if entry.pk in existing:
+                # A later entry for the same row wins, field by field
+                updates.setdefault(entry.pk, {}).update(entry.values)
+            elif entry.pk and entry.pk in creates:
+                # An update of a row created earlier in the batch is folded into its INSERT
+                creates[entry.pk].update(entry.values)
+            else:
+                creates[entry.pk or ("new", entry.index)] = dict(entry.values)
+
+        created = []
+        if creates:
+            instances = [
+                model(**values) if isinstance(key, tuple) else model(pk=key, **values)
+                for key, values in creates.items()
+            ]
+            created = model.objects.bulk_create(instances, batch_size=self.batch_size)
+        key_to_pk = {key: instance.pk for key, instance in zip(creates, created)}
+
+        now = timezone.now()
+        by_fields = {}
+        for pk, values in updates.items():
+            for field in plan.auto_now_fields:
+                values.setdefault(field.attname, now)
+            by_fields.setdefault(tuple(sorted(values)), []).append(model(pk=pk, **values))
+        for fields, instances in by_fields.items():
+            model.objects.bulk_update(instances, [plan.fields[field].name for field in fields], batch_size=self.batch_size)
+
+        stats = self.stats.setdefault(plan.label, {"created": 0, "updated": 0, "failed": 0})
+        stats["created"] += len(created)
+        stats["updated"] += len(updates)
+        for entry in entries:
+            pk = entry.pk if entry.pk else key_to_pk.get(("new", entry.index))
+            self._result(entry.index, entry.object_path, pk)
+
+    def _write_rows(self, plan, entries, existing):
+        """
+        Apply entries one by one, each in its own savepoint, with full save() semantics.
+        """
+        model = plan.model
+        stats = self.stats.setdefault(plan.label, {"created": 0, "updated": 0, "failed": 0})
+        for entry in entries:
+            try:
+                with transaction.atomic():
+                    if entry.pk in existing:
+                        obj = model.objects.get(pk=entry.pk)
+                        for field, value in entry.values.items():
+                            setattr(obj, field, value)
+                        obj.save()
+                        stats["updated"] += 1
+                    elif entry.action == "update":
+                        # The entry creating the row failed
+                        raise EntryError(f"{plan.label} matching query does not exist for id {entry.pk}")
+                    else:
+                        obj = model.objects.create(pk=entry.pk, **entry.values) if entry.pk else model.objects.create(**entry.values)
+                        existing.add(obj.pk)
+                        stats["created"] += 1
+                self._result(entry.index, entry.object_path, obj.pk)
+            except Exception as e:
+                self._error(entry.index, entry.object_path, entry.pk, str(e), entry.key)
+
+    def _result(self, index, object_path, pk):
+        self._batch_results.append((index, object_path, pk))
+
+    def _error(self, index, object_path, pk, message, key=None):
+        logger.error(f"Error saving {object_path}: {message}")
+        self.errors.append({"object": object_path, "id": pk, "error": message})
+        if key is not None:
+            self.failed_keys.add(key)
+        label = object_path if object_path not in self._plans else self._plans[object_path].label
+        self.stats.setdefault(label, {"created": 0, "updated": 0, "failed": 0})["failed"] += 1
@@ -0,0 +1,200 @@
+import os
+import queue
+import threading
+import time
+from django.conf import settings
+from apps.utils.common.fixtures.reader import FixtureReader
+from apps.utils.common.logger import logger
+from apps.utils.logic.services.batch_upsert import BatchUpsertEngine
+from apps.utils.logic.services.dependency_loader import dependency_levels, scan_fixture_models
+from apps.utils.logic.services.fixture_manifest import file_hash
+from apps.utils.models import DataLoaderCheckpoint
+
+logger = logger.PortalLogger("CHECKPOINTED_LOADER")
+
+END_OF_FILE = object()
+
+class CheckpointedLoader:
+    """
+    Loads fixture files one after the other in batches, persisting a (file, offset) checkpoint in
+    the transaction of every batch, so a load that is interrupted resumes after the last
+    committed batch instead of starting over.
+    Files are ordered by the dependency level of the models they contain (see dependency_levels);
+    within a file entries are applied in file order, so parents have to come before their children
+    as they do in the seed fixtures. A checkpoint is only honoured while the content hash of its
+    file is unchanged. Entries are parsed on a reader thread into a bounded queue while the batches
+    are written, and 'progress' is called after every batch with:
+        {"file", "rows", "rows_per_second", "queue_depth", "bytes_done", "bytes_total", "eta_seconds"}
+    Usage:
+        loader = CheckpointedLoader(files, batch_size=1000, manifest=manifest, progress=print)
+        loader.execute()
+        loader.report  # {"files": [...], "rows": 1000, "summary": {...}, "seconds": 1.2}
+    Attributes:
+        files (list): Fixture file paths.
+        batch_size (int): Entries per transaction, and so per checkpoint.
+        manifest (FixtureManifest): Optional manifest providing the content hashes of the files.
+        progress (callable): Optional callback receiving the progress dict after every batch.
+        restart (bool): Drop the checkpoints of the files and load them from the start.
+        queue_size (int): Maximum number of parsed entries waiting to be written.
+    """
+    def __init__(self, files, batch_size=1000, manifest=None, progress=None, restart=False, queue_size=None):
+        self.files = files
+        self.batch_size = batch_size
+        self.manifest = manifest
+        self.progress = progress
+        self.restart = restart
+        self.queue_size = queue_size or getattr(settings, "DATA_LOADER_QUEUE_SIZE", 10000)
+        self.errors = []
+        self.failed_keys = set()
+        self.report = {"files": [], "rows": 0, "summary": {}}
+        self._state = None
+
+    def execute(self):
+        started = time.perf_counter()
+        files = self._ordered_files()
+        hashes = {
+            file_path: self.manifest.file_hashes.get(file_path) if self.manifest else None
+            for file_path in files
+        }
+        hashes = {file_path: digest or file_hash(file_path) for file_path, digest in hashes.items()}
+        checkpoints = self._checkpoints(files, hashes)
+        self._state = {
+            "started": started,
+            "rows": 0,
+            "bytes_done": 0,
+            "bytes_total": sum(os.path.getsize(file_path) - checkpoints.get(file_path, (0, 0, False))[0] for file_path in files),
+        }
+        engine = BatchUpsertEngine(batch_size=self.batch_size, on_flush=self._checkpoint, keep_results=False)
+        for file_path in files:
+            offset, entries_loaded, has_failures = checkpoints.get(file_path, (0, 0, False))
+            if offset:
+                logger.info(f"Resuming {file_path} at byte {offset} after {entries_loaded} entries.")
+            if has_failures:
+                self.failed_keys.add((file_path, None))
+            self._load_file(engine, file_path, hashes[file_path], offset, entries_loaded)
+            self.report["files"].append(file_path)
+        self.errors = engine.errors
+        self.failed_keys |= engine.failed_keys
+        self.report["rows"] = self._state["rows"]
+        self.report["summary"] = engine.summary()
+        self.report["seconds"] = round(time.perf_counter() - started, 3)
+        return self.report
+
+    def clear_checkpoints(self):
+        """
+        Drop the checkpoints of the files once the load was recorded in the manifest.
+        """
+        DataLoaderCheckpoint.objects.filter(file_path__in=self.files).delete()
+
+    def _ordered_files(self):
+        models = scan_fixture_models(self.files)
+        levels, _ = dependency_levels(list(models))
+        level_of = {object_path: number for number, level in enumerate(levels) for object_path in level}
+        rank = {}
+        for object_path, files in models.items():
+            for file_path in files:
+                rank[file_path] = max(rank.get(file_path, 0), level_of[object_path])
+        return sorted(self.files, key=lambda file_path: rank.get(file_path, 0))
+
+    def _checkpoints(self, files, hashes):
+        if self.restart:
+            DataLoaderCheckpoint.objects.filter(file_path__in=files).delete()
+            return {}
+        checkpoints = {}
+        for checkpoint in DataLoaderCheckpoint.objects.filter(file_path__in=files):
+            if checkpoint.content_hash == hashes[checkpoint.file_path]:
+                checkpoints[checkpoint.file_path] = (checkpoint.offset, checkpoint.entries_loaded, checkpoint.has_failures)
+            else:
+                logger.info(f"{checkpoint.file_path} changed since its checkpoint, loading it from the start.")
+        return checkpoints
+
+    def _load_file(self, engine, file_path, content_hash, offset, entries_loaded):
+        state = self._state
+        state.update({
+            "file": file_path,
+            "content_hash": content_hash,
+            "offset": offset,
+            "committed_offset": offset,
+            "entries_loaded": entries_loaded,
+        })
+        entries = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        reader = threading.Thread(
+            target=self._read, args=(file_path, offset, entries, stop), name="data-loader-reader", daemon=True
+        )
+        reader.start()
+        state["queue"] = entries
+        try:
+            while True:
+                entry, offset = entries.get()
+                if entry is END_OF_FILE:
+                    break
+                if isinstance(entry, Exception):
+                    raise entry
+                state["offset"] = offset
+                state["entries_loaded"] += 1
+                state["rows"] += 1
+                engine.add(entry, key=(file_path, None))
+            # Commits the tail of the file together with its final checkpoint
+            engine.flush()
+        finally:
+            stop.set()
+            reader.join()
+
+    def _read(self, file_path, offset, entries, stop):
+        """
+        Parse the file on the reader thread, handing (entry, offset after the entry) pairs over.
+        """
+        reader = FixtureReader(file_path, start_offset=offset)
+        try:
+            for entry in reader:
+                if not self._put(entries, (entry, reader.offset), stop):
+                    return
+            self._put(entries, (END_OF_FILE, reader.offset), stop)
+        except Exception as e:
+            self._put(entries, (e, reader.offset), stop)
+
+    @staticmethod
+    def _put(entries, item, stop):
+        while not stop.is_set():
+            try:
+                entries.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _checkpoint(self, engine):
+        """
+        Runs inside the transaction of every batch: the checkpoint commits with the batch.
+        """
+        state = self._state
+        file_path = state["file"]
+        DataLoaderCheckpoint.objects.update_or_create(
+            file_path=file_path,
+            defaults={
+                "content_hash": state["content_hash"],
+                "offset": state["offset"],
+                "entries_loaded": state["entries_loaded"],
+                "has_failures": (file_path, None) in engine.failed_keys or (file_path, None) in self.failed_keys,
+            },
+        )
+        state["bytes_done"] += state["offset"] - state["committed_offset"]
+        state["committed_offset"] = state["offset"]
+        if self.progress:
+            self.progress(self._progress())
+
+    def _progress(self):
+        state = self._state
+        elapsed = max(time.perf_counter() - state["started"], 1e-9)
+        byte_rate = state["bytes_done"] / elapsed
+        remaining = state["bytes_total"] - state["bytes_done"]
+        return {
+            "file": state["file"],
+            "rows": state["rows"],
+            "rows_per_second": round(state["rows"] / elapsed, 1),
+            "queue_depth": state["queue"].qsize(),
+            "bytes_done": state["bytes_done"],
+            "bytes_total": state["bytes_total"],
+            "eta_seconds": round(remaining / byte_rate, 1) if byte_rate else None,
+        }
@@ -1,10 +1,13 @@
 from apps.utils.common.logger import logger
-from django.apps import apps
-import json
 import glob
 import os
+from django.conf import settings
+from apps.utils.logic.services.checkpointed_loader import CheckpointedLoader
+from apps.utils.logic.services.dependency_loader import DependencyOrderedLoader
+from apps.utils.logic.services.fixture_manifest import FixtureManifest
 
 logger = logger.PortalLogger("DATA_LOADER")
+DATA_FILE_EXTENSIONS = ('.json', '.ndjson', '.jsonl')
 
 class DataLoader:
     """
@@ -14,6 +17,8 @@ class DataLoader:
         <app_name>/
             data/
                 <data_file>.json
+    Data files are either a JSON array of entries or NDJSON (.ndjson / .jsonl), one entry per line.
+    Files are read incrementally, so memory does not grow with the size of a file.
     The class will look for the first JSON file in the data directory of the specified app.
     If no app is specified, it will look for the first JSON file in the data directory of any app.
     If no data files are found, it will raise a FileNotFoundError.
@@ -21,16 +26,36 @@ class DataLoader:
         data_loader = DataLoader(file_path='apps/utils/services/data', app_name='your_app_name')
         result = data_loader.execute()
     """
-    def __init__(self, file_path, app_name):
+    def __init__(self, file_path, app_name, batch_size=None, max_workers=None, force=False, track_entries=None,
+                 resumable=False, restart=False, progress=None):
         """
         Initialize the DataLoader with the file path and app name.
         :param file_path: The path to the directory containing the data files.
         :param app_name: The name of the app to load data for.
         If no app is specified, it will look for data files in any app's data directory.
+        :param batch_size: Number of entries written per transaction.
+        :param max_workers: Number of models loaded concurrently within a dependency level.
+        :param force: Load every file and entry, even when the manifest says they did not change.
+        :param track_entries: Keep a hash per entry so only changed entries of a changed file are applied.
+        :param resumable: Load file by file with a checkpoint per batch (see CheckpointedLoader), so an
+        interrupted load resumes where it stopped. Changed files are then loaded whole.
+        :param restart: With 'resumable', ignore the checkpoints and load the changed files from the start.
+        :param progress: With 'resumable', callback receiving the progress after every batch.
         :raises FileNotFoundError: If no JSON data files are found in the specified path.
         """
         self.file_path = file_path
         self.app = app_name
+        self.batch_size = batch_size or getattr(settings, "DATA_LOADER_BATCH_SIZE", 1000)
+        self.max_workers = max_workers or getattr(settings, "DATA_LOADER_MAX_WORKERS", 4)
+        self.force = force
+        self.track_entries = getattr(settings, "DATA_LOADER_TRACK_ENTRIES", True) if track_entries is None else track_entries
+        if resumable:
+            # Entry ordinals cannot be recovered when resuming in the middle of a file
+            self.track_entries = False
+        self.resumable = resumable
+        self.restart = restart
+        self.progress = progress
+        self.report = {}
 
     def execute(self):
         """
@@ -46,9 +71,13 @@ class DataLoader:
         The 'object' key should be in the format 'app_label.model_name'.
         The 'action' key should specify the action to perform (e.g., 'create').
         The 'data' key should contain the data to be saved.
-        This method will resolve ForeignKey fields by fetching the related model instance using the provided ID.
+        The models of all files are loaded in foreign key dependency order, independent models
+        concurrently (see DependencyOrderedLoader). Entries are applied in batches grouped by model:
+        foreign keys are verified with one query per related model and rows are written with
+        bulk_create/bulk_update. Per-level timings are logged and kept in 'report'.
+        Files and entries that did not change since the last load are skipped (see FixtureManifest).
         The method will return a list of saved objects.
-        If an error occurs while saving, it will print the error message and continue with the next entry.
+        If an entry cannot be saved, the error is logged and loading continues with the next entry.
         :param data: List of JSON file paths containing the data to be saved.
         :return: List of saved objects.
         """
@@ -63,64 +92,23 @@ class DataLoader:
                     "data": []
                 }
 
-            results = []
-            for file_path in data:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    json_data = json.load(f)
-                    for entry in json_data:
-                        object_path = entry.get("object")
-                        action = entry.get("action")
-                        obj_data = entry.get("data")
-                        if not (object_path and action and obj_data):
-                            continue
-                        try:
-                            logger.info(f"Creating {object_path} with data: {obj_data}")
-                            app_label, model_name = object_path.split(".")
-                            Model = apps.get_model(app_label, model_name)
-                            if not Model:
-                                print(f"Model not found for {object_path}")
-                                continue
-                            if action == "create":
-                                # Handle create or upsert by ID
-                                obj_id = obj_data.pop("id", None)
-                                # Resolve ForeignKey fields
-                                for field, value in list(obj_data.items()):
-                                    try:
-                                        model_field = Model._meta.get_field(field)
-                                        if model_field.is_relation and model_field.many_to_one:
-                                            obj_data[field] = model_field.related_model.objects.get(pk=value)
-                                    except Exception:
-                                        pass  # Not a relation or invalid field, skip
+            manifest = FixtureManifest(force=self.force, track_entries=self.track_entries)
+            changed = manifest.changed_files(data)
+            if not changed:
+                logger.info("All data files are unchanged since they were last loaded.")
+                return {"code": 200, "status": "success", "message": "Data is up to date", "data": []}
 
-                                if obj_id and Model.objects.filter(pk=obj_id).exists():
-                                    obj = Model.objects.get(pk=obj_id)
-                                    for field, value in obj_data.items():
-                                        setattr(obj, field, value)
-                                    obj.save()
-                                    logger.info(f"Successfully updated {object_path} with data: {obj_data}")
-                                else:
-                                    if obj_id:
-                                        obj = Model.objects.create(id=obj_id, **obj_data)
-                                    else:
-                                        obj = Model.objects.create(**obj_data)
-                                    logger.info(f"Successfully created {object_path} with data: {obj_data}")
-                                results.append({"object": object_path, "id": obj.id})
-                            elif action == "update":
-                                # Add more actions as needed
-                                obj_id = obj_data.pop("id", None)
-                                if obj_id:
-                                    obj = Model.objects.get(pk=obj_id)
-                                    for field, value in obj_data.items():
-                                        setattr(obj, field, value)
-                                    obj.save()
-                                    results.append({"object": object_path, "id": obj.id})
-                                    logger.info(f"Successfully updated {object_path} with data: {obj_data}")
-                                else:
-                                    results.append({"object": object_path, "id": None})
-                                    logger.error(f"ID not provided for update action on {object_path}")
-                        except Exception as e:
-                            print(f"Error saving {object_path}: {e}")
-                            logger.error(f"Error saving {object_path}: {e}")
+            if self.resumable:
+                return self._load_resumable(changed, manifest)
+
+            loader = DependencyOrderedLoader(changed, max_workers=self.max_workers, batch_size=self.batch_size, manifest=manifest)
+            results = loader.execute()
+            manifest.record(loader.failed_keys)
+            self.report = loader.report
+            logger.info(
+                f"Loaded {len(results)} entries with {len(loader.errors)} errors in {loader.report['seconds']}s: "
+                f"{loader.report['summary']}"
+            )
             # Construct the final results
             return {
                 "code": 200,
@@ -130,6 +118,7 @@ class DataLoader:
             }
         except Exception as e:
             logger.error(f"Error saving data to database: {e}")
+            self.report = dict(self.report, error=str(e))
             # Construct an empty result list if an error occurs
             return {
                 "code": 500,
@@ -138,6 +127,30 @@ class DataLoader:
                 "data": []
             }
     
+    def _load_resumable(self, files, manifest):
+        """
+        Load the files with a checkpoint per batch. Per-entry results are not collected, the
+        per-model summary is kept in 'report'. Errors other than failing entries propagate, leaving
+        the checkpoints of the committed batches for the next run.
+        """
+        loader = CheckpointedLoader(
+            files, batch_size=self.batch_size, manifest=manifest, progress=self.progress, restart=self.restart
+        )
+        loader.execute()
+        manifest.record(loader.failed_keys)
+        loader.clear_checkpoints()
+        self.report = dict(loader.report, errors=loader.errors)
+        logger.info(
+            f"Loaded {loader.report['rows']} entries with {len(loader.errors)} errors in {loader.report['seconds']}s: "
+            f"{loader.report['summary']}"
+        )
+        return {
+            "code": 200,
+            "status": "success",
+            "message": "Data loaded successfully",
+            "data": [],
+        }
+
     def _get_data_file(self):
         """
         Get the first JSON data file from the specified app's data directory.
@@ -148,11 +161,14 @@ class DataLoader:
         try:
             if self.app:
                 data_dir = os.path.join('apps', self.app, 'data')
-                pattern = os.path.join(data_dir, '*.json')
             else:
-                pattern = os.path.join(self.file_path, '*', 'data', '*.json')
-            print(f"Searching for JSON files in: {pattern}")
-            files = glob.glob(pattern)
+                data_dir = os.path.join(self.file_path, '*', 'data')
+            logger.info(f"Searching for JSON files in: {data_dir}")
+            files = sorted(
+                file_path
+                for extension in DATA_FILE_EXTENSIONS
+                for file_path in glob.glob(os.path.join(data_dir, f'*{extension}'))
+            )
 
             if not files:
                 raise FileNotFoundError("No JSON data files found in the specified path.")
@@ -0,0 +1,182 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.apps import apps
+from django.db import DEFAULT_DB_ALIAS, connections
+from apps.utils.common.fixtures.reader import FixtureReader
+from apps.utils.common.logger import logger
+from apps.utils.logic.services.batch_upsert import BatchUpsertEngine
+from apps.utils.logic.services.fixture_manifest import entry_hash, entry_key
+
+logger = logger.PortalLogger("DEPENDENCY_LOADER")
+
+def scan_fixture_models(files):
+    """
+    Stream every fixture file once and return {object path: [files containing it]}, in the order
+    the object paths first appear.
+    """
+    models = {}
+    for file_path in files:
+        for entry in FixtureReader(file_path):
+            object_path = entry.get("object")
+            if not object_path:
+                continue
+            paths = models.setdefault(object_path, [])
+            if not paths or paths[-1] != file_path:
+                paths.append(file_path)
+    return models
+
+def _resolve_model(object_path):
+    try:
+        return apps.get_model(object_path)
+    except (LookupError, ValueError):
+        return None
+
+def dependency_levels(object_paths):
+    """
+    Sort object paths into levels with Kahn's algorithm over the foreign keys of their models.
+    Every model only references models of earlier levels, so the models of one level are
+    independent of each other. Self references are ignored here; the upsert engine writes rows of
+    one model in entry order. Models caught in a reference cycle are returned together as the
+    last level, to be loaded in a single pass.
+    :return: (levels, cyclic) where levels is a list of lists of object paths.
+    """
+    by_model = {}
+    for object_path in object_paths:
+        model = _resolve_model(object_path)
+        # Unknown object paths have no dependencies, the engine reports their entries as errors
+        by_model[object_path] = model
+    path_of = {model: object_path for object_path, model in by_model.items() if model is not None}
+
+    depends_on = {object_path: set() for object_path in object_paths}
+    for object_path, model in by_model.items():
+        if model is None:
+            continue
+        for field in model._meta.concrete_fields:
+            if field.is_relation and field.related_model is not model and field.related_model in path_of:
+                depends_on[object_path].add(path_of[field.related_model])
+
+    levels, done = [], set()
+    remaining = list(object_paths)
+    while remaining:
+        level = [object_path for object_path in remaining if depends_on[object_path] <= done]
+        if not level:
+            logger.warning(f"Foreign key cycle between {', '.join(remaining)}, loading them in a single pass.")
+            levels.append(remaining)
+            return levels, True
+        levels.append(level)
+        done.update(level)
+        remaining = [object_path for object_path in remaining if object_path not in done]
+    return levels, False
+
+class DependencyOrderedLoader:
+    """
+    Loads fixture files in foreign key dependency order, with the independent models of each
+    dependency level loaded concurrently.
+    The files are scanned once to find the models they contain, the models are sorted into levels
+    (see dependency_levels) and each level is loaded on a bounded thread pool. Every worker loads
+    one model with its own BatchUpsertEngine and, being its own thread, its own database connection,
+    which is closed when the worker is done. On SQLite, which allows a single writer, the models
+    of a level are loaded one after the other.
+    Usage:
+        loader = DependencyOrderedLoader(files, max_workers=4, batch_size=1000)
+        loader.execute()
+        loader.results  # [{"object": "app.Model", "id": 1}, ...] level by level, model by model
+        loader.report   # {"levels": [{"models": [...], "seconds": 0.1}], "summary": {...}}
+    Attributes:
+        files (list): Fixture file paths.
+        max_workers (int): Maximum number of models loaded concurrently.
+        batch_size (int): Entries per transaction of each worker.
+        manifest (FixtureManifest): Optional manifest deciding which entries changed and need applying.
+    """
+    def __init__(self, files, max_workers=4, batch_size=1000, manifest=None):
+        self.files = files
+        self.max_workers = max(1, max_workers)
+        if connections[DEFAULT_DB_ALIAS].vendor == "sqlite":
+            # SQLite allows a single writer at a time, concurrent workers would only hit lock errors
+            self.max_workers = 1
+        self.batch_size = batch_size
+        self.manifest = manifest
+        self.results = []
+        self.errors = []
+        self.failed_keys = set()
+        self.report = {"levels": [], "summary": {}}
+
+    def execute(self):
+        started = time.perf_counter()
+        models = scan_fixture_models(self.files)
+        levels, cyclic = dependency_levels(list(models))
+        for number, level in enumerate(levels):
+            level_started = time.perf_counter()
+            if cyclic and number == len(levels) - 1:
+                # Files are read in order and all models of the cycle share one engine
+                outcomes = [self._load(level, self._files_of(models, level))]
+            elif len(level) == 1 or self.max_workers == 1:
+                outcomes = [self._load([object_path], models[object_path]) for object_path in level]
+            else:
+                with ThreadPoolExecutor(max_workers=min(self.max_workers, len(level)), thread_name_prefix="data-loader") as pool:
+                    outcomes = list(pool.map(self._load_in_thread, [([object_path], models[object_path]) for object_path in level]))
+            for engine in outcomes:
+                self.results.extend(engine.results)
+                self.errors.extend(engine.errors)
+                self.failed_keys |= engine.failed_keys
+                self.report["summary"].update(engine.summary())
+            seconds = time.perf_counter() - level_started
+            self.report["levels"].append({"models": level, "seconds": round(seconds, 3)})
+            logger.info(f"Level {number}: loaded {', '.join(level)} in {seconds:.3f}s")
+        self.report["seconds"] = round(time.perf_counter() - started, 3)
+        return self.results
+
+    @staticmethod
+    def _files_of(models, object_paths):
+        files = []
+        for object_path in object_paths:
+            for file_path in models[object_path]:
+                if file_path not in files:
+                    files.append(file_path)
+        return files
+
+    def _load_in_thread(self, arguments):
+        try:
+            return self._load(*arguments)
+        finally:
+            connections.close_all()
+
+    def _load(self, object_paths, files):
+        wanted = set(object_paths)
+        tracking = self.manifest is not None and self.manifest.track_entries
+        # (file path, entry key, entry hash) of the entries added since the last flush
+        tracked = []
+
+        def record_tracked(engine):
+            self.manifest.record_entries(tracked, engine.failed_keys)
+            tracked.clear()
+
+        engine = BatchUpsertEngine(batch_size=self.batch_size, on_flush=record_tracked if tracking else None)
+        for file_path in files:
+            ordinals = {}
+            batch = []
+            for entry in FixtureReader(file_path):
+                object_path = entry.get("object")
+                if object_path not in wanted:
+                    continue
+                if self.manifest is None:
+                    engine.add(entry)
+                    continue
+                if not tracking:
+                    # A failure still has to keep the file out of the manifest
+                    engine.add(entry, key=(file_path, None))
+                    continue
+                ordinals[object_path] = ordinal = ordinals.get(object_path, -1) + 1
+                batch.append((entry_key(entry, ordinal), entry_hash(entry), entry))
+                if len(batch) >= self.batch_size:
+                    self._add_changed(engine, file_path, batch, tracked)
+                    batch = []
+            if tracking:
+                self._add_changed(engine, file_path, batch, tracked)
+        engine.flush()
+        return engine
+
+    def _add_changed(self, engine, file_path, batch, tracked):
+        for key, digest, entry in self.manifest.changed_entries(file_path, batch):
+            tracked.append((file_path, key, digest))
+            engine.add(entry, key=(file_path, key))
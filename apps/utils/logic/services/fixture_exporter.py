@@ -0,0 +1,143 @@
+from collections import deque
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from apps.utils.common.logger import logger
+from apps.utils.logic.services.dependency_loader import dependency_levels
+
+logger = logger.PortalLogger("FIXTURE_EXPORTER")
+
+EXPORT_FORMATS = ("array", "ndjson")
+TENANT_MODEL = "company.CompanyDetails"
+
+def company_lookup(model, max_depth=4):
+    """
+    Shortest chain of forward foreign keys from the model to the company, as an ORM lookup
+    ('pk', 'company', 'payment__company', ...), or None when the model does not belong to a company.
+    """
+    tenant = apps.get_model(TENANT_MODEL)
+    if model is tenant:
+        return "pk"
+    pending, seen = deque([(model, [])]), {model}
+    while pending:
+        current, path = pending.popleft()
+        if len(path) >= max_depth:
+            continue
+        for field in current._meta.concrete_fields:
+            if not (field.is_relation and (field.many_to_one or field.one_to_one)) or field.related_model is None:
+                continue
+            if field.related_model is tenant:
+                return "__".join(path + [field.name])
+            if field.related_model not in seen:
+                seen.add(field.related_model)
+                pending.append((field.related_model, path + [field.name]))
+    return None
+
+def resolve_object_paths(names):
+    """
+    Expand app labels to the object paths of their models and check the given object paths.
+    :raises LookupError: For an unknown app label or model.
+    """
+    object_paths = []
+    for name in names:
+        if "." in name:
+            model = apps.get_model(name)
+            object_paths.append(f"{model._meta.app_label}.{model.__name__}")
+        else:
+            object_paths.extend(f"{name}.{model.__name__}" for model in apps.get_app_config(name).get_models())
+    return list(dict.fromkeys(object_paths))
+
+class FixtureExporter:
+    """
+    Streams rows into DataLoader fixtures, the reverse of DataLoader.
+    Every row becomes a {"object": "app.Model", "action": "create", "data": {"id": ..., ...}} entry
+    with foreign keys as raw ids, written as a JSON array or NDJSON. Loading the export with
+    DataLoader creates the missing rows and updates the existing ones.
+    - models are written in foreign key dependency order (see dependency_levels), so a loader
+      reading the file front to back finds every parent before its children
+    - rows are read with keyset pagination on the primary key, 'chunk_size' rows per query,
+      and written as they are read, so memory stays flat whatever the size of the tables
+    - with 'company_id' every model reaching the company through its foreign keys is limited to
+      the rows of that company; without 'object_paths' that is every such model of the project.
+      Explicitly listed models that do not belong to a company are exported whole.
+    Usage:
+        with open("tenant.ndjson", "w") as output:
+            exporter = FixtureExporter(output, company_id=1, export_format="ndjson")
+            exporter.execute()
+        exporter.counts  # {"company.CompanyDetails": 1, "company.CompanyAddress": 2, ...}
+    Attributes:
+        output: Text stream the fixture is written to.
+        object_paths (list): 'app.Model' paths to export, every company model by default.
+        company_id (int): Only export the rows of this company.
+        export_format (str): "array" for the DataLoader JSON array, "ndjson" for one entry per line.
+        chunk_size (int): Rows read per query.
+    """
+    def __init__(self, output, object_paths=None, company_id=None, export_format="array", chunk_size=2000):
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{export_format}', expected one of {', '.join(EXPORT_FORMATS)}.")
+        if not object_paths and company_id is None:
+            raise ValueError("Specify the models to export, a company, or both.")
+        self.output = output
+        self.object_paths = object_paths
+        self.company_id = company_id
+        self.export_format = export_format
+        self.chunk_size = chunk_size
+        self.counts = {}
+        self._encoder = DjangoJSONEncoder(separators=(",", ":"))
+        self._written = 0
+
+    def execute(self):
+        object_paths = self.object_paths or self._company_models()
+        levels, cyclic = dependency_levels(object_paths)
+        if cyclic:
+            logger.warning(f"Foreign key cycle between {', '.join(levels[-1])}, the export may need two loads.")
+        if self.export_format == "array":
+            self.output.write("[")
+        for level in levels:
+            for object_path in level:
+                self._export_model(object_path)
+        if self.export_format == "array":
+            self.output.write("\n]\n" if self._written else "]\n")
+        logger.info(f"Exported {self._written} rows: {self.counts}")
+        return self.counts
+
+    def _company_models(self):
+        return [
+            f"{model._meta.app_label}.{model.__name__}"
+            for model in apps.get_models()
+            if model.__module__.startswith("apps.") and company_lookup(model) is not None
+        ]
+
+    def _queryset(self, model):
+        queryset = model._default_manager.all()
+        if self.company_id is not None:
+            lookup = company_lookup(model)
+            if lookup is not None:
+                queryset = queryset.filter(**{lookup: self.company_id})
+        return queryset
+
+    def _export_model(self, object_path):
+        model = apps.get_model(object_path)
+        pk_name = model._meta.pk.attname
+        fields = [field.attname for field in model._meta.concrete_fields if not field.primary_key]
+        queryset = self._queryset(model).order_by("pk").values_list(pk_name, *fields)
+        count, last_pk = 0, None
+        while True:
+            page = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(page[:self.chunk_size])
+            for row in rows:
+                data = {"id": row[0]}
+                data.update(zip(fields, row[1:]))
+                self._write({"object": object_path, "action": "create", "data": data})
+            count += len(rows)
+            if len(rows) < self.chunk_size:
+                break
+            last_pk = rows[-1][0]
+        self.counts[object_path] = count
+
+    def _write(self, entry):
+        text = self._encoder.encode(entry)
+        if self.export_format == "ndjson":
+            self.output.write(text + "\n")
+        else:
+            self.output.write(("\n    " if not self._written else ",\n    ") + text)
+        self._written += 1
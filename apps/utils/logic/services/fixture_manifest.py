@@ -0,0 +1,189 @@
+import hashlib
+import json
+import threading
+from django.db import transaction
+from apps.utils.common.fixtures.reader import FixtureReader
+from apps.utils.common.logger import logger
+from apps.utils.models import DataLoaderManifest, DataLoaderManifestEntry
+
+logger = logger.PortalLogger("FIXTURE_MANIFEST")
+
+HASH_CHUNK_SIZE = 1024 * 1024
+ENTRY_BATCH_SIZE = 1000
+
+def file_hash(file_path):
+    """
+    SHA-256 of the file content, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def entry_hash(entry):
+    return hashlib.sha256(json.dumps(entry, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")).hexdigest()
+
+def entry_key(entry, ordinal):
+    """
+    Identify an entry within its file: by object and id when the entry has an id, otherwise by
+    object and its position among the entries of that object in the file.
+    """
+    data = entry.get("data") or {}
+    if data.get("id") is not None:
+        return f"{entry.get('object')}:{data['id']}"
+    return f"{entry.get('object')}#{ordinal}"
+
+def file_entries(file_path):
+    """
+    Yield the (entry key, entry hash) of every entry of the file, in file order.
+    """
+    ordinals = {}
+    for entry in FixtureReader(file_path):
+        object_path = entry.get("object")
+        ordinals[object_path] = ordinal = ordinals.get(object_path, -1) + 1
+        yield entry_key(entry, ordinal), entry_hash(entry)
+
+class FixtureManifest:
+    """
+    Records what DataLoader loaded so unchanged fixtures are not loaded again.
+    Per file the manifest keeps the content hash and the load timestamp and, with 'track_entries',
+    a hash per entry:
+    - files whose content hash matches the manifest are skipped entirely
+    - of a changed file, only the entries whose hash differs from the manifest are applied
+    - 'force' loads every file and entry regardless of the manifest
+    Entry hashes are compared and written a batch at a time while the file is streamed, so memory
+    does not grow with the size of the fixtures: the loader asks for the changed entries of a batch
+    (one query) and records the hashes of the applied entries in the transaction that applied them.
+    Entries that failed to load are left out of the manifest, and so is the content hash of their
+    file, so they are retried on the next load. The manifest may be shared by concurrent loader
+    threads.
+    Usage:
+        manifest = FixtureManifest(force=False, track_entries=True)
+        files = manifest.changed_files(files)
+        ...  # while loading: changed = manifest.changed_entries(file_path, [(key, digest, entry), ...])
+        ...  # once applied:  manifest.record_entries([(file_path, key, digest), ...], failed_keys)
+        manifest.record(failed_keys)
+    Attributes:
+        force (bool): Ignore the manifest when deciding what to load.
+        track_entries (bool): Keep and compare a hash per entry.
+    """
+    def __init__(self, force=False, track_entries=True):
+        self.force = force
+        self.track_entries = track_entries
+        self.file_hashes = {}
+        self.manifest_ids = {}
+        self.entry_counts = {}
+        self.skipped_entries = 0
+        self._lock = threading.Lock()
+
+    def changed_files(self, files):
+        """
+        Return the files whose content changed since they were last loaded, or all files with 'force'.
+        Costs one query for the file hashes; with 'track_entries' the changed files loaded for the
+        first time get their manifest row, with an empty content hash until they are recorded.
+        """
+        self.file_hashes = {file_path: file_hash(file_path) for file_path in files}
+        if self.force:
+            changed = list(files)
+        else:
+            recorded = dict(
+                DataLoaderManifest.objects.filter(file_path__in=files).values_list("file_path", "content_hash")
+            )
+            changed = [file_path for file_path in files if recorded.get(file_path) != self.file_hashes[file_path]]
+            if len(changed) < len(files):
+                logger.info(f"Skipping {len(files) - len(changed)} unchanged fixture files.")
+        if self.track_entries and changed:
+            DataLoaderManifest.objects.bulk_create(
+                [DataLoaderManifest(file_path=file_path) for file_path in changed], ignore_conflicts=True
+            )
+            self.manifest_ids = dict(
+                DataLoaderManifest.objects.filter(file_path__in=changed).values_list("file_path", "id")
+            )
+        self.entry_counts = {file_path: 0 for file_path in changed}
+        return changed
+
+    def changed_entries(self, file_path, entries):
+        """
+        Return the entries of a batch that changed since the last load, with one query per batch.
+        :param entries: (entry key, entry hash, entry) tuples of one file.
+        """
+        with self._lock:
+            self.entry_counts[file_path] += len(entries)
+        if not entries or self.force:
+            return list(entries)
+        recorded = dict(
+            DataLoaderManifestEntry.objects.filter(
+                manifest_id=self.manifest_ids[file_path], entry_key__in=[key for key, _, _ in entries]
+            ).values_list("entry_key", "entry_hash")
+        )
+        changed = [item for item in entries if recorded.get(item[0]) != item[1]]
+        with self._lock:
+            self.skipped_entries += len(entries) - len(changed)
+        return changed
+
+    def record_entries(self, entries, failed_keys=()):
+        """
+        Write the hashes of a batch of applied entries and drop those of the entries that failed,
+        so they are retried. Meant to run in the transaction that applied the entries.
+        :param entries: (file path, entry key, entry hash) tuples.
+        :param failed_keys: (file path, entry key) pairs of the entries that failed to load.
+        """
+        loaded, failed = [], {}
+        for file_path, key, digest in entries:
+            if (file_path, key) in failed_keys:
+                failed.setdefault(self.manifest_ids[file_path], []).append(key)
+            else:
+                loaded.append(DataLoaderManifestEntry(manifest_id=self.manifest_ids[file_path], entry_key=key, entry_hash=digest))
+        if loaded:
+            DataLoaderManifestEntry.objects.bulk_create(
+                loaded,
+                batch_size=ENTRY_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=["manifest", "entry_key"],
+                update_fields=["entry_hash"],
+            )
+        for manifest_id, keys in failed.items():
+            DataLoaderManifestEntry.objects.filter(manifest_id=manifest_id, entry_key__in=keys).delete()
+
+    def record(self, failed_keys=()):
+        """
+        Write the manifest of every changed file after it was loaded.
+        Entry hashes were recorded batch by batch; a file holding more of them than it has entries
+        lost entries since the last load and gets its entry hashes rebuilt from the file.
+        :param failed_keys: (file path, entry key) pairs of the entries that failed to load, the
+            key None when the entries of the file are not known.
+        """
+        failed_by_file = {}
+        for file_path, key in failed_keys:
+            failed_by_file.setdefault(file_path, set()).add(key)
+        with transaction.atomic():
+            for file_path, entry_count in self.entry_counts.items():
+                failed = failed_by_file.get(file_path, set())
+                manifest, _ = DataLoaderManifest.objects.update_or_create(
+                    file_path=file_path,
+                    defaults={
+                        "content_hash": "" if failed else self.file_hashes[file_path],
+                        "entry_count": entry_count,
+                    },
+                )
+                if not self.track_entries or None in failed:
+                    # Hashes of an earlier tracked load no longer describe what is in the database
+                    manifest.entries.all().delete()
+                elif manifest.entries.count() > entry_count - len(failed):
+                    self._rebuild_entries(manifest, file_path, failed)
+        if self.skipped_entries:
+            logger.info(f"Skipped {self.skipped_entries} unchanged fixture entries.")
+
+    @staticmethod
+    def _rebuild_entries(manifest, file_path, failed):
+        manifest.entries.all().delete()
+        batch = []
+        for key, digest in file_entries(file_path):
+            if key in failed:
+                continue
+            batch.append(DataLoaderManifestEntry(manifest=manifest, entry_key=key, entry_hash=digest))
+            if len(batch) >= ENTRY_BATCH_SIZE:
+                DataLoaderManifestEntry.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        DataLoaderManifestEntry.objects.bulk_create(batch, ignore_conflicts=True)
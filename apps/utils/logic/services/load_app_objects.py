@@ -1,14 +1,19 @@
 from apps.utils.common.logger import logger
 from django.apps import apps
+from django.db import router, transaction
+from django.utils import timezone
 from apps.access.models import AccessObjects
 import json
 
 logger = logger.PortalLogger("LOAD_APP_OBJECTS")
 
 class LoadAppObjects:
-    def __init__(self, request):
+    def __init__(self, request=None, prune=None, using=None):
         self.request = request
-        self.body = json.loads(request.body) if request.body else {}
+        # Database the objects are synced in, None lets the router choose
+        self.using = using
+        self.body = json.loads(request.body) if request is not None and request.body else {}
+        self.prune = bool(self.body.get("prune", False)) if prune is None else prune
 
     def execute(self):
         """
@@ -22,6 +27,8 @@ class LoadAppObjects:
         Usage:
         load_app_objects = LoadAppObjects(request)
         result = load_app_objects.execute()
+        LoadAppObjects(prune=True).execute()  # without a request
+        LoadAppObjects(using=using).execute()  # on post_migrate, in the migrated database
         :raises Exception: If an error occurs while loading or saving app objects.
         """
         module = "admin_portal"  # Default module name
@@ -47,36 +54,70 @@ class LoadAppObjects:
     
     def _save_objects_to_db(self, objects, module=None):
         """
-        Save the app objects to the database.
+        Sync the app objects with the AccessObjects table.
+        The existing rows are loaded with a single SELECT and diffed against the given objects:
+        new objects are inserted with one bulk_create, objects whose module or application changed are
+        written with one bulk_update, and unchanged objects are not touched. With 'prune', objects of
+        the same module that no longer exist are deleted.
         :param objects: A dictionary containing the app objects to be saved.
         The keys are the app labels and the values are lists of model names.
         :return: A dictionary containing the status of the operation.
-        If successful, it returns a success message with the number of objects saved.
-        If no objects are saved, it returns a 404 error with a message.
+        If successful, it returns the names of the created, updated and deleted objects.
+        If no objects are given, it returns a 404 error with a message.
         If an error occurs while saving, it returns a 500 error with the error message.
         """
         try:
-            output = []
+            module = module if module else 'default'
+            desired = {}
             for key, value in objects.items():
-                # Assuming 'AccessObjects' is the model to save the app objects
                 for obj in value:
-                    data = {
-                        'name': f"{key}.{obj}",
-                        'application': key,
-                        'model_name': obj,
-                        'module': module if module else 'default'
-                    }
-                    result = AccessObjects.objects.update_or_create(
-                        name=data['name'],
-                        defaults=data
-                    )
-                    output.append(str(result))
-            if len(output) == 0:
+                    desired[f"{key}.{obj}"] = {'application': key, 'model_name': obj, 'module': module}
+            if len(desired) == 0:
                 logger.error("No objects were saved to the database.")
                 return {"status": "error", "code": 404, "message": "No objects were saved.", "data": []}
-            else:
-                logger.info(f"Successfully saved {len(output)} objects to the database.")
-                return {"status": "success", "code": 200, "message": f"Saved {len(output)} objects.", "data": output}
+
+            manager = AccessObjects.objects.db_manager(self.using)
+            existing = {
+                row.name: row
+                for row in manager.only('id', 'name', 'application', 'model_name', 'module')
+            }
+            now = timezone.now()
+            created, updated = [], []
+            for name, data in desired.items():
+                row = existing.get(name)
+                if row is None:
+                    created.append(AccessObjects(name=name, **data))
+                elif any(getattr(row, field) != field_value for field, field_value in data.items()):
+                    for field, field_value in data.items():
+                        setattr(row, field, field_value)
+                    # bulk_update does not apply auto_now
+                    row.updated_at = now
+                    updated.append(row)
+            stale = {
+                name: row.id for name, row in existing.items() if name not in desired and row.module == module
+            } if self.prune else {}
+
+            if created or updated or stale:
+                with transaction.atomic(using=self.using or router.db_for_write(AccessObjects)):
+                    if created:
+                        manager.bulk_create(created)
+                    if updated:
+                        manager.bulk_update(updated, ['application', 'model_name', 'module', 'updated_at'])
+                    if stale:
+                        # Deleting an object cascades to its permissions, the signals invalidate them
+                        manager.filter(id__in=stale.values()).delete()
+
+            data = {
+                "created": [row.name for row in created],
+                "updated": [row.name for row in updated],
+                "deleted": list(stale),
+                "unchanged": len(desired) - len(created) - len(updated),
+            }
+            logger.info(
+                f"Synced {len(desired)} app objects: {len(created)} created, {len(updated)} updated, "
+                f"{len(stale)} deleted."
+            )
+            return {"status": "success", "code": 200, "message": f"Synced {len(desired)} objects.", "data": data}
         except Exception as e:
             logger.error(f"Error saving objects to database: {str(e)}")
             return {"status": "error", "code": 500, "message": str(e), "data": []}
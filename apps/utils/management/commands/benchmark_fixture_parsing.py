@@ -0,0 +1,99 @@
+import json
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+from django.core.management.base import BaseCommand
+from apps.utils.common.fixtures.reader import FixtureReader
+
+class Command(BaseCommand):
+    """
+    Benchmark the streaming fixture reader used by DataLoader.
+    Generates a fixture with the requested number of entries in every requested format and parses
+    it in a fresh child process, reporting the entries per second and the peak RSS of the parse.
+    With --compare-json-load the file is also parsed with a plain json.load for reference.
+    Usage:
+        python manage.py benchmark_fixture_parsing --entries 1000000 --formats array,ndjson --compare-json-load
+    """
+    help = "Report rows/sec and peak RSS of the streaming fixture reader for a generated fixture."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=1_000_000, help="Number of entries in the generated fixture.")
+        parser.add_argument("--formats", default="array,ndjson", help="Comma separated list of formats: array, ndjson.")
+        parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="Bytes read at a time by the reader.")
+        parser.add_argument("--compare-json-load", action="store_true", help="Also parse the JSON array with json.load.")
+        parser.add_argument("--directory", default=None, help="Directory for the generated fixtures, a temporary one by default.")
+
+    def handle(self, *args, **options):
+        formats = [name.strip() for name in options["formats"].split(",") if name.strip()]
+        directory = options["directory"] or tempfile.mkdtemp(prefix="fixture_benchmark_")
+        self.stdout.write(f"entries={options['entries']} chunk_size={options['chunk_size']} directory={directory}")
+        self.stdout.write(f"{'parser':>16} {'size_mb':>9} {'rows':>10} {'rows/sec':>11} {'peak_rss_mb':>12}")
+        for name in formats:
+            path = os.path.join(directory, f"fixture.{'json' if name == 'array' else 'ndjson'}")
+            self._generate(path, name, options["entries"])
+            size = os.path.getsize(path) / (1024 * 1024)
+            self._report(f"stream-{name}", size, self._run_isolated(_parse_streaming, path, options["chunk_size"]))
+            if name == "array" and options["compare_json_load"]:
+                self._report("json.load", size, self._run_isolated(_parse_json_load, path, options["chunk_size"]))
+            if not options["directory"]:
+                os.remove(path)
+        if not options["directory"]:
+            os.rmdir(directory)
+
+    def _report(self, parser, size, result):
+        rows, duration, peak_rss = result
+        rate = rows / duration if duration else 0.0
+        self.stdout.write(f"{parser:>16} {size:>9.1f} {rows:>10} {rate:>11.0f} {peak_rss / 1024:>12.1f}")
+
+    @staticmethod
+    def _generate(path, name, entries):
+        """
+        Write the fixture entry by entry so generating it does not inflate the measurements.
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            if name == "array":
+                f.write("[\n")
+            for index in range(entries):
+                entry = {
+                    "object": "company.CompanyDetails",
+                    "action": "create",
+                    "data": {"id": index + 1, "name": f"Company {index + 1}", "email": f"company{index + 1}@example.com", "is_active": True},
+                }
+                if name == "array":
+                    f.write(("    " if index == 0 else ",\n    ") + json.dumps(entry))
+                else:
+                    f.write(json.dumps(entry) + "\n")
+            if name == "array":
+                f.write("\n]\n")
+
+    @staticmethod
+    def _run_isolated(target, path, chunk_size):
+        """
+        Run the parse in a child process so every parser starts from the same baseline RSS.
+        """
+        context = multiprocessing.get_context("fork")
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(target=target, args=(path, chunk_size, sender))
+        process.start()
+        result = receiver.recv()
+        process.join()
+        return result
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    return peak / 1024 if sys.platform == "darwin" else peak
+
+def _parse_streaming(path, chunk_size, sender):
+    started = time.perf_counter()
+    rows = sum(1 for _ in FixtureReader(path, chunk_size=chunk_size))
+    sender.send((rows, time.perf_counter() - started, _peak_rss_kb()))
+
+def _parse_json_load(path, chunk_size, sender):
+    started = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        rows = len(json.load(f))
+    sender.send((rows, time.perf_counter() - started, _peak_rss_kb()))
@@ -0,0 +1,47 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from apps.utils.logic.services.fixture_exporter import EXPORT_FORMATS, FixtureExporter, resolve_object_paths
+
+class Command(BaseCommand):
+    """
+    Export rows as a DataLoader fixture, e.g. to clone a company or snapshot reference data.
+    Models are given as 'app.Model' or as an app label for all models of the app. With
+    --company-id only the rows of that company are exported, of every company model when no
+    model is given. The fixture is streamed to --output, or to stdout.
+    Usage:
+        python manage.py export_fixtures --company-id 1 --format ndjson --output tenant.ndjson
+        python manage.py export_fixtures subscription.SubscriptionPlan compliance --output reference.json
+    """
+    help = "Stream models, or all rows of one company, into a DataLoader fixture."
+
+    def add_arguments(self, parser):
+        parser.add_argument("models", nargs="*", help="'app.Model' paths or app labels to export.")
+        parser.add_argument("--company-id", type=int, default=None, help="Only export the rows of this company.")
+        parser.add_argument("--format", choices=EXPORT_FORMATS, default="array", help="JSON array or NDJSON.")
+        parser.add_argument("--output", default=None, help="File to write, stdout by default.")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Rows read per query.")
+
+    def handle(self, *args, **options):
+        try:
+            object_paths = resolve_object_paths(options["models"])
+        except LookupError as e:
+            raise CommandError(str(e))
+        if not object_paths and options["company_id"] is None:
+            raise CommandError("Specify the models to export, --company-id, or both.")
+
+        output = open(options["output"], "w", encoding="utf-8") if options["output"] else sys.stdout
+        try:
+            exporter = FixtureExporter(
+                output,
+                object_paths=object_paths,
+                company_id=options["company_id"],
+                export_format=options["format"],
+                chunk_size=options["chunk_size"],
+            )
+            counts = exporter.execute()
+        finally:
+            if options["output"]:
+                output.close()
+        # Keep stdout for the fixture itself
+        for object_path, count in counts.items():
+            self.stderr.write(f"{object_path}: {count}")
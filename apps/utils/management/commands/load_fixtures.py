@@ -0,0 +1,75 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.utils.logic.services.data_loader import DataLoader
+
+class Command(BaseCommand):
+    """
+    Load the fixture files of the apps outside of the request cycle.
+    Files are loaded with DataLoader in resumable mode: every batch commits together with a
+    (file, offset) checkpoint, so running the command again after a crash or an interrupt resumes
+    after the last committed batch. Unchanged files are skipped as with the DataLoader endpoint.
+    Progress is written at most every --progress-interval seconds, followed by a per-model summary.
+    Usage:
+        python manage.py load_fixtures --app administration --batch-size 1000
+        python manage.py load_fixtures --restart  # ignore the checkpoints
+    """
+    help = "Load app fixtures in checkpointed batches, resuming an interrupted load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--app", default=None, help="Only load the data directory of this app.")
+        parser.add_argument("--path", default="apps", help="Directory containing the apps, used without --app.")
+        parser.add_argument("--batch-size", type=int, default=None, help="Entries per transaction and checkpoint.")
+        parser.add_argument("--progress-interval", type=float, default=5.0, help="Seconds between progress lines.")
+        parser.add_argument("--force", action="store_true", help="Load files even when they did not change since the last load.")
+        parser.add_argument("--restart", action="store_true", help="Ignore the checkpoints and load the files from the start.")
+
+    def handle(self, *args, **options):
+        self._interval = options["progress_interval"]
+        self._last_progress = 0.0
+        data_loader = DataLoader(
+            file_path=options["path"],
+            app_name=options["app"],
+            batch_size=options["batch_size"],
+            force=options["force"],
+            resumable=True,
+            restart=options["restart"],
+            progress=self._progress,
+        )
+        try:
+            result = data_loader.execute()
+        except KeyboardInterrupt:
+            raise CommandError("Interrupted. Run the command again to resume from the last checkpoint.")
+        if result["code"] >= 400:
+            error = data_loader.report.get("error")
+            raise CommandError(
+                f"{result['message']}{f': {error}' if error else ''}. "
+                "Committed batches are checkpointed, run the command again to resume."
+            )
+        if not data_loader.report:
+            self.stdout.write(result["message"])
+            return
+
+        report = data_loader.report
+        for error in report["errors"]:
+            self.stderr.write(f"{error['object']} id={error['id']}: {error['error']}")
+        self.stdout.write(f"{'model':<40} {'created':>9} {'updated':>9} {'failed':>9}")
+        for label, counts in report["summary"].items():
+            self.stdout.write(f"{label:<40} {counts['created']:>9} {counts['updated']:>9} {counts['failed']:>9}")
+        rate = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+        message = f"Loaded {report['rows']} entries from {len(report['files'])} files in {report['seconds']}s ({rate:.0f} rows/s)"
+        if report["errors"]:
+            self.stdout.write(self.style.WARNING(f"{message} with {len(report['errors'])} errors."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{message}."))
+
+    def _progress(self, progress):
+        now = time.monotonic()
+        if now - self._last_progress < self._interval:
+            return
+        self._last_progress = now
+        eta = f"{progress['eta_seconds']:.0f}s" if progress["eta_seconds"] is not None else "-"
+        done = 100.0 * progress["bytes_done"] / progress["bytes_total"] if progress["bytes_total"] else 100.0
+        self.stdout.write(
+            f"{progress['file']}: {progress['rows']} rows, {progress['rows_per_second']:.0f} rows/s, "
+            f"queue {progress['queue_depth']}, {done:.1f}% done, eta {eta}"
+        )
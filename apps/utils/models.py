@@ -1,3 +1,74 @@
 from django.db import models
 
 # Create your models here.
+class DataLoaderManifest(models.Model):
+    file_path = models.CharField(max_length=500, unique=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='')  # empty when entries of the last load failed
+    entry_count = models.PositiveIntegerField(default=0)
+    loaded_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Data Loader Manifest"
+        verbose_name_plural = "Data Loader Manifests"
+        db_table = 'utils_data_loader_manifest'
+
+    def __str__(self):
+        return f"{self.file_path} ({self.content_hash[:12]})"
+
+class DataLoaderManifestEntry(models.Model):
+    manifest = models.ForeignKey(DataLoaderManifest, on_delete=models.CASCADE, related_name='entries')
+    entry_key = models.CharField(max_length=255)  # '<object>:<id>' or '<object>#<ordinal>' for entries without id
+    entry_hash = models.CharField(max_length=64)
+
+    class Meta:
+        verbose_name = "Data Loader Manifest Entry"
+        verbose_name_plural = "Data Loader Manifest Entries"
+        db_table = 'utils_data_loader_manifest_entry'
+        unique_together = ('manifest', 'entry_key')
+
+    def __str__(self):
+        return f"{self.manifest.file_path} {self.entry_key}"
+
+class DataLoaderCheckpoint(models.Model):
+    file_path = models.CharField(max_length=500, unique=True)
+    content_hash = models.CharField(max_length=64)  # the offset is only valid for this content
+    offset = models.PositiveBigIntegerField(default=0)  # byte offset after the last committed entry
+    entries_loaded = models.PositiveBigIntegerField(default=0)
+    has_failures = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Data Loader Checkpoint"
+        verbose_name_plural = "Data Loader Checkpoints"
+        db_table = 'utils_data_loader_checkpoint'
+
+    def __str__(self):
+        return f"{self.file_path} @ {self.offset}"
+
+class BackgroundJob(models.Model):
+    job_type = models.CharField(max_length=100)
+    status = models.CharField(max_length=20, choices=[
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed')
+    ], default='pending')
+    owner_id = models.PositiveBigIntegerField(blank=True, null=True)  # user id of the principal that started the job
+    processed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(blank=True, null=True)
+    result = models.JSONField(blank=True, null=True)
+    error = models.TextField(blank=True, default='')
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+        db_table = 'utils_background_job'
+
+    def __str__(self):
+        return f"{self.job_type} #{self.pk} ({self.status})"
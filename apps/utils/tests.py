@@ -1,3 +1,265 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone
+from unittest import skipUnless
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.http import http_date
+from apps.company.models import CompanyDetails
+from apps.partner.models import PartnerAdminCredential, PartnerDetails
+from apps.utils.common.pagination.keyset import CursorError, KeysetPage, encode_cursor
+from apps.utils.common.response.conditional import is_not_modified
+from apps.utils.logic.services.batch_upsert import BatchUpsertEngine
+from apps.utils.logic.services.data_loader import DataLoader
+from apps.utils.models import DataLoaderManifest
 
-# Create your tests here.
+class KeysetPageTests(TestCase):
+    """
+    Keyset pagination over a nullable column: every row is returned once, NULLs last.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        for name in ("Beta", None, "Acme", None, "Beta", None, "Gamma"):
+            CompanyDetails.objects.create(name=name, email="company@example.com")
+        named = CompanyDetails.objects.filter(name__isnull=False).order_by("name", "pk")
+        unnamed = CompanyDetails.objects.filter(name__isnull=True).order_by("pk")
+        cls.expected = [*named.values_list("pk", flat=True), *unnamed.values_list("pk", flat=True)]
+
+    def _walk(self, limit):
+        page, cursor, seen, pages = KeysetPage("name", limit), None, [], 0
+        while True:
+            rows, cursor = page.fetch(CompanyDetails.objects.all(), cursor)
+            seen.extend(row.pk for row in rows)
+            pages += 1
+            if cursor is None:
+                return seen, pages
+
+    def test_pages_cover_every_row_once_with_nulls_last(self):
+        for limit in (1, 2, 3, 7, 10):
+            with self.subTest(limit=limit):
+                seen, pages = self._walk(limit)
+                self.assertEqual(seen, self.expected)
+                self.assertEqual(pages, max(1, -(-len(self.expected) // limit)))
+
+    def test_cursor_inside_the_null_rows(self):
+        first_null = CompanyDetails.objects.filter(name__isnull=True).order_by("pk").first()
+        rows, _ = KeysetPage("name", 10).fetch(CompanyDetails.objects.all(), encode_cursor([None, first_null.pk]))
+        self.assertEqual([row.pk for row in rows], self.expected[self.expected.index(first_null.pk) + 1:])
+
+    def test_cursor_before_the_null_rows_reaches_them(self):
+        last_named = CompanyDetails.objects.filter(name="Gamma").get()
+        rows, cursor = KeysetPage("name", 10).fetch(CompanyDetails.objects.all(), encode_cursor(["Gamma", last_named.pk]))
+        self.assertEqual([row.name for row in rows], [None, None, None])
+        self.assertIsNone(cursor)
+
+    def test_cursor_condition_is_a_range_start(self):
+        acme = CompanyDetails.objects.get(name="Acme")
+        with CaptureQueriesContext(connection) as queries:
+            KeysetPage("name", 2).fetch(CompanyDetails.objects.all(), encode_cursor(["Acme", acme.pk]))
+        # The page is filled by named rows, so the NULL tail is not read
+        self.assertEqual(len(queries.captured_queries), 1)
+        sql = queries.captured_queries[0]["sql"]
+        self.assertIn('"name" >= ', sql)
+        self.assertNotIn("IS NULL", sql)
+
+    def test_null_tail_is_read_only_when_the_page_is_not_full(self):
+        gamma = CompanyDetails.objects.get(name="Gamma")
+        with CaptureQueriesContext(connection) as queries:
+            KeysetPage("name", 2).fetch(CompanyDetails.objects.all(), encode_cursor(["Beta", gamma.pk - 1]))
+        self.assertEqual(len(queries.captured_queries), 2)
+        self.assertIn("IS NULL", queries.captured_queries[1]["sql"])
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+    def test_cursor_seeks_into_the_name_index(self):
+        acme = CompanyDetails.objects.get(name="Acme")
+        page = KeysetPage("name", 2)
+        plan = page.valued(CompanyDetails.objects.all(), "Acme", acme.pk)[:3].explain()
+        self.assertIn("USING INDEX company_details_name_id_idx (name>?)", plan)
+        plan = page.nulls(CompanyDetails.objects.all(), acme.pk)[:3].explain()
+        self.assertIn("company_details_name_id_idx (name=?", plan)
+
+    def test_rejects_invalid_cursors(self):
+        page = KeysetPage("name", 10)
+        for cursor in ("not-base64!", encode_cursor(["Acme"]), encode_cursor(["Acme", "1"]), encode_cursor(["Acme", True])):
+            with self.subTest(cursor=cursor), self.assertRaises(CursorError):
+                page.fetch(CompanyDetails.objects.all(), cursor)
+
+class BatchUpsertEngineTests(TestCase):
+    """
+    Bulk writes of fixture entries and the row by row retry of a batch that cannot be written in bulk.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.partner = PartnerDetails.objects.create(name="North", contact_email="north@example.com")
+
+    @staticmethod
+    def _partner(action, **data):
+        return {"object": "partner.PartnerDetails", "action": action, "data": dict(contact_email="p@example.com", **data)}
+
+    @staticmethod
+    def _credential(username, partner_id):
+        return {
+            "object": "partner.PartnerAdminCredential",
+            "action": "create",
+            "data": {"partner": partner_id, "username": username, "password": "hash"},
+        }
+
+    def test_creates_and_updates_in_bulk(self):
+        engine = BatchUpsertEngine(batch_size=10)
+        engine.add(self._partner("create", id=500, name="South"))
+        engine.add(self._partner("create", name="East"))
+        engine.add(self._partner("update", id=self.partner.id, name="North West"))
+        # Existence check, an INSERT for the rows with and without an id and one UPDATE, plus the
+        # savepoints of the flush and of the bulk write
+        with self.assertNumQueries(8):
+            engine.flush()
+        self.assertEqual(engine.errors, [])
+        self.assertEqual(engine.summary(), {"partner.PartnerDetails": {"created": 2, "updated": 1, "failed": 0}})
+        ids = [result["id"] for result in engine.results]
+        self.assertEqual((ids[0], ids[2]), (500, self.partner.id))
+        self.assertEqual(
+            set(PartnerDetails.objects.values_list("name", flat=True)), {"South", "East", "North West"}
+        )
+
+    def test_update_of_a_row_created_in_the_same_batch(self):
+        engine = BatchUpsertEngine(batch_size=10)
+        engine.add(self._partner("create", id=600, name="South"))
+        engine.add(self._partner("update", id=600, name="South East"))
+        engine.flush()
+        self.assertEqual(engine.errors, [])
+        self.assertEqual(engine.results, [{"object": "partner.PartnerDetails", "id": 600}] * 2)
+        self.assertEqual(PartnerDetails.objects.get(pk=600).name, "South East")
+
+    def test_update_of_a_row_whose_create_failed(self):
+        engine = BatchUpsertEngine(batch_size=10)
+        engine.add(self._credential("alice", self.partner.id), key="first")
+        duplicate = self._credential("alice", self.partner.id)
+        duplicate["data"]["id"] = 700
+        engine.add(duplicate, key="duplicate")
+        engine.add({"object": "partner.PartnerAdminCredential", "action": "update", "data": {"id": 700, "password": "other"}}, key="update")
+        engine.flush()
+        self.assertEqual(engine.failed_keys, {"duplicate", "update"})
+        self.assertEqual(list(PartnerAdminCredential.objects.values_list("username", flat=True)), ["alice"])
+
+    def test_flushes_when_the_batch_is_full(self):
+        flushes = []
+        engine = BatchUpsertEngine(batch_size=2, on_flush=lambda engine: flushes.append(len(engine.results)))
+        for number in range(5):
+            engine.add(self._partner("create", name=f"Partner {number}"))
+        engine.flush()
+        self.assertEqual(len(flushes), 3)
+        self.assertEqual(PartnerDetails.objects.count(), 6)
+
+    def test_failed_bulk_write_is_retried_row_by_row(self):
+        engine = BatchUpsertEngine(batch_size=10)
+        engine.add(self._credential("alice", self.partner.id), key="first")
+        engine.add(self._credential("bob", self.partner.id), key="second")
+        engine.add(self._credential("alice", self.partner.id), key="duplicate")
+        engine.flush()
+        self.assertEqual(sorted(PartnerAdminCredential.objects.values_list("username", flat=True)), ["alice", "bob"])
+        self.assertEqual(engine.failed_keys, {"duplicate"})
+        self.assertEqual(engine.summary(), {"partner.PartnerAdminCredential": {"created": 2, "updated": 0, "failed": 1}})
+
+    def test_reports_entries_that_cannot_be_applied(self):
+        engine = BatchUpsertEngine(batch_size=10)
+        engine.add(self._credential("carol", 999999), key="missing partner")
+        engine.add({"object": "partner.Missing", "action": "create", "data": {"name": "x"}}, key="unknown model")
+        engine.add(self._partner("create", nickname="x"), key="unknown field")
+        engine.add(self._partner("update", id=999999, name="x"), key="missing row")
+        engine.flush()
+        self.assertEqual(engine.failed_keys, {"missing partner", "unknown model", "unknown field", "missing row"})
+        self.assertFalse(PartnerAdminCredential.objects.exists())
+
+class IsNotModifiedTests(SimpleTestCase):
+    """
+    Conditional GET evaluation: weak ETag comparison first, then If-Modified-Since by the second.
+    """
+    etag = '"42-1700000000123456"'
+    last_modified = datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+
+    def _request(self, **headers):
+        return RequestFactory().get("/", headers=headers)
+
+    def test_without_conditional_headers(self):
+        self.assertFalse(is_not_modified(self._request(), etag=self.etag, last_modified=self.last_modified))
+
+    def test_if_none_match_uses_the_weak_comparison(self):
+        for header in (self.etag, f"W/{self.etag}", f'"other", {self.etag}', "*"):
+            with self.subTest(header=header):
+                self.assertTrue(is_not_modified(self._request(**{"If-None-Match": header}), etag=self.etag))
+        self.assertTrue(is_not_modified(self._request(**{"If-None-Match": self.etag}), etag=f"W/{self.etag}"))
+        self.assertFalse(is_not_modified(self._request(**{"If-None-Match": '"42-1"'}), etag=self.etag))
+
+    def test_if_none_match_takes_precedence(self):
+        request = self._request(**{"If-None-Match": '"42-1"', "If-Modified-Since": http_date(self.last_modified.timestamp())})
+        self.assertFalse(is_not_modified(request, etag=self.etag, last_modified=self.last_modified))
+
+    def test_if_none_match_without_an_etag(self):
+        self.assertFalse(is_not_modified(self._request(**{"If-None-Match": "*"}), last_modified=self.last_modified))
+
+    def test_if_modified_since_compares_whole_seconds(self):
+        sent = http_date(self.last_modified.timestamp())
+        self.assertTrue(is_not_modified(self._request(**{"If-Modified-Since": sent}), last_modified=self.last_modified))
+        later = self.last_modified + timedelta(seconds=1)
+        self.assertFalse(is_not_modified(self._request(**{"If-Modified-Since": sent}), last_modified=later))
+
+    def test_ignores_an_invalid_date(self):
+        request = self._request(**{"If-Modified-Since": "yesterday"})
+        self.assertFalse(is_not_modified(request, last_modified=self.last_modified))
+
+class FixtureManifestTests(TestCase):
+    """
+    Entry hashes recorded batch by batch: unchanged entries are skipped, removed and failed entries
+    are dropped from the manifest.
+    """
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        os.makedirs(os.path.join(self.directory, "partner", "data"))
+        self.path = os.path.join(self.directory, "partner", "data", "partners.ndjson")
+
+    def _write(self, entries):
+        with open(self.path, "w") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+
+    @staticmethod
+    def _partner(number, name=None):
+        data = {"id": 1000 + number, "name": name or f"Partner {number}", "contact_email": "p@example.com"}
+        return {"object": "partner.PartnerDetails", "action": "create", "data": data}
+
+    def _load(self):
+        result = DataLoader(self.directory, None, batch_size=3, track_entries=True).execute()
+        return result, DataLoaderManifest.objects.get(file_path=self.path)
+
+    def test_only_changed_entries_are_applied(self):
+        self._write([self._partner(number) for number in range(7)])
+        result, manifest = self._load()
+        self.assertEqual(len(result["data"]), 7)
+        self.assertEqual((manifest.entries.count(), manifest.entry_count), (7, 7))
+
+        self._write([self._partner(number, "Renamed" if number == 2 else None) for number in range(7)])
+        result, manifest = self._load()
+        self.assertEqual(result["data"], [{"object": "partner.PartnerDetails", "id": 1002}])
+        self.assertEqual(PartnerDetails.objects.get(pk=1002).name, "Renamed")
+        self.assertEqual(manifest.entries.count(), 7)
+
+    def test_removed_entries_leave_the_manifest(self):
+        self._write([self._partner(number) for number in range(7)])
+        self._load()
+        self._write([self._partner(number) for number in range(5)])
+        result, manifest = self._load()
+        self.assertEqual(result["data"], [])
+        self.assertEqual(
+            sorted(manifest.entries.values_list("entry_key", flat=True)),
+            [f"partner.PartnerDetails:{1000 + number}" for number in range(5)],
+        )
+
+    def test_failed_entries_are_retried(self):
+        failing = {"object": "partner.PartnerDetails", "action": "create", "data": {"id": 2000, "nickname": "x"}}
+        self._write([self._partner(0), failing])
+        _, manifest = self._load()
+        self.assertEqual(manifest.content_hash, "")
+        self.assertEqual(list(manifest.entries.values_list("entry_key", flat=True)), ["partner.PartnerDetails:1000"])
@@ -6,4 +6,5 @@ app_name = 'utils'
 urlpatterns = [
     path('data_loader', views.DataLoaderView.as_view(), name='data_loader'),
     path('load_app_objects', views.LoadAppObjects.as_view(), name='load_app_objects'),
+    path('jobs', views.BackgroundJobStatusView.as_view(), name='background_job_status'),
 ]